@@ -0,0 +1,241 @@
+"""
+Admission Control Module
+
+Bounded concurrency and a bounded priority queue for chat turns. When
+the LLM slows down, excess turns are shed quickly with 503 + Retry-After
+instead of piling up in the server; sessions already in checkout are
+admitted ahead of browsing sessions.
+"""
+from typing import Any, Deque, Dict, List, Optional
+from collections import deque
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+from app.api.chat_body import BodyTooLarge, read_chat_body, send_json_error
+
+logger = logging.getLogger(__name__)
+
+# Queue priorities (lower is served first)
+PRIORITY_CHECKOUT = 0
+PRIORITY_DEFAULT = 1
+
+
+class AdmissionController:
+    """
+    Concurrency limiter with a priority wait queue.
+
+    At most max_concurrent turns run at once; up to max_queue more wait,
+    checkout turns first. A full queue rejects new default-priority turns
+    and lets a checkout turn displace the newest default-priority waiter.
+    Waiters give up after max_wait seconds.
+    """
+
+    def __init__(self, max_concurrent: int = 32, max_queue: int = 64, max_wait: float = 10.0, retry_after: int = 2):
+        """
+        Initialize the controller.
+
+        Args:
+            max_concurrent: Turns allowed to run at the same time
+            max_queue: Turns allowed to wait for a slot
+            max_wait: Seconds a turn may wait before being rejected
+            retry_after: Seconds suggested to rejected clients
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self.active = 0
+        self._waiters: List[tuple] = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._wait_times: Deque[float] = deque(maxlen=500)
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "timeout": 0, "displaced": 0}
+
+    async def acquire(self, priority: int = PRIORITY_DEFAULT) -> bool:
+        """
+        Wait for a slot.
+
+        Args:
+            priority: PRIORITY_CHECKOUT or PRIORITY_DEFAULT
+
+        Returns:
+            True if admitted (call release() when done), False if shed
+        """
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            self._wait_times.append(0.0)
+            return True
+
+        if len(self._waiters) >= self.max_queue and not self._displace(priority):
+            self.rejected["queue_full"] += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        started = time.perf_counter()
+        try:
+            admitted = await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            admitted = self._abandon(entry)
+            if not admitted:
+                self.rejected["timeout"] += 1
+                return False
+        except asyncio.CancelledError:
+            # Client went away; hand back a slot granted in the meantime
+            if self._abandon(entry):
+                self.release()
+            raise
+
+        if admitted:
+            self.admitted += 1
+            self._wait_times.append(time.perf_counter() - started)
+        return admitted
+
+    def _abandon(self, entry: tuple) -> bool:
+        """Remove a waiter; returns True if it had been granted a slot already."""
+        future = entry[2]
+        if future.done():
+            return future.result()
+        future.cancel()
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+        return False
+
+    def _displace(self, priority: int) -> bool:
+        """Make room for a higher-priority turn by shedding the newest lower-priority waiter."""
+        candidates = [entry for entry in self._waiters if entry[0] > priority]
+        if not candidates:
+            return False
+        victim = max(candidates)
+        self._waiters.remove(victim)
+        heapq.heapify(self._waiters)
+        victim[2].set_result(False)
+        self.rejected["displaced"] += 1
+        return True
+
+    def release(self):
+        """Free a slot, handing it straight to the best waiter if any."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(True)
+                return
+        self.active -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get admission metrics.
+
+        Returns:
+            Dictionary of active turns, queue depth, wait times and rejections
+        """
+        waits = sorted(self._wait_times)
+        p95 = waits[min(len(waits) - 1, int(0.95 * len(waits)))] if waits else None
+        return {
+            "active": self.active,
+            "queue_depth": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "avg_wait_ms": round(sum(waits) / len(waits) * 1000, 1) if waits else None,
+            "p95_wait_ms": round(p95 * 1000, 1) if p95 is not None else None
+        }
+
+
+def session_priority(session_id: Optional[str]) -> int:
+    """
+    Get the queue priority for a session.
+
+    Args:
+        session_id: Session identifier (may be None)
+
+    Returns:
+        PRIORITY_CHECKOUT if every order slot is filled, else PRIORITY_DEFAULT
+    """
+    from app.core.state_manager import state_manager
+    # Only look at known sessions so shed requests do not create state
+    if session_id and session_id in state_manager.states and state_manager.is_complete(session_id):
+        return PRIORITY_CHECKOUT
+    return PRIORITY_DEFAULT
+
+
+class ChatAdmissionMiddleware:
+    """
+    ASGI middleware applying admission control to chat turn requests.
+
+    Reads the (size-capped) JSON body to find the session, waits for a
+    slot and replays the body to the app; shed requests get 503 with
+    Retry-After, oversized bodies 413.
+    """
+
+    def __init__(self, app, paths: tuple = ("/api/chat",)):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            paths: Request paths subject to admission control (POST only)
+        """
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        from app.config.settings import settings
+        try:
+            chat, receive = await read_chat_body(scope, receive, settings.chat_max_body_bytes)
+        except BodyTooLarge as e:
+            logger.warning("Rejected chat turn: %s", e)
+            await send_json_error(send, 413, "Message too large.")
+            return
+        if chat is None:
+            return
+
+        controller = get_admission_controller()
+        if not await controller.acquire(session_priority(chat.session_id)):
+            logger.warning(
+                "Shedding chat turn for session %s: %d queued", chat.session_id, controller.get_stats()["queue_depth"]
+            )
+            await send_json_error(
+                send, 503, "Server is busy, please retry shortly.",
+                [(b"retry-after", str(controller.retry_after).encode())]
+            )
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
+
+
+# Global controller, created on first use
+_admission_controller = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """
+    Get or create the global chat admission controller.
+
+    Returns:
+        AdmissionController instance
+    """
+    global _admission_controller
+    if _admission_controller is None:
+        from app.config.settings import settings
+        _admission_controller = AdmissionController(
+            max_concurrent=settings.chat_max_concurrency,
+            max_queue=settings.chat_max_queue,
+            max_wait=settings.chat_max_queue_wait,
+            retry_after=settings.chat_retry_after
+        )
+    return _admission_controller
@@ -0,0 +1,120 @@
+"""
+Chat Request Body Module
+
+Body handling shared by the ASGI middlewares that look at chat turns
+before the route does (rate limiting, admission control). The body is
+read once with a size cap, its session_id parsed once, and replayed to
+the application; middlewares further in reuse the same parsed body.
+"""
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from app.utils.serialization import dumps, loads
+
+# Scope key under which the parsed body is shared between middlewares
+SCOPE_KEY = "app.chat_body"
+
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class BodyTooLarge(Exception):
+    """Raised when a chat request body exceeds the configured limit."""
+
+
+class ChatBody:
+    """A buffered chat request body and the session it belongs to."""
+    __slots__ = ("body", "session_id")
+
+    def __init__(self, body: bytes, session_id: Optional[str]):
+        self.body = body
+        self.session_id = session_id
+
+
+def _parse_session_id(body: bytes) -> Optional[str]:
+    try:
+        session_id = loads(body).get("session_id")
+    except (ValueError, AttributeError):
+        return None
+    return session_id if isinstance(session_id, str) else None
+
+
+async def read_chat_body(scope: Dict[str, Any], receive: Receive, max_bytes: int) -> Tuple[Optional[ChatBody], Receive]:
+    """
+    Buffer and parse a chat request body, or reuse the one an outer middleware read.
+
+    Args:
+        scope: ASGI HTTP scope
+        receive: ASGI receive callable
+        max_bytes: Largest accepted body
+
+    Returns:
+        Tuple of (ChatBody, or None if the client disconnected; receive
+        callable to pass to the wrapped app, which replays the body)
+
+    Raises:
+        BodyTooLarge: If the body (or its declared Content-Length) exceeds max_bytes
+    """
+    cached = scope.get(SCOPE_KEY)
+    if cached is not None:
+        # An outer middleware already buffered it; its receive replays the body
+        return cached, receive
+
+    for name, value in scope.get("headers", []):
+        if name == b"content-length":
+            try:
+                declared = int(value)
+            except ValueError:
+                break
+            if declared > max_bytes:
+                raise BodyTooLarge(f"Content-Length {declared} exceeds {max_bytes} bytes")
+            break
+
+    chunks = []
+    size = 0
+    more_body = True
+    while more_body:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None, receive
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > max_bytes:
+            raise BodyTooLarge(f"Body exceeds {max_bytes} bytes")
+        chunks.append(chunk)
+        more_body = message.get("more_body", False)
+
+    body = b"".join(chunks)
+    chat = scope[SCOPE_KEY] = ChatBody(body, _parse_session_id(body))
+
+    replayed = False
+
+    async def replay_receive() -> Dict[str, Any]:
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return chat, replay_receive
+
+
+async def send_json_error(send, status: int, detail: str, headers: Iterable[Tuple[bytes, bytes]] = ()):
+    """
+    Answer a request with a JSON error body ({"detail": ...}) from middleware.
+
+    Args:
+        send: ASGI send callable
+        status: HTTP status code
+        detail: Error message
+        headers: Extra response headers
+    """
+    payload = dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+            *headers
+        ]
+    })
+    await send({"type": "http.response.body", "body": payload})
@@ -3,18 +3,23 @@ API Dependencies Module
 
 Provides dependency injection for API routes.
 """
-from typing import Generator
+from typing import Generator, Union, TYPE_CHECKING
 import os
 import logging
 from app.services.groq_service import GroqService
 from app.core.state_manager import state_manager
-from app.db.storage import order_storage, conversation_storage
-from app.core.agent import OrderAgent
+from app.db import storage
+
+if TYPE_CHECKING:
+    # Imported on first use below; settings, agent and router are not needed at app import
+    from app.core.agent import OrderAgent
+    from app.services.llm_router import LLMBackend, LLMRouter
 
 logger = logging.getLogger(__name__)
 
 # Initialize Groq service
 _groq_service = None
+_llm_service = None
 
 
 def get_groq_service() -> GroqService:
@@ -30,24 +35,106 @@ def get_groq_service() -> GroqService:
     global _groq_service
     
     if _groq_service is None:
+        from app.config.settings import settings
+
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             raise Exception("GROQ_API_KEY not configured")
-        _groq_service = GroqService(api_key=api_key)
+        _groq_service = GroqService(
+            api_key=api_key,
+            model=settings.groq_model,
+            coalesce_requests=settings.coalesce_llm_requests
+        )
         logger.info("Groq service initialized")
     
     return _groq_service
 
 
-def get_order_agent() -> OrderAgent:
+def _build_backend(config: dict) -> "LLMBackend":
+    """
+    Create a routable backend from a settings entry.
+    
+    Args:
+        config: Backend configuration dictionary
+        
+    Returns:
+        LLMBackend instance
+    """
+    from app.config.settings import settings
+    from app.services.llm_router import LLMBackend
+    
+    provider = config.get("provider", "groq")
+    api_key = os.getenv(config["api_key_env"]) if config.get("api_key_env") else None
+    
+    if provider == "groq":
+        service = GroqService(
+            api_key=api_key or os.getenv("GROQ_API_KEY"),
+            model=config["model"],
+            coalesce_requests=settings.coalesce_llm_requests
+        )
+    elif provider == "openai":
+        from app.services.openai_compat_service import OpenAICompatibleService
+        service = OpenAICompatibleService(
+            base_url=config["base_url"],
+            model=config["model"],
+            api_key=api_key
+        )
+    else:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+    
+    return LLMBackend(name=config.get("name", config["model"]), service=service, tier=config.get("tier", "fast"))
+
+
+def get_llm_service() -> Union[GroqService, "LLMRouter"]:
+    """
+    Get the LLM service used by the agent.
+    
+    Returns the plain Groq service unless extra backends are configured,
+    in which case a router over Groq plus those backends is returned.
+    
+    Returns:
+        GroqService or LLMRouter instance
+    """
+    global _llm_service
+    
+    if _llm_service is None:
+        from app.config.settings import settings
+        if settings.llm_backends:
+            from app.services.llm_router import LLMBackend, LLMRouter
+            backends = [LLMBackend(name="groq", service=get_groq_service(), tier="fast")]
+            backends += [_build_backend(config) for config in settings.llm_backends]
+            _llm_service = LLMRouter(
+                backends,
+                hedge_enabled=settings.llm_hedge_enabled,
+                hedge_min_delay=settings.llm_hedge_min_delay
+            )
+        else:
+            _llm_service = get_groq_service()
+    
+    return _llm_service
+
+
+def get_order_agent(llm_budget: bool = True) -> "OrderAgent":
     """
     Get Order Agent instance.
     
+    Args:
+        llm_budget: Charge model calls to the global LLM budget
+        
     Returns:
         OrderAgent instance
     """
-    groq_service = get_groq_service()
-    return OrderAgent(groq_service=groq_service)
+    from app.config.settings import settings
+    from app.core.agent import OrderAgent
+    from app.api.rate_limit import get_rate_limiter
+    return OrderAgent(
+        groq_service=get_llm_service(),
+        structured_output=settings.structured_output,
+        temperature=settings.temperature,
+        max_tokens=settings.max_tokens,
+        phase_max_tokens=settings.phase_max_tokens,
+        rate_limiter=get_rate_limiter() if llm_budget else None
+    )
 
 
 def get_state_manager():
@@ -67,7 +154,28 @@ def get_order_storage():
     Returns:
         OrderStorage instance
     """
-    return order_storage
+    return storage.get_order_storage()
+
+
+def get_order_writer():
+    """
+    Get the write-behind order queue.
+    
+    Returns:
+        OrderWriteQueue instance
+    """
+    from app.db.write_behind import get_order_writer as _get_order_writer
+    return _get_order_writer()
+
+
+def get_order_analytics():
+    """
+    Get order analytics instance.
+    
+    Returns:
+        OrderAnalytics instance
+    """
+    return storage.get_order_storage().analytics
 
 
 def get_conversation_storage():
@@ -77,4 +185,4 @@ def get_conversation_storage():
     Returns:
         ConversationStorage instance
     """
-    return conversation_storage
+    return storage.get_conversation_storage()
@@ -0,0 +1,387 @@
+"""
+Rate Limiting Module
+
+Token-bucket limits for chat turns: per client IP, per session, and a
+global budget of LLM calls. Unlike admission control, which protects the
+server from overload as a whole, these limits stop a single client from
+taking a disproportionate share (for example by sending every message
+with a fresh random session_id).
+
+Buckets live in process memory (bounded, least recently seen keys are
+dropped first) or in a SQLite file shared by all worker processes.
+"""
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from app.api.chat_body import BodyTooLarge, read_chat_body, send_json_error
+
+logger = logging.getLogger(__name__)
+
+# Bucket key of the global LLM budget
+LLM_BUDGET_KEY = "global"
+
+
+class TokenBucketStore:
+    """
+    In-process token buckets with bounded memory.
+
+    Each key holds (tokens, last update); tokens refill continuously at
+    rate per second up to burst. Updates are O(1). Once max_keys buckets
+    exist, the least recently used one is dropped, which at worst hands
+    that key a full bucket again.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100_000):
+        """
+        Initialize the store.
+
+        Args:
+            rate: Tokens added per second
+            burst: Bucket capacity
+            max_keys: Maximum number of tracked keys
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.evicted = 0
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, cost: float = 1.0) -> float:
+        """
+        Take tokens from a key's bucket.
+
+        Args:
+            key: Bucket key
+            cost: Tokens needed
+
+        Returns:
+            0.0 if the tokens were taken, else seconds until they are available
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                    self.evicted += 1
+                bucket = self._buckets[key] = [self.burst, now]
+                tokens = self.burst
+            else:
+                self._buckets.move_to_end(key)
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return 0.0
+            bucket[0] = tokens
+            return (cost - tokens) / self.rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteTokenBucketStore:
+    """
+    Token buckets in SQLite, shared by every worker process.
+
+    Each take() is one IMMEDIATE transaction. Buckets untouched for long
+    enough to have refilled completely are deleted, since a missing row
+    already means a full bucket.
+
+    take() runs on the event loop, so it waits at most busy_timeout for
+    another process's write lock and then lets the request through
+    (fails open) rather than stalling every request on the worker.
+    """
+
+    def __init__(
+        self, scope: str, rate: float, burst: float, db_path: str = "data/rate_limits.db", busy_timeout: float = 0.05
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            scope: Limit name (rows of different limits share one table)
+            rate: Tokens added per second
+            burst: Bucket capacity
+            db_path: Path to SQLite database file
+            busy_timeout: Seconds to wait for the database write lock before allowing the request
+        """
+        self.scope = scope
+        self.rate = rate
+        self.burst = burst
+        self.db_path = db_path
+        self.failed_open = 0
+        self._lock = threading.Lock()
+        self._takes = 0
+        dirname = os.path.dirname(db_path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        # Schema setup may wait longer; take() switches to the short timeout below
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS buckets (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (scope, key)
+            );
+            CREATE INDEX IF NOT EXISTS buckets_updated ON buckets (scope, updated);
+            """
+        )
+        self._conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout * 1000)}")
+
+    def take(self, key: str, cost: float = 1.0) -> float:
+        """
+        Take tokens from a key's bucket.
+
+        Args:
+            key: Bucket key
+            cost: Tokens needed
+
+        Returns:
+            0.0 if the tokens were taken (or the database stayed locked), else
+            seconds until they are available
+        """
+        # Wall clock: buckets are compared across processes
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                self.failed_open += 1
+                if self.failed_open % 100 == 1:
+                    logger.warning(f"Rate limit store busy, allowing requests ({self.failed_open} so far): {e}")
+                return 0.0
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE scope = ? AND key = ?", (self.scope, key)
+                ).fetchone()
+                tokens = self.burst if row is None else min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (scope, key, tokens, updated) VALUES (?, ?, ?, ?)",
+                    (self.scope, key, tokens, now)
+                )
+                self._takes += 1
+                if self._takes % 1000 == 0:
+                    self._conn.execute(
+                        "DELETE FROM buckets WHERE scope = ? AND updated < ?",
+                        (self.scope, now - self.burst / self.rate)
+                    )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return 0.0 if allowed else (cost - tokens) / self.rate
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM buckets WHERE scope = ?", (self.scope,)).fetchone()[0]
+
+
+class RateLimiter:
+    """
+    Chat turn limits per client IP and per session, plus the global LLM budget.
+
+    A limit whose store is None is disabled.
+    """
+
+    def __init__(self, ip_limit=None, session_limit=None, llm_budget=None, trusted_proxies: int = 0):
+        """
+        Initialize the limiter.
+
+        Args:
+            ip_limit: Bucket store keyed by client IP
+            session_limit: Bucket store keyed by session ID
+            llm_budget: Bucket store holding the single global LLM bucket
+            trusted_proxies: Number of reverse proxies in front of the app (see client_ip)
+        """
+        self.trusted_proxies = trusted_proxies
+        self.ip_limit = ip_limit
+        self.session_limit = session_limit
+        self.llm_budget = llm_budget
+        self.allowed = 0
+        self.llm_calls = 0
+        self.rejected = {"ip": 0, "session": 0, "llm": 0}
+
+    def check_turn(self, client_ip: str, session_id: Optional[str]) -> Optional[Tuple[str, float]]:
+        """
+        Charge one chat turn to its IP and session.
+
+        Args:
+            client_ip: Client address
+            session_id: Session identifier (may be None)
+
+        Returns:
+            None if allowed, else (limit name, seconds to wait)
+        """
+        if self.ip_limit is not None:
+            wait = self.ip_limit.take(client_ip)
+            if wait:
+                self.rejected["ip"] += 1
+                return "ip", wait
+        if self.session_limit is not None and session_id:
+            wait = self.session_limit.take(session_id)
+            if wait:
+                self.rejected["session"] += 1
+                return "session", wait
+        self.allowed += 1
+        return None
+
+    def allow_llm_call(self) -> bool:
+        """
+        Charge one LLM call to the global budget.
+
+        Returns:
+            True if the call may be made
+        """
+        if self.llm_budget is not None and self.llm_budget.take(LLM_BUDGET_KEY):
+            self.rejected["llm"] += 1
+            return False
+        self.llm_calls += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get rate limiting metrics.
+
+        Returns:
+            Dictionary of allowed turns, LLM calls, rejections and tracked keys
+        """
+        return {
+            "allowed": self.allowed,
+            "llm_calls": self.llm_calls,
+            "rejected": dict(self.rejected),
+            # Turns let through because the shared bucket database was locked
+            "failed_open": sum(
+                getattr(store, "failed_open", 0) for store in (self.ip_limit, self.session_limit, self.llm_budget)
+            ),
+            "tracked_ips": len(self.ip_limit) if self.ip_limit is not None else None,
+            "tracked_sessions": len(self.session_limit) if self.session_limit is not None else None
+        }
+
+
+def client_ip(scope: Dict[str, Any], trusted_proxies: int = 0) -> str:
+    """
+    Get the client address of an HTTP or WebSocket request.
+
+    Each proxy appends the address it received the request from to
+    X-Forwarded-For, so behind N trusted proxies the client is the Nth
+    entry from the right; anything further left was sent by the client
+    and can be forged.
+
+    Args:
+        scope: ASGI connection scope
+        trusted_proxies: Number of reverse proxies in front of the app (0 ignores X-Forwarded-For)
+
+    Returns:
+        Client IP, or "unknown"
+    """
+    if trusted_proxies > 0:
+        hops = [
+            hop.strip()
+            for name, value in scope.get("headers", []) if name == b"x-forwarded-for"
+            for hop in value.decode("latin-1").split(",")
+        ]
+        hops = [hop for hop in hops if hop]
+        if len(hops) >= trusted_proxies:
+            return hops[-trusted_proxies]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying per-IP and per-session limits to chat turns.
+
+    Runs before admission control, so rejected turns never take a queue
+    slot; they get 429 with Retry-After. The body it buffers is reused by
+    admission control.
+    """
+
+    def __init__(self, app, paths: tuple = ("/api/chat",)):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            paths: Request paths subject to rate limiting (POST only)
+        """
+        self.app = app
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        from app.config.settings import settings
+        try:
+            chat, receive = await read_chat_body(scope, receive, settings.chat_max_body_bytes)
+        except BodyTooLarge as e:
+            logger.warning("Rejected chat turn: %s", e)
+            await send_json_error(send, 413, "Message too large.")
+            return
+        if chat is None:
+            return
+
+        limiter = get_rate_limiter()
+        ip = client_ip(scope, limiter.trusted_proxies)
+        rejection = limiter.check_turn(ip, chat.session_id)
+        if rejection:
+            limit, wait = rejection
+            logger.warning("Rate limited chat turn from %s (session %s, %s limit)", ip, chat.session_id, limit)
+            await send_json_error(
+                send, 429, "Too many messages, please slow down.", [(b"retry-after", str(math.ceil(wait)).encode())]
+            )
+            return
+
+        await self.app(scope, receive, send)
+
+
+# Global limiter, created on first use
+_rate_limiter = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get or create the global rate limiter.
+
+    Returns:
+        RateLimiter instance
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        from app.config.settings import settings
+
+        def make_store(scope: str, per_minute: float, burst: float):
+            if per_minute <= 0:
+                return None
+            if settings.rate_limit_backend == "sqlite":
+                return SQLiteTokenBucketStore(
+                    scope, per_minute / 60, burst,
+                    db_path=settings.rate_limit_db_path,
+                    busy_timeout=settings.rate_limit_busy_timeout
+                )
+            return TokenBucketStore(per_minute / 60, burst, max_keys=settings.rate_limit_max_keys)
+
+        _rate_limiter = RateLimiter(
+            ip_limit=make_store("ip", settings.rate_limit_ip_per_minute, settings.rate_limit_ip_burst),
+            session_limit=make_store("session", settings.rate_limit_session_per_minute, settings.rate_limit_session_burst),
+            llm_budget=make_store("llm", settings.llm_calls_per_minute, settings.llm_call_burst),
+            trusted_proxies=settings.rate_limit_trusted_proxies
+        )
+    return _rate_limiter
@@ -0,0 +1,24 @@
+"""
+Response Classes
+
+JSON responses rendered with the fastest installed serializer
+(see app.utils.serialization).
+"""
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from app.utils.serialization import dumps
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with orjson/msgspec when available.
+
+    Returning one directly from a route also skips FastAPI's
+    response_model validation and jsonable_encoder pass, so routes that
+    already hold validated data should build the response themselves.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
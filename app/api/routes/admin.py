@@ -0,0 +1,155 @@
+"""
+Admin API Routes
+
+Serves precomputed order analytics, columnar order exports and on-demand
+profiling of the running worker.
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+import asyncio
+import hmac
+import logging
+import os
+
+from app.api.dependencies import get_order_analytics, get_order_storage
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Reject the request unless it carries the configured X-Admin-Token."""
+    from app.config.settings import settings
+    if not settings.admin_token:
+        raise HTTPException(status_code=503, detail="Admin endpoint disabled (ADMIN_TOKEN not set)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), settings.admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.get("/stats", dependencies=[Depends(require_admin_token)])
+async def get_order_stats():
+    """
+    Return order aggregates (totals, per product, per day).
+    
+    Served from incrementally maintained counters, so the cost does not
+    grow with order volume.
+    
+    Returns:
+        Aggregates dictionary
+    """
+    return get_order_analytics().get_summary()
+
+
+@router.get("/stats/customers/{email}", dependencies=[Depends(require_admin_token)])
+async def get_customer_stats(email: str):
+    """
+    Return aggregates for a single customer.
+    
+    Args:
+        email: Customer email
+        
+    Returns:
+        Order count, units and revenue for the customer
+    """
+    bucket = get_order_analytics().get_customer(email)
+    if bucket is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return bucket
+
+
+def _get_exporter():
+    """Get an exporter or fail with 503 when pyarrow is missing."""
+    # Imported here so pyarrow is only loaded when exports are used
+    from app.config.settings import settings
+    from app.db import export
+    if not export.is_available():
+        raise HTTPException(status_code=503, detail="Columnar export requires pyarrow")
+    return export.OrderExporter(keep_snapshots=settings.export_keep_snapshots)
+
+
+@router.post("/exports", dependencies=[Depends(require_admin_token)])
+async def create_export():
+    """
+    Export all orders into a new date-partitioned Arrow snapshot.
+    
+    Returns:
+        Snapshot manifest
+    """
+    exporter = _get_exporter()
+    orders = get_order_storage().get_all_orders()
+    return await asyncio.to_thread(exporter.export, orders)
+
+
+@router.get("/exports/latest", dependencies=[Depends(require_admin_token)])
+async def download_latest_export(date: Optional[str] = None):
+    """
+    Download the latest snapshot.
+    
+    Args:
+        date: Optional partition date (YYYY-MM-DD) to download a single Arrow file
+        
+    Returns:
+        Arrow IPC file for one partition, or a tar of the whole snapshot
+    """
+    exporter = _get_exporter()
+    snapshot_dir = exporter.latest_snapshot()
+    if snapshot_dir is None:
+        raise HTTPException(status_code=404, detail="No export snapshot available")
+    
+    if date:
+        path = exporter.partition_path(snapshot_dir, date)
+        if path is None:
+            raise HTTPException(status_code=404, detail="Partition not found")
+        filename = f"{os.path.basename(snapshot_dir)}-{date}.arrow"
+        return FileResponse(path, media_type="application/vnd.apache.arrow.file", filename=filename)
+    
+    archive = await asyncio.to_thread(exporter.build_archive, snapshot_dir)
+    return FileResponse(archive, media_type="application/x-tar", filename=os.path.basename(archive))
+
+
+# Only one profiling window per worker at a time
+_profile_lock = asyncio.Lock()
+
+
+@router.post("/profile", dependencies=[Depends(require_admin_token)])
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    include_idle: bool = False
+):
+    """
+    Sample the stacks of this worker for a while and report where time goes.
+    
+    Requests keep being served during the window; profile while reproducing
+    the slow traffic.
+    
+    Args:
+        seconds: Profiling window (capped by PROFILE_MAX_SECONDS)
+        interval_ms: Milliseconds between samples
+        format: "json" for hot functions plus collapsed stacks, "collapsed"
+            for plain flamegraph input
+        include_idle: Keep samples of threads blocked waiting for work
+        
+    Returns:
+        Profile report, or collapsed stacks as text
+    """
+    from app.config.settings import settings
+    from app.utils.profiler import SamplingProfiler
+    
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    async with _profile_lock:
+        profiler = SamplingProfiler(interval=interval_ms / 1000, include_idle=include_idle)
+        profiler.start()
+        try:
+            await asyncio.sleep(min(seconds, settings.profile_max_seconds))
+        finally:
+            profiler.stop()
+    
+    logger.info(f"Profiled worker {os.getpid()} for {profiler.elapsed:.1f}s ({profiler.ticks} ticks)")
+    if format == "collapsed":
+        return PlainTextResponse(profiler.collapsed() + "\n")
+    return {"pid": os.getpid(), **profiler.report()}
@@ -1,17 +1,27 @@
 """
 Chat Interaction Routes
 
-Handles chat endpoint for agent interactions.
+Handles chat endpoints (HTTP and WebSocket) for agent interactions.
 """
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+import asyncio
 import logging
+import math
 
+from app.api.admission import get_admission_controller, session_priority
+from app.api.rate_limit import client_ip, get_rate_limiter
+from app.api.responses import FastJSONResponse
+from app.core.tracing import finish_trace, get_trace_recorder, start_trace
+from app.db.inventory import InsufficientStock, get_inventory, stock_shortage_message
 from app.models.chat import ChatMessage, ChatResponse
+from app.services.product_service import get_product_service, parse_quantity
+from app.utils.logger import bind_log_context, reset_log_context
+from app.utils.serialization import dumps_str, loads
 from app.api.dependencies import (
     get_order_agent,
     get_state_manager,
-    get_order_storage,
+    get_order_writer,
     get_conversation_storage
 )
 
@@ -20,68 +30,259 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["chat"])
 
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(chat_req: ChatMessage):
+def _order_confirmation_text(order_id: Any) -> str:
+    return f"[SYSTEM]: Order successfully submitted to system! (Order ID: {order_id})"
+
+
+def _back_to_form(result: Dict[str, Any], text: str) -> Dict[str, Any]:
+    return {**result, "response_text": text, "show_form": True, "should_submit": False, "final_data": None}
+
+
+def _commit_stock(session_id: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    # Settle the checkout's reservation before the order is queued; an unknown
+    # product, an unusable quantity or a shortage turns the submit back into the form
+    order = result["final_data"]
+    product = order.get("product_interest")
+    if not get_product_service().is_valid_product(product):
+        logger.warning(f"Order for session {session_id} rejected: unknown product {product!r}")
+        get_inventory().release(session_id)
+        return _back_to_form(result, "I couldn't find that product in our catalog. Please choose one of our products.")
+    quantity = parse_quantity(order.get("quantity") or 1)
+    if quantity is None:
+        logger.warning(f"Order for session {session_id} rejected: invalid quantity {order.get('quantity')!r}")
+        get_inventory().release(session_id)
+        return _back_to_form(result, "Please enter the quantity as a whole number of at least 1.")
+    try:
+        get_inventory().commit(session_id, product, quantity)
+    except InsufficientStock as e:
+        logger.warning(f"Order for session {session_id} rejected: {e}")
+        return _back_to_form(result, stock_shortage_message(e))
+    # Stored with the quantity that was actually taken from stock
+    return {**result, "final_data": {**order, "quantity": quantity}}
+
+
+async def _submit_order(order: Dict[str, Any]) -> Any:
+    # Queue a committed order; if it cannot be stored, its units go back to stock
+    try:
+        return await get_order_writer().submit(order)
+    except Exception:
+        get_inventory().restock(order["product_interest"], order["quantity"])
+        raise
+
+
+async def _run_turn(
+    session_id: str,
+    user_msg: str,
+    on_delta: Optional[Callable[[str], Awaitable[None]]] = None
+) -> Dict[str, Any]:
     """
-    Handle chat messages and return agent responses.
+    Run one conversation turn through the agent and record it in history.
     
     Args:
-        chat_req: Chat message with user text and session ID
-        
+        session_id: Session identifier
+        user_msg: User message text
+        on_delta: Optional callback receiving streamed reply text
+    
     Returns:
-        Agent response with state information
+        Agent result dictionary
     """
-    user_msg = chat_req.message
-    session_id = chat_req.session_id
-    
-    # Get dependencies
     agent = get_order_agent()
-    state_mgr = get_state_manager()
     conv_storage = get_conversation_storage()
-    order_storage = get_order_storage()
     
-    # Get conversation history
-    conversation_history = conv_storage.get_history(session_id)
+    # Get conversation history (SQLite reads and writes run off the event loop)
+    conversation_history = await asyncio.to_thread(conv_storage.get_history, session_id)
     
     # Add user message to history
-    conv_storage.add_message(session_id, "user", user_msg)
+    await asyncio.to_thread(conv_storage.add_message, session_id, "user", user_msg)
+    
+    recorder = get_trace_recorder()
+    trace_token = None
+    if recorder:
+        trace_token = start_trace(
+            session_id=session_id,
+            user_text=user_msg,
+            history=list(conversation_history),
+            state_before=get_state_manager().get_state(session_id),
+            config=agent.get_config()
+        )
     
+    result = None
     try:
         # Process message with agent
         result = await agent.process_message(
             session_id=session_id,
             user_text=user_msg,
-            conversation_history=conversation_history
+            conversation_history=conversation_history,
+            on_delta=on_delta
         )
+    finally:
+        if trace_token is not None:
+            trace = finish_trace(
+                trace_token,
+                result=result,
+                state_after=get_state_manager().get_state(session_id)
+            )
+            recorder.record(trace)
+    
+    if result.get("should_submit") and result.get("final_data"):
+        result = _commit_stock(session_id, result)
+    
+    # Store bot message in history
+    await asyncio.to_thread(conv_storage.add_message, session_id, "assistant", result["response_text"])
+    return result
+
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat_endpoint(chat_req: ChatMessage):
+    """
+    Handle chat messages and return agent responses.
+    
+    Args:
+        chat_req: Chat message with user text and session ID
+    
+    Returns:
+        Agent response with state information
+    """
+    session_id = chat_req.session_id
+    log_token = bind_log_context(session_id=session_id)
+    
+    try:
+        result = await _run_turn(session_id, chat_req.message)
         
         bot_text = result["response_text"]
         should_submit = result.get("should_submit", False)
-        show_form = result.get("show_form", False)
-        meta = result.get("meta", None)
-        
-        # Store bot message in history
-        conv_storage.add_message(session_id, "assistant", bot_text)
         
         # Process order submission if needed
         if should_submit and result.get("final_data"):
-            data = result["final_data"]
-            order_id = order_storage.add_order(data)
-            bot_text += f"\n\n[SYSTEM]: Order successfully submitted to system! (Order ID: {order_id})"
+            order_id = await _submit_order(result["final_data"])
+            bot_text += "\n\n" + _order_confirmation_text(order_id)
         
-        # Get current state for frontend
-        current_state = state_mgr.get_state(session_id)
-        
-        return ChatResponse(
+        reply = ChatResponse(
             response=bot_text,
-            state=current_state,
+            state=get_state_manager().get_state(session_id),
             should_submit=should_submit,
-            show_form=show_form,
-            meta=meta
+            show_form=result.get("show_form", False),
+            meta=result.get("meta", None)
         )
-        
+        # Already validated on construction; skip FastAPI's second response_model pass
+        return FastJSONResponse(reply.model_dump())
+    
     except Exception as e:
         logger.error(f"Chat endpoint error: {e}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail="Error processing chat message"
         )
+    finally:
+        reset_log_context(log_token)
+
+
+@router.websocket("/chat/ws")
+async def chat_websocket(websocket: WebSocket, session_id: str):
+    """
+    Persistent chat connection bound to one session.
+    
+    Client sends {"message": "..."}; server sends:
+        {"type": "delta", "text": ...}           streamed reply text
+        {"type": "reply", ...ChatResponse}       final reply, state and form flags
+        {"type": "order_confirmed", "order_id": ..., "text": ...}
+                                                 pushed once the order is durable
+        {"type": "order_failed", "detail": ...}  pushed if the order could not be stored
+        {"type": "error", "detail": ...}         answers the current turn instead of a reply
+    
+    The session's history window stays pinned in memory while connected.
+    
+    Args:
+        websocket: WebSocket connection
+        session_id: Session identifier (query parameter)
+    """
+    conv_storage = get_conversation_storage()
+    conv_storage.pin(session_id)
+    log_token = bind_log_context(session_id=session_id)
+    limiter = get_rate_limiter()
+    ip = client_ip(websocket.scope, limiter.trusted_proxies)
+    send_lock = asyncio.Lock()
+    order_tasks = set()
+    
+    async def send(event: Dict[str, Any]):
+        async with send_lock:
+            await websocket.send_text(dumps_str(event))
+    
+    async def send_delta(text: str):
+        await send({"type": "delta", "text": text})
+    
+    async def confirm_order(order_data: Dict[str, Any]):
+        try:
+            order_id = await _submit_order(order_data)
+            event = {"type": "order_confirmed", "order_id": order_id, "text": _order_confirmation_text(order_id)}
+        except Exception as e:
+            logger.error(f"Order submission failed for session {session_id}: {e}")
+            # Not "error": that answers a turn, and this turn was answered already
+            event = {"type": "order_failed", "detail": "Order could not be saved. Please try again."}
+        try:
+            await send(event)
+        except Exception:
+            # Client already left; the order itself is stored regardless
+            logger.info("Session %s disconnected before order confirmation", session_id)
+    
+    try:
+        await websocket.accept()
+        logger.info("WebSocket chat opened for session %s", session_id)
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                user_msg = (loads(raw).get("message") or "").strip()
+            except (ValueError, AttributeError):
+                await send({"type": "error", "detail": "Expected a JSON object with a 'message' field"})
+                continue
+            if not user_msg:
+                continue
+            
+            # Socket turns count against the same rate limits and admission budget as HTTP turns
+            rejection = limiter.check_turn(ip, session_id)
+            if rejection:
+                await send({
+                    "type": "error",
+                    "detail": "Too many messages, please slow down.",
+                    "retry_after": math.ceil(rejection[1])
+                })
+                continue
+            admission = get_admission_controller()
+            if not await admission.acquire(session_priority(session_id)):
+                await send({
+                    "type": "error",
+                    "detail": "Server is busy, please retry shortly.",
+                    "retry_after": admission.retry_after
+                })
+                continue
+            try:
+                result = await _run_turn(session_id, user_msg, on_delta=send_delta)
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                logger.error(f"WebSocket chat error: {e}", exc_info=True)
+                await send({"type": "error", "detail": "Error processing chat message"})
+                continue
+            finally:
+                admission.release()
+            
+            should_submit = result.get("should_submit", False)
+            reply = ChatResponse(
+                response=result["response_text"],
+                state=get_state_manager().get_state(session_id),
+                should_submit=should_submit,
+                show_form=result.get("show_form", False),
+                meta=result.get("meta", None)
+            )
+            await send({"type": "reply", **reply.model_dump()})
+            
+            # Reply first, then push the confirmation once the order is durable
+            if should_submit and result.get("final_data"):
+                task = asyncio.create_task(confirm_order(result["final_data"]))
+                order_tasks.add(task)
+                task.add_done_callback(order_tasks.discard)
+    except WebSocketDisconnect:
+        logger.info("WebSocket chat closed for session %s", session_id)
+    finally:
+        conv_storage.unpin(session_id)
+        reset_log_context(log_token)
@@ -0,0 +1,44 @@
+"""
+Metrics Routes
+
+Exposes runtime counters for monitoring.
+"""
+from fastapi import APIRouter
+import logging
+
+from app.api import admission
+from app.api.rate_limit import get_rate_limiter
+from app.api.dependencies import get_llm_service
+from app.db import write_behind
+from app.db.inventory import get_inventory
+from app.services import order_events
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["metrics"])
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """
+    Return runtime metrics for the service layer.
+    
+    Returns:
+        Dictionary of metrics grouped by component
+    """
+    try:
+        llm_stats = get_llm_service().get_stats()
+    except Exception as e:
+        logger.warning(f"LLM metrics unavailable: {e}")
+        llm_stats = None
+    
+    order_writer = write_behind._order_writer
+    order_dispatcher = order_events._order_dispatcher
+    return {
+        "llm": llm_stats,
+        "order_writes": order_writer.get_stats() if order_writer else None,
+        "chat_admission": admission.get_admission_controller().get_stats(),
+        "rate_limits": get_rate_limiter().get_stats(),
+        "inventory": get_inventory().get_stats(),
+        "order_events": order_dispatcher.get_stats() if order_dispatcher else None
+    }
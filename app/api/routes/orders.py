@@ -3,12 +3,16 @@ Order Management Routes
 
 Handles order submission and retrieval endpoints.
 """
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request
 import logging
 
 from app.models.order import OrderSchema
-from app.api.dependencies import get_order_storage
+from app.api.dependencies import get_order_storage, get_order_writer
+from app.api.responses import FastJSONResponse
+from app.db.inventory import InsufficientStock, get_inventory
+from app.services.product_service import get_product_service
+from app.utils.http_cache import SERVER_INSTANCE, cache_headers, is_not_modified, make_etag, not_modified_response
 
 logger = logging.getLogger(__name__)
 
@@ -26,13 +30,28 @@ async def submit_order(order: OrderSchema):
     Returns:
         Success response with order ID
     """
-    logger.info(f"Received Order: {order.dict()}")
+    logger.info("Received Order: %s", order.dict())
     
-    # Store order
-    storage = get_order_storage()
-    order_id = storage.add_order(order.dict())
+    if not get_product_service().is_valid_product(order.product_interest):
+        raise HTTPException(status_code=422, detail=f"Unknown product: {order.product_interest}")
+    
+    # Direct orders have no checkout reservation: take the units now or refuse
+    inventory = get_inventory()
+    try:
+        inventory.commit(None, order.product_interest, order.quantity)
+    except InsufficientStock as e:
+        raise HTTPException(status_code=409, detail=str(e))
     
-    return JSONResponse(
+    # Store order (acknowledged once its batch is durable)
+    try:
+        order_id = await get_order_writer().submit(order.dict())
+    except Exception as e:
+        # Not stored, so not sold: put the units back
+        inventory.restock(order.product_interest, order.quantity)
+        logger.error("Order could not be stored, stock returned: %s", e)
+        raise HTTPException(status_code=500, detail="Order could not be saved. Please try again.")
+    
+    return FastJSONResponse(
         status_code=200,
         content={
             "message": "Order processed successfully",
@@ -42,12 +61,41 @@ async def submit_order(order: OrderSchema):
 
 
 @router.get("/orders")
-async def get_orders():
+async def get_orders(request: Request, email: Optional[str] = None):
     """
-    Debug endpoint to retrieve all stored orders.
+    Debug endpoint to retrieve stored orders.
+    
+    The ETag is derived from the storage version (scoped to this server
+    process, whose version counter restarts at zero), so unchanged listings
+    are answered with 304 without serializing the orders.
     
+    Args:
+        email: Optional customer email to filter by (indexed lookup)
+        
     Returns:
-        List of all orders
+        List of orders, or 304 if the client's copy is current
     """
     storage = get_order_storage()
-    return storage.get_all_orders()
+    etag = make_etag("orders", SERVER_INSTANCE, storage.version, (email or "").lower())
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    
+    orders = storage.get_orders_by_email(email) if email else storage.get_all_orders()
+    return FastJSONResponse(content=orders, headers=cache_headers(etag))
+
+
+@router.get("/orders/{order_id}")
+async def get_order(order_id: str):
+    """
+    Retrieve a single order by ID.
+    
+    Args:
+        order_id: Order ID returned at submission
+        
+    Returns:
+        Order data
+    """
+    order = get_order_storage().get_order_by_id(order_id)
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return order
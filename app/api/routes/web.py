@@ -4,11 +4,48 @@ Web Page Routes
 Handles rendering of web pages.
 """
 from fastapi import APIRouter, Request, Depends
-from fastapi.templating import Jinja2Templates
-from app.api.dependencies import get_order_storage
+from fastapi.responses import HTMLResponse
+from app.api.dependencies import get_order_storage, get_order_analytics
+from app.utils.http_cache import SERVER_INSTANCE, cache_headers, is_not_modified, make_etag, not_modified_response, static_url
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
+_templates = None
+# Pre-rendered landing page: ((catalog, asset URLs), html bytes, etag)
+_landing_page = None
+
+
+def get_templates():
+    """
+    Get the Jinja2 templates, loading Jinja2 on first page render.
+    
+    Returns:
+        Jinja2Templates instance
+    """
+    global _templates
+    if _templates is None:
+        from fastapi.templating import Jinja2Templates
+        _templates = Jinja2Templates(directory="app/templates")
+        _templates.env.globals["static_url"] = static_url
+    return _templates
+
+
+def render_landing_page() -> tuple:
+    """
+    Get the landing page, rendering it only when the catalog changes.
+    
+    Returns:
+        Tuple of (html bytes, etag)
+    """
+    global _landing_page
+    from app.services.product_service import get_product_service
+    # Compared by identity first, so an unchanged catalog costs no hashing per request
+    catalog = get_product_service().catalog
+    render_key = (catalog, static_url("style.css"), static_url("script.js"))
+    
+    if _landing_page is None or _landing_page[0] != render_key:
+        html = get_templates().get_template("index.html").render(products=list(catalog)).encode()
+        _landing_page = (render_key, html, make_etag(html))
+    return _landing_page[1], _landing_page[2]
 
 
 @router.get("/")
@@ -17,14 +54,12 @@ async def read_root(request: Request):
     Serve the Landing Page.
     
     Returns:
-        Rendered HTML template
+        Pre-rendered HTML, or 304 if the client's copy is current
     """
-    from app.services.product_service import ProductService
-    product_service = ProductService()
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "products": product_service.get_catalog()
-    })
+    html, etag = render_landing_page()
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    return HTMLResponse(html, headers=cache_headers(etag))
 
 
 @router.get("/admin")
@@ -33,12 +68,16 @@ async def admin_dashboard(request: Request):
     Serve the Admin Dashboard.
     
     Returns:
-        Rendered Admin HTML template
+        Rendered Admin HTML template, or 304 if no orders arrived since
     """
     storage = get_order_storage()
+    etag = make_etag("admin", SERVER_INSTANCE, storage.version)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
     orders = storage.get_all_orders()
     
-    return templates.TemplateResponse("admin.html", {
+    return get_templates().TemplateResponse("admin.html", {
         "request": request,
-        "orders": orders
-    })
+        "orders": orders,
+        "stats": get_order_analytics().get_summary()
+    }, headers=cache_headers(etag))
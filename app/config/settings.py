@@ -2,7 +2,7 @@
 Application Configuration and Settings
 """
 import os
-from typing import List
+from typing import List, Dict, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -17,31 +17,134 @@ class Settings(BaseSettings):
     groq_model: str = "llama-3.1-8b-instant"
     temperature: float = 0.6
     max_tokens: int = 500
+    # Token budget per conversation phase (capped by max_tokens)
+    phase_max_tokens: Dict[str, int] = {
+        "browsing": 400,
+        "selection": 250,
+        "confirmation": 150
+    }
+    structured_output: bool = False  # JSON mode replies instead of ACTION_ text markers
+    coalesce_llm_requests: bool = True  # Share one Groq call between identical concurrent prompts
+    
+    # LLM Routing (enabled when extra backends are configured)
+    # e.g. [{"name": "local", "provider": "openai", "base_url": "http://127.0.0.1:8001/v1",
+    #        "model": "llama3", "tier": "fast"},
+    #       {"name": "groq-large", "provider": "groq", "model": "llama-3.3-70b-versatile", "tier": "large"}]
+    llm_backends: List[dict] = []
+    llm_hedge_enabled: bool = True
+    llm_hedge_min_delay: float = 0.75  # seconds; the actual delay is max(this, primary p95)
+    
+    # Chat Admission Control (load shedding)
+    chat_max_concurrency: int = 32  # chat turns processed at once
+    chat_max_queue: int = 64  # turns waiting for a slot before new ones get 503
+    chat_max_queue_wait: float = 10.0  # seconds a queued turn waits before 503
+    chat_retry_after: int = 2  # Retry-After seconds sent with 503
+    chat_max_body_bytes: int = 64 * 1024  # larger /api/chat bodies get 413 before they are parsed
+    
+    # Order Persistence (write-behind group commit)
+    order_shards: int = 1  # >1 splits orders across data/orders-shard-NN.json, each with its own writer
+    order_write_batch_size: int = 64
+    order_write_max_delay: float = 0.005  # seconds to wait for more orders after the first
+    order_stats_save_interval: float = 5.0  # seconds between saves of data/orders_stats.json
+    
+    # Session State Snapshots (warm restarts)
+    session_snapshot_path: str = "data/sessions.snapshot"
+    session_snapshot_interval: float = 30.0  # seconds; 0 disables periodic snapshots
+    session_idle_ttl: float = 24 * 3600  # seconds without a turn before a session is dropped; 0 keeps them
+    
+    # Turn Trace Recording (replay with scripts.replay_traces)
+    trace_enabled: bool = False
+    trace_dir: str = "data/traces"
+    trace_flush_interval: float = 1.0  # seconds a recorded trace may stay unflushed (written by a background thread)
+    
+    # Logging (records are written by a background thread)
+    log_json: bool = False
+    # Fraction of sub-WARNING records kept for the chattiest per-turn loggers
+    log_sample_rates: Dict[str, float] = {
+        "app.core.state_manager": 0.1,
+        "app.db.storage": 0.1,
+        "app.services.groq_service": 0.1,
+        "app.services.openai_compat_service": 0.1
+    }
+    log_rate_limit: float = 50  # sub-WARNING records per second per message; 0 disables
+    
+    # Admin
+    admin_token: Optional[str] = None  # sent as X-Admin-Token to /api/admin/*; unset disables the admin API
+    profile_max_seconds: float = 60.0  # longest profiling window per request
+    export_keep_snapshots: int = 5  # order export snapshots kept in data/exports
+    
+    # Rate Limiting (token buckets; "memory" per process, or "sqlite" shared by all workers)
+    rate_limit_backend: str = "memory"
+    rate_limit_db_path: str = "data/rate_limits.db"
+    rate_limit_busy_timeout: float = 0.05  # seconds a sqlite bucket waits for another worker's lock before allowing the turn
+    rate_limit_ip_per_minute: float = 60  # chat turns per client IP; 0 disables
+    rate_limit_ip_burst: int = 20
+    rate_limit_session_per_minute: float = 20  # chat turns per session; 0 disables
+    rate_limit_session_burst: int = 6
+    llm_calls_per_minute: float = 600  # global LLM budget; over it, turns get a busy reply; 0 disables
+    llm_call_burst: int = 60
+    rate_limit_max_keys: int = 100000  # IPs/sessions tracked per limit in memory (least recently seen dropped)
+    rate_limit_trusted_proxies: int = 0  # reverse proxies in front of the app; >0 takes client IPs from X-Forwarded-For
+    
+    # Order Event Outbox (delivered in batches to each sink URL as POST {"events": [...]})
+    order_event_sinks: List[str] = []  # e.g. ["http://127.0.0.1:8002/events"]; empty disables the outbox
+    order_event_secret: Optional[str] = None  # signs each batch (X-Signature: sha256=<hmac>)
+    outbox_db_path: str = "data/outbox.db"
+    outbox_batch_size: int = 100
+    outbox_poll_interval: float = 1.0  # seconds between checks when no commit wakes the dispatcher
+    outbox_max_backoff: float = 60.0  # seconds; retry delay cap for a failing sink
+    outbox_request_timeout: float = 5.0
+    outbox_stale_after: float = 30.0  # seconds before an event left unconfirmed by a failed commit step is resolved
+    
+    # Inventory: "memory" counters start from the catalog on every restart and are
+    # separate per worker process (single-worker deployments only); "sqlite"
+    # persists them and is shared by all workers
+    inventory_backend: str = "memory"
+    inventory_db_path: str = "data/inventory.db"
+    reservation_ttl: float = 900.0  # seconds stock stays held for an unconfirmed checkout
+    
+    # Local Product Matching (hashed n-gram TF-IDF, needs numpy)
+    product_index_dir: str = "data/product_index"
+    product_match_min_score: float = 0.2
+    product_match_min_margin: float = 0.1  # lead over the runner-up; closer calls go to the LLM
+    
+    # Conversation History
+    conversation_db_path: str = "data/conversations.db"
+    conversation_window: int = 20  # recent messages kept in memory and sent to the LLM
+    conversation_cache_sessions: int = 1000  # sessions whose windows stay in memory
     
     # Product Catalog
     product_catalog: List[dict] = [
         {
             "name": "The Cloud Sofa",
             "price": 2499,
+            "stock": 25,
             "description": "Experience the ultimate in comfort with our best-selling specialized foam blend.",
+            "keywords": ["sofa", "couch", "leather", "modern", "seating", "cloud", "cloud one"],
             "image_url": "https://images.unsplash.com/photo-1555041469-a586c61ea9bc?auto=format&fit=crop&w=800&q=80"
         },
         {
             "name": "Classic Chesterfield",
             "price": 3299,
+            "stock": 10,
             "description": "A timeless classic featuring deep button tufting and rich premium leather.",
+            "keywords": ["sofa", "couch", "leather", "vintage", "classic", "chesterfield"],
             "image_url": "https://images.unsplash.com/photo-1550254478-ead40cc54513?auto=format&fit=crop&w=800&q=80"
         },
         {
             "name": "Artisan Oak Table",
             "price": 1299,
+            "stock": 15,
             "description": "Handcrafted from solid oak with a beautiful natural finish.",
+            "keywords": ["table", "dining", "wood", "oak"],
             "image_url": "https://images.unsplash.com/photo-1533090481720-856c6e3c1fdc?auto=format&fit=crop&w=800&q=80"
         },
         {
             "name": "Velvet Armchair",
             "price": 899,
+            "stock": 40,
             "description": "Add a touch of luxury with this plush velvet armchair in jewel tones.",
+            "keywords": ["chair", "armchair", "velvet", "seat"],
             "image_url": "https://images.unsplash.com/photo-1586023492125-27b2c045efd7?auto=format&fit=crop&w=800&q=80"
         }
     ]
@@ -76,5 +179,25 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
-# Global settings instance
-settings = Settings()
+# Global settings instance, created on first access
+_settings = None
+
+
+def get_settings() -> Settings:
+    """
+    Get or create the global settings instance.
+    
+    Returns:
+        Settings instance
+    """
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def __getattr__(name: str):
+    # `from app.config.settings import settings` resolves here on first use
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
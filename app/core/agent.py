@@ -1,25 +1,78 @@
-from typing import Dict, Any, List
+from typing import Awaitable, Callable, Dict, Any, List, Optional, TYPE_CHECKING
+import asyncio
+import contextlib
 import logging
 import re
 import json
+import time
 
 from app.core.state_manager import state_manager
 from app.core.prompts import get_system_prompt
+from app.core.tracing import record_llm_call, trace_stage
+from app.db.inventory import InsufficientStock, get_inventory, stock_shortage_message
+from app.models.chat import StructuredReply
 from app.services.groq_service import GroqService
-from app.services.product_service import ProductService
-from app.utils.parsers import extract_json_from_text, extract_action_commands
-from app.utils.field_validators import validate_order_data, get_corrected_state
+from app.services.product_service import get_product_service, parse_quantity
+from app.utils.parsers import (
+    extract_json_from_text, extract_action_commands, restore_action_markers, ACTION_STOP_SEQUENCES,
+    ReplyStreamFilter
+)
+from app.utils.field_validators import validate_order_data, get_corrected_state, extract_contact_fields
+
+if TYPE_CHECKING:
+    from app.api.rate_limit import RateLimiter
 
 logger = logging.getLogger(__name__)
 
+# Reply when the global LLM budget is spent and the turn needs the model
+LLM_BUSY_REPLY = "We're handling a lot of conversations right now. Please send your message again in a moment."
+
+# Negations and changes of mind ("not the armchair", "cancel the sofa") are left to the LLM
+NEGATION_PATTERN = re.compile(
+    r"\b(?:not|no|never|nope|cancel|instead|rather|without|except|remove)\b|n['’]?t\b", re.IGNORECASE
+)
+
+# Extra tokens allowed in JSON mode for the reply/updates/actions keys
+STRUCTURED_TOKEN_OVERHEAD = 60
+
+
 class OrderAgent:
-    def __init__(self, groq_service: GroqService):
+    def __init__(
+        self,
+        groq_service: GroqService,
+        structured_output: bool = False,
+        temperature: float = 0.6,
+        max_tokens: int = 500,
+        phase_max_tokens: Optional[Dict[str, int]] = None,
+        rate_limiter: Optional["RateLimiter"] = None
+    ):
+        # rate_limiter, if given, holds the global LLM budget, charged for each turn that uses the model
         self.groq_service = groq_service
-        self.product_service = ProductService()
+        self.rate_limiter = rate_limiter
+        self.product_service = get_product_service()
+        self.structured_output = structured_output
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.phase_max_tokens = phase_max_tokens or {}
+    
+    def get_config(self) -> Dict[str, Any]:
+        # Settings that change behaviour; recorded with traces so replays match
+        return {
+            "structured_output": self.structured_output,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "phase_max_tokens": self.phase_max_tokens
+        }
     
     async def process_message(
-        self, session_id: str, user_text: str, conversation_history: List[Dict[str, str]]
+        self,
+        session_id: str,
+        user_text: str,
+        conversation_history: List[Dict[str, str]],
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> Dict[str, Any]:
+        # on_delta, if given, receives visible reply text as the model streams it;
+        # the returned response_text stays authoritative.
         try:
             # --- 1. PROACTIVE FORM VALIDATION (Interception) ---
             if "```json" in user_text:
@@ -51,14 +104,17 @@ class OrderAgent:
                     # If VALID: Check if this is a confirmation
                     is_confirmed = json_data.get("confirmed", False)
                     if not is_confirmed:
-                        # First time valid -> Request Confirmation
+                        # First time valid -> hold the stock while the user reviews, then Request Confirmation
+                        shortage = self._reserve_stock(session_id)
+                        if shortage:
+                            return shortage
                         return {
                             "response_text": "Details valid. Please review carefully and press Confirm Order.",
                             "updates": json_data,
                             "show_form": True,
                             "should_submit": False,
                             "final_data": None,
-                            "meta": {"form_mode": "confirm"} # Signal frontend to show "Confirm" button
+                            "meta": {"form_mode": "confirm", "quote": self._get_quote(session_id)} # Signal frontend to show "Confirm" button
                         }
                     
                     # If confirmed and valid -> Let it fall through to submission logic
@@ -71,29 +127,228 @@ class OrderAgent:
                         "final_data": state_manager.get_state(session_id)
                     }
 
-            # --- 2. REGULAR AI LOGIC ---
+            # --- 2. REGULAR AI LOGIC (speculative) ---
+            # Start the LLM request first, then do the deterministic work while it is in flight.
             current_state = state_manager.get_state(session_id)
-            system_prompt = get_system_prompt(current_state)
+            system_prompt = get_system_prompt(current_state, structured=self.structured_output)
             messages = [{"role": "system", "content": system_prompt}] + conversation_history
             
-            bot_raw_response = await self.groq_service.get_completion(messages)
+            llm_task = asyncio.create_task(
+                self._request_completion(
+                    messages, self._token_budget(session_id), on_delta, self._stop_sequences(session_id, user_text)
+                )
+            )
+            try:
+                await asyncio.sleep(0)  # let the request go out before running local work
+                with trace_stage("deterministic"):
+                    resolved = self._resolve_deterministic(session_id, user_text)
+                if resolved["final"] is not None:
+                    # Deterministic path already has the answer: drop the LLM call
+                    return resolved["final"]
+                
+                # Only turns that use the model's answer are charged to the LLM budget
+                if self.rate_limiter is not None and not self.rate_limiter.allow_llm_call():
+                    return self._reply_without_llm(session_id, resolved)
+                
+                with trace_stage("llm_wait"):
+                    llm_output = await llm_task
+            finally:
+                if not llm_task.done():
+                    llm_task.cancel()
+                # Collect the call's outcome even when it is dropped, so its failure or
+                # cancellation is not logged as "Task exception was never retrieved"
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await llm_task
             
-            response_text, updates = self._parse_llm_response(bot_raw_response, session_id)
-            actions = extract_action_commands(response_text)
+            with trace_stage("apply"):
+                if self.structured_output:
+                    result = self._apply_structured_reply(llm_output, session_id)
+                else:
+                    result = self._apply_text_reply(llm_output, session_id)
             
-            clean_text = response_text.replace("ACTION_SHOW_FORM", "").replace("ACTION_SUBMIT_ORDER", "").strip()
+            # Fill in fields the model did not pick up itself
+            extracted = {k: v for k, v in resolved["updates"].items() if k not in result["updates"]}
+            if extracted:
+                state_manager.update_state(session_id, extracted)
             
-            return {
-                "response_text": clean_text,
-                "updates": updates,
-                "show_form": actions["show_form"],
-                "should_submit": actions["submit_order"],
-                "final_data": state_manager.get_state(session_id) if actions["submit_order"] else None
-            }
+            quote = self._get_quote(session_id)
+            if quote:
+                result["meta"] = {"quote": quote}
+            return result
             
         except Exception as e:
             logger.error(f"Agent processing error: {e}", exc_info=True)
-            return {"response_text": "System Error. Please try again.", "show_form": False}
+            return {"response_text": "System Error. Please try again.", "show_form": False, "error": True}
+
+    async def _request_completion(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        on_delta: Optional[Callable[[str], Awaitable[None]]] = None,
+        stop: Optional[List[str]] = None
+    ):
+        started = time.perf_counter()
+        if self.structured_output:
+            reply = await self.groq_service.get_structured_completion(
+                messages, temperature=self.temperature, max_tokens=max_tokens + STRUCTURED_TOKEN_OVERHEAD
+            )
+            record_llm_call("structured", messages, max_tokens, reply.model_dump(), time.perf_counter() - started)
+            return reply
+        if on_delta and hasattr(self.groq_service, "stream_completion"):
+            raw = await self._stream_completion(messages, max_tokens, on_delta, stop)
+        else:
+            raw = await self.groq_service.get_completion(
+                messages, temperature=self.temperature, max_tokens=max_tokens, stop=stop
+            )
+        record_llm_call("text", messages, max_tokens, raw, time.perf_counter() - started)
+        return restore_action_markers(raw)
+
+    async def _stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        on_delta: Callable[[str], Awaitable[None]],
+        stop: Optional[List[str]] = None
+    ) -> str:
+        # Forward visible text as it arrives; code blocks and action markers are held back
+        stream_filter = ReplyStreamFilter()
+        chunks = []
+        async for delta in self.groq_service.stream_completion(
+            messages, temperature=self.temperature, max_tokens=max_tokens, stop=stop
+        ):
+            chunks.append(delta)
+            visible = stream_filter.feed(delta)
+            if visible:
+                await on_delta(visible)
+        tail = stream_filter.flush()
+        if tail:
+            await on_delta(tail)
+        return "".join(chunks)
+
+    @staticmethod
+    def _stop_sequences(session_id: str, user_text: str) -> Optional[List[str]]:
+        # Stopping on an action marker ends the reply there (the marker itself is
+        # restored afterwards), which would drop a ```json``` update block written
+        # after it. Only stop early when the turn cannot carry updates: every slot
+        # is filled and the user sent no new details.
+        if state_manager.get_phase(session_id) != "confirmation" or extract_contact_fields(user_text):
+            return None
+        return ACTION_STOP_SEQUENCES
+
+    def _token_budget(self, session_id: str) -> int:
+        phase = state_manager.get_phase(session_id)
+        return min(self.max_tokens, self.phase_max_tokens.get(phase, self.max_tokens))
+
+    def _apply_text_reply(self, bot_raw_response: str, session_id: str) -> Dict[str, Any]:
+        response_text, updates = self._parse_llm_response(bot_raw_response, session_id)
+        actions = extract_action_commands(response_text)
+        
+        clean_text = response_text.replace("ACTION_SHOW_FORM", "").replace("ACTION_SUBMIT_ORDER", "").strip()
+        
+        return {
+            "response_text": clean_text,
+            "updates": updates,
+            "show_form": actions["show_form"],
+            "should_submit": actions["submit_order"],
+            "final_data": state_manager.get_state(session_id) if actions["submit_order"] else None
+        }
+
+    def _apply_structured_reply(self, reply: StructuredReply, session_id: str) -> Dict[str, Any]:
+        if reply.updates:
+            state_manager.update_state(session_id, reply.updates)
+        
+        show_form = self._detect_product_choice(reply.reply, session_id) or reply.show_form
+        return {
+            "response_text": reply.reply,
+            "updates": reply.updates,
+            "show_form": show_form,
+            "should_submit": reply.submit_order,
+            "final_data": state_manager.get_state(session_id) if reply.submit_order else None
+        }
+
+    def _resolve_deterministic(self, session_id: str, user_text: str) -> Dict[str, Any]:
+        # Work out what can be answered without the LLM: contact fields and explicit product picks
+        resolved = {"final": None, "updates": extract_contact_fields(user_text)}
+        
+        current_product = state_manager.get_state(session_id).get("product_interest")
+        selected = self._match_product_selection(user_text)
+        if not selected and not current_product and not resolved["updates"]:
+            # Loose descriptions only make the first pick; messages carrying contact details stay with the LLM
+            selected = self._match_product_description(user_text)
+        if selected and selected != current_product:
+            state_manager.update_state(session_id, {"product_interest": selected, **resolved["updates"]})
+            quote = self._get_quote(session_id)
+            resolved["final"] = {
+                "response_text": f"Great choice! {selected} is excellent. Please confirm your details below.",
+                "updates": {"product_interest": selected, **resolved["updates"]},
+                "show_form": True,
+                "should_submit": False,
+                "final_data": None,
+                "meta": {"quote": quote} if quote else None
+            }
+        return resolved
+
+    def _reply_without_llm(self, session_id: str, resolved: Dict[str, Any]) -> Dict[str, Any]:
+        # Over the LLM budget and no deterministic answer: keep any contact details given
+        if resolved["updates"]:
+            state_manager.update_state(session_id, resolved["updates"])
+        return {
+            "response_text": LLM_BUSY_REPLY,
+            "updates": resolved["updates"],
+            "show_form": False,
+            "should_submit": False,
+            "final_data": None
+        }
+
+    @staticmethod
+    def _is_plain_pick(text: str) -> bool:
+        # Only short affirmative statements can be picks; questions, comparisons
+        # and negations still go to the LLM.
+        return "?" not in text and len(text.split()) <= 12 and not NEGATION_PATTERN.search(text)
+
+    def _match_product_selection(self, user_text: str) -> Optional[str]:
+        # A plain pick naming exactly one catalog product counts as a selection
+        text = user_text.strip().lower()
+        if not self._is_plain_pick(text):
+            return None
+        mentioned = [p for p in self.product_service.get_all_products() if p.lower() in text]
+        return mentioned[0] if len(mentioned) == 1 else None
+
+    def _match_product_description(self, user_text: str) -> Optional[str]:
+        # Same gate as explicit picks; the vector index only answers when one product clearly wins
+        text = user_text.strip()
+        if not self._is_plain_pick(text):
+            return None
+        return self.product_service.match_description(text)
+
+    def _reserve_stock(self, session_id: str) -> Optional[Dict[str, Any]]:
+        # Returns a form reply when the quantity is unusable or stock is short, None once the units are held
+        state = state_manager.get_state(session_id)
+        if not state.get("product_interest"):
+            return None
+        quantity = parse_quantity(state.get("quantity") or 1)
+        if quantity is None:
+            get_inventory().release(session_id)
+            response_text = "Please enter the quantity as a whole number of at least 1."
+        else:
+            try:
+                get_inventory().reserve(session_id, state["product_interest"], quantity)
+                return None
+            except InsufficientStock as e:
+                response_text = stock_shortage_message(e)
+        return {
+            "response_text": response_text,
+            "updates": {},
+            "show_form": True,
+            "should_submit": False,
+            "final_data": None
+        }
+
+    def _get_quote(self, session_id: str) -> Optional[Dict[str, Any]]:
+        state = state_manager.get_state(session_id)
+        if not state.get("product_interest"):
+            return None
+        return self.product_service.calculate_quote(state["product_interest"], state.get("quantity") or 1)
 
     def _parse_llm_response(self, bot_raw_response: str, session_id: str) -> tuple:
         updates = {}
@@ -110,8 +365,12 @@ class OrderAgent:
         return response_text, updates
 
     def _handle_product_detection(self, response_text: str, session_id: str) -> str:
+        if self._detect_product_choice(response_text, session_id) and "ACTION_SHOW_FORM" not in response_text:
+            response_text += " ACTION_SHOW_FORM"
+        return response_text
+
+    def _detect_product_choice(self, response_text: str, session_id: str) -> bool:
         try:
-            current_state = state_manager.get_state(session_id)
             known_products = self.product_service.get_all_products()
             products_mentioned = [p for p in known_products if p.lower() in response_text.lower()]
             choice_indicators = ["great choice", "excellent choice", "perfect choice", "good choice", "selected"]
@@ -120,8 +379,7 @@ class OrderAgent:
             if len(products_mentioned) == 1 or (products_mentioned and has_choice_indicator):
                 detected_product = products_mentioned[0]
                 state_manager.update_state(session_id, {'product_interest': detected_product})
-                if "ACTION_SHOW_FORM" not in response_text:
-                    response_text += " ACTION_SHOW_FORM"
+                return True
         except Exception:
             pass
-        return response_text
\ No newline at end of file
+        return False
\ No newline at end of file
@@ -58,24 +58,50 @@ INSTRUCTIONS:
      {{"full_name": "John Doe"}}
      ```
    - NEVER show system commands like ACTION_SHOW_FORM or ACTION_SUBMIT_ORDER directly to users.
+   - Any ACTION_ command must be the very last thing in your reply, after any ```json``` block.
+
+CURRENT STATE:
+{current_state_json}
+"""
+
+STRUCTURED_SYSTEM_PROMPT_TEMPLATE = """
+You are 'LuminaBot', the sales agent for Lumina Tech.
+Help the user place an order by collecting: full_name, email, phone, address, product_interest, quantity.
+
+OFFICIAL PRODUCT CATALOG:
+- "The Cloud Sofa" (Keywords: sofa, couch, leather, modern, seating, cloud, cloud one)
+- "Classic Chesterfield" (Keywords: sofa, couch, leather, vintage, classic, chesterfield)
+- "Artisan Oak Table" (Keywords: table, dining, wood, oak)
+- "Velvet Armchair" (Keywords: chair, armchair, velvet, seat)
+
+RULES:
+1. For a general category (e.g., "leather sofa"), list ALL matching catalog items. Do not guess one.
+2. Once the user selects a specific product, set product_interest to its exact catalog name and show_form to true.
+3. Never ask for details as a text list; the form collects them.
+4. Set submit_order to true only when all fields are filled and the user confirms.
+
+Respond ONLY with a JSON object of this shape:
+{"reply": "<message for the user>", "updates": {<newly collected fields>}, "show_form": false, "submit_order": false}
 
 CURRENT STATE:
 {current_state_json}
 """
 
 
-def get_system_prompt(current_state: dict) -> str:
+def get_system_prompt(current_state: dict, structured: bool = False) -> str:
     """
     Get the system prompt with current state injected.
     
     Args:
         current_state: Current order state dictionary
+        structured: Use the JSON mode prompt instead of text markers
         
     Returns:
         System prompt string with state context
     """
-    import json
-    return SYSTEM_PROMPT_TEMPLATE.replace(
+    from app.utils.serialization import dumps_str
+    template = STRUCTURED_SYSTEM_PROMPT_TEMPLATE if structured else SYSTEM_PROMPT_TEMPLATE
+    return template.replace(
         "{current_state_json}", 
-        json.dumps(current_state, indent=2)
+        dumps_str(current_state, indent=True)
     )
\ No newline at end of file
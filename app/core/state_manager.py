@@ -2,13 +2,23 @@
 Order State Management Module
 
 Handles session-based state tracking for order collection.
-Each session maintains its own state with required order fields.
+Each session maintains its own state with required order fields, kept
+in a compact slotted record and periodically snapshotted to disk (as
+JSON) so a restart restores in-progress checkouts. Sessions left idle
+for too long are evicted.
 """
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
 import logging
+import os
+import time
+
+from app.utils.serialization import dumps, loads
 
 logger = logging.getLogger(__name__)
 
+SNAPSHOT_VERSION = 2
+
 # Define the schema of what we need to collect
 REQUIRED_SLOTS = [
     "full_name", 
@@ -19,6 +29,91 @@ REQUIRED_SLOTS = [
     "quantity"
 ]
 
+_catalog_names: Optional[Tuple[str, ...]] = None
+_catalog_index: Optional[Dict[str, int]] = None
+
+
+def _catalog() -> Tuple[Tuple[str, ...], Dict[str, int]]:
+    """Catalog product names and their positions, loaded on first use."""
+    global _catalog_names, _catalog_index
+    if _catalog_names is None:
+        from app.config.settings import settings
+        _catalog_names = tuple(settings.known_products)
+        _catalog_index = {name: index for index, name in enumerate(_catalog_names)}
+    return _catalog_names, _catalog_index
+
+
+class SessionState:
+    """
+    Compact order state for one session.
+    
+    Fixed slots instead of a per-session dict; the product is stored as
+    its catalog index and the quantity as an int whenever possible.
+    Keys outside the schema (rare) go to a lazily created extra dict.
+    """
+    __slots__ = ("full_name", "email", "phone", "address", "product", "quantity", "extra", "touched")
+    
+    def __init__(self):
+        self.full_name = None
+        self.email = None
+        self.phone = None
+        self.address = None
+        self.product = None  # catalog index, free-text name, or None
+        self.quantity = None
+        self.extra: Optional[Dict[str, Any]] = None
+        self.touched = time.time()  # last access, for idle eviction
+    
+    def get(self, slot: str, default: Any = None) -> Any:
+        """Get a slot value by its public name."""
+        if slot == "product_interest":
+            if isinstance(self.product, int):
+                return _catalog()[0][self.product]
+            return self.product
+        if slot in ("full_name", "email", "phone", "address", "quantity"):
+            return getattr(self, slot)
+        return self.extra.get(slot, default) if self.extra else default
+    
+    def set(self, slot: str, value: Any):
+        """Set a slot value by its public name."""
+        if slot == "product_interest":
+            self.product = _catalog()[1].get(value, value)
+        elif slot == "quantity":
+            if isinstance(value, str) and value.strip().isdigit():
+                value = int(value)
+            self.quantity = value
+        elif slot in ("full_name", "email", "phone", "address"):
+            setattr(self, slot, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[slot] = value
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dictionary view (schema slots first, then extra keys)."""
+        state = {slot: self.get(slot) for slot in REQUIRED_SLOTS}
+        if self.extra:
+            state.update(self.extra)
+        return state
+    
+    def to_row(self) -> list:
+        """Snapshot row (product as catalog index, as stored)."""
+        extra = dict(self.extra) if self.extra else None
+        return [self.full_name, self.email, self.phone, self.address, self.product, self.quantity, extra, self.touched]
+    
+    @classmethod
+    def from_row(cls, row: list, product_remap: List[Any]) -> "SessionState":
+        """
+        Rebuild a state from a snapshot row.
+        
+        product_remap maps catalog indexes at snapshot time to current
+        indexes (or names, for products no longer in the catalog).
+        """
+        state = cls()
+        (state.full_name, state.email, state.phone, state.address,
+         product, state.quantity, state.extra, state.touched) = row
+        state.product = product_remap[product] if isinstance(product, int) else product
+        return state
+
 
 class OrderStateManager:
     """
@@ -29,8 +124,16 @@ class OrderStateManager:
     
     def __init__(self):
         """Initialize the state manager with empty storage."""
-        # In-memory store: { session_id: { slot_name: value } }
-        self.states: Dict[str, Dict[str, Optional[str]]] = {}
+        # In-memory store: { session_id: SessionState }
+        self.states: Dict[str, SessionState] = {}
+    
+    def _get_record(self, session_id: str) -> SessionState:
+        record = self.states.get(session_id)
+        if record is None:
+            record = self.states[session_id] = SessionState()
+        else:
+            record.touched = time.time()
+        return record
 
     def get_state(self, session_id: str) -> Dict[str, Optional[str]]:
         """
@@ -40,11 +143,10 @@ class OrderStateManager:
             session_id: Unique session identifier
             
         Returns:
-            Dictionary of slot names to values (None if not filled)
+            Dictionary of slot names to values (None if not filled); a copy,
+            so use update_state to change it
         """
-        if session_id not in self.states:
-            self.states[session_id] = {slot: None for slot in REQUIRED_SLOTS}
-        return self.states[session_id]
+        return self._get_record(session_id).to_dict()
 
     def update_state(self, session_id: str, updates: dict) -> Dict[str, Optional[str]]:
         """
@@ -57,11 +159,11 @@ class OrderStateManager:
         Returns:
             Updated state dictionary
         """
-        current = self.get_state(session_id)
-        current.update(updates)
-        self.states[session_id] = current
-        logger.info(f"Session {session_id}: Updated state with {list(updates.keys())}")
-        return current
+        record = self._get_record(session_id)
+        for slot, value in updates.items():
+            record.set(slot, value)
+        logger.info("Session %s: Updated state with %s", session_id, ", ".join(updates))
+        return record.to_dict()
 
     def get_missing_slots(self, session_id: str) -> List[str]:
         """
@@ -88,6 +190,23 @@ class OrderStateManager:
         """
         return len(self.get_missing_slots(session_id)) == 0
     
+    def get_phase(self, session_id: str) -> str:
+        """
+        Get the conversation phase for a session.
+        
+        Args:
+            session_id: Unique session identifier
+            
+        Returns:
+            "browsing" before a product is chosen, "selection" while details
+            are being collected, "confirmation" once all slots are filled
+        """
+        if self.is_complete(session_id):
+            return "confirmation"
+        if self.get_state(session_id).get("product_interest"):
+            return "selection"
+        return "browsing"
+    
     def reset_state(self, session_id: str) -> None:
         """
         Reset the state for a session.
@@ -97,7 +216,134 @@ class OrderStateManager:
         """
         if session_id in self.states:
             del self.states[session_id]
-            logger.info(f"Session {session_id}: State reset")
+            logger.info("Session %s: State reset", session_id)
+    
+    def evict_idle(self, max_idle: float) -> int:
+        """
+        Drop sessions not accessed for max_idle seconds.
+        
+        Args:
+            max_idle: Idle time in seconds after which a session is dropped
+            
+        Returns:
+            Number of sessions evicted
+        """
+        cutoff = time.time() - max_idle
+        idle = [session_id for session_id, record in self.states.items() if record.touched < cutoff]
+        for session_id in idle:
+            del self.states[session_id]
+        if idle:
+            logger.info("Evicted %d idle sessions", len(idle))
+        return len(idle)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Capture all live sessions as a JSON-serializable payload.
+        
+        Runs synchronously, so the payload is a consistent cut of all sessions.
+        
+        Returns:
+            Snapshot payload for write_snapshot
+        """
+        rows = [[session_id, record.to_row()] for session_id, record in self.states.items()]
+        return {"version": SNAPSHOT_VERSION, "catalog": list(_catalog()[0]), "sessions": rows}
+    
+    def save_snapshot(self, path: str) -> int:
+        """
+        Write all live sessions to a snapshot file atomically.
+        
+        Args:
+            path: Snapshot file path
+            
+        Returns:
+            Number of sessions written
+        """
+        payload = self.snapshot()
+        write_snapshot(path, payload)
+        return len(payload["sessions"])
+    
+    def load_snapshot(self, path: str) -> int:
+        """
+        Restore sessions from a snapshot written by save_snapshot.
+        
+        Sessions already live in memory are kept as they are.
+        
+        Args:
+            path: Snapshot file path
+            
+        Returns:
+            Number of sessions restored
+        """
+        if not os.path.exists(path):
+            return 0
+        started = time.perf_counter()
+        try:
+            with open(path, "rb") as f:
+                payload = loads(f.read())
+            version = payload.get("version") if isinstance(payload, dict) else None
+            if version != SNAPSHOT_VERSION:
+                logger.warning(f"Ignoring session snapshot {path} with version {version}")
+                return 0
+            saved_catalog, rows = payload["catalog"], payload["sessions"]
+        except Exception as e:
+            logger.error(f"Error loading session snapshot {path}: {e}")
+            return 0
+        
+        # Catalog order may have changed between snapshot and restore
+        catalog_index = _catalog()[1]
+        product_remap = [catalog_index.get(name, name) for name in saved_catalog]
+        
+        restored = 0
+        for session_id, row in rows:
+            if session_id not in self.states:
+                self.states[session_id] = SessionState.from_row(row, product_remap)
+                restored += 1
+        logger.info(f"Restored {restored} sessions from {path} in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return restored
+
+
+def write_snapshot(path: str, payload: Dict[str, Any]):
+    """
+    Write a snapshot payload to disk atomically.
+    
+    Args:
+        path: Snapshot file path
+        payload: Payload from OrderStateManager.snapshot
+    """
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(dumps(payload))
+    os.replace(tmp_path, path)
+
+
+async def run_periodic_snapshots(
+    manager: OrderStateManager, path: Optional[str], interval: float, max_idle: float = 0
+):
+    """
+    Evict idle sessions and snapshot the rest every interval seconds until cancelled.
+    
+    Args:
+        manager: State manager to snapshot
+        path: Snapshot file path (None to only evict)
+        interval: Seconds between runs
+        max_idle: Idle seconds after which a session is evicted (0 keeps sessions forever)
+    """
+    while True:
+        await asyncio.sleep(interval)
+        if max_idle > 0:
+            manager.evict_idle(max_idle)
+        if path is None:
+            continue
+        try:
+            # Capture on the event loop, serialize and write in a worker thread
+            payload = manager.snapshot()
+            await asyncio.to_thread(write_snapshot, path, payload)
+            logger.debug("Snapshotted %d sessions to %s", len(payload["sessions"]), path)
+        except Exception as e:
+            logger.error(f"Session snapshot failed: {e}")
 
 
 # Global singleton instance
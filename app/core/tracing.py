@@ -0,0 +1,273 @@
+"""
+Conversation Trace Module
+
+Records full chat turns (inputs, prompt, raw LLM output, parsed result,
+state and per-stage timings) to gzip-compressed NDJSON files so slow or
+wrong conversations can be replayed offline with scripts.replay_traces.
+
+The active turn's trace lives in a context variable, so the agent adds
+to it without threading a parameter through every call.
+"""
+from typing import Any, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+import gzip
+import logging
+import os
+import queue
+import threading
+import time
+
+from app.utils.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+TRACE_VERSION = 1
+
+_current_trace: ContextVar[Optional[Dict[str, Any]]] = ContextVar("turn_trace", default=None)
+
+
+def start_trace(**fields) -> Token:
+    """
+    Begin a trace for the current turn.
+
+    Args:
+        **fields: Turn inputs (session_id, user_text, history, state_before, config)
+
+    Returns:
+        Token to pass to finish_trace
+    """
+    trace = {
+        "v": TRACE_VERSION,
+        "ts": datetime.now(timezone.utc).isoformat(),
+        **fields,
+        "llm_calls": [],
+        "timings_ms": {},
+        "_started": time.perf_counter()
+    }
+    return _current_trace.set(trace)
+
+
+def current_trace() -> Optional[Dict[str, Any]]:
+    """
+    Get the trace of the turn being processed.
+
+    Returns:
+        Trace dictionary or None if tracing is off for this turn
+    """
+    return _current_trace.get()
+
+
+def finish_trace(token: Token, **fields) -> Dict[str, Any]:
+    """
+    Complete the current trace and deactivate it.
+
+    Args:
+        token: Token from start_trace
+        **fields: Turn outputs (result, state_after)
+
+    Returns:
+        Completed trace dictionary
+    """
+    trace = _current_trace.get()
+    _current_trace.reset(token)
+    trace.update(fields)
+    trace["timings_ms"]["total"] = round((time.perf_counter() - trace.pop("_started")) * 1000, 3)
+    return trace
+
+
+@contextmanager
+def trace_stage(name: str):
+    """Time a stage of the current turn (no-op when not tracing)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        trace["timings_ms"][name] = round(trace["timings_ms"].get(name, 0) + elapsed, 3)
+
+
+def record_llm_call(kind: str, messages: List[Dict[str, str]], max_tokens: int, output: Any, seconds: float):
+    """
+    Add one LLM call to the current trace (no-op when not tracing).
+
+    Args:
+        kind: "text" or "structured"
+        messages: Prompt messages sent
+        max_tokens: Token budget of the call
+        output: Raw text, or the structured reply as a dictionary
+        seconds: Call duration
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    trace["llm_calls"].append({
+        "kind": kind,
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "output": output,
+        "ms": round(seconds * 1000, 3)
+    })
+
+
+class TraceRecorder:
+    """
+    Appends traces to one gzip NDJSON file per day.
+
+    record() serializes the trace and enqueues the line; a background
+    thread compresses and writes it, flushing every flush_interval seconds or
+    flush_bytes of output, so a crash loses at most that window. When
+    the queue is full, new traces are dropped (and counted) rather than
+    slowing down chat turns.
+    """
+
+    def __init__(
+        self,
+        trace_dir: str = "data/traces",
+        flush_interval: float = 1.0,
+        flush_bytes: int = 256 * 1024,
+        max_queue: int = 10_000
+    ):
+        """
+        Initialize the recorder and start its writer thread.
+
+        Args:
+            trace_dir: Directory holding trace files
+            flush_interval: Longest time in seconds a written trace stays unflushed
+            flush_bytes: Unflushed output size that triggers a flush
+            max_queue: Traces waiting to be written before new ones are dropped
+        """
+        self.trace_dir = trace_dir
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        os.makedirs(self.trace_dir, exist_ok=True)
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._file_day = None
+        self.recorded = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, trace: Dict[str, Any]):
+        """
+        Queue one trace for writing.
+
+        Args:
+            trace: Completed trace from finish_trace
+        """
+        # Serialized here, so later changes to objects the trace refers to do not leak in
+        try:
+            self._queue.put_nowait((trace["ts"][:10], dumps(trace) + b"\n"))
+        except TypeError as e:
+            # A debugging aid must not fail the turn it describes
+            logger.warning(f"Trace not recorded, not serializable: {e}")
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Trace writer is behind, dropped {self.dropped} traces so far")
+
+    def _run(self):
+        unflushed = 0
+        flush_at = None  # deadline of the oldest unflushed trace
+        while True:
+            timeout = None if flush_at is None else max(0.0, flush_at - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()  # flush deadline reached
+            if item is None:
+                break
+            if item:
+                day, line = item
+                try:
+                    self._write(day, line)
+                    unflushed += len(line)
+                except Exception as e:
+                    logger.error(f"Error writing trace: {e}")
+                if flush_at is None:
+                    flush_at = time.monotonic() + self.flush_interval
+            if unflushed >= self.flush_bytes or (flush_at is not None and time.monotonic() >= flush_at):
+                self._flush()
+                unflushed = 0
+                flush_at = None
+        self._flush()
+        self._close_file()
+
+    def _write(self, day: str, line: bytes):
+        if self._file is None or self._file_day != day:
+            self._open(day)
+        self._file.write(line)
+        self.recorded += 1
+
+    def _flush(self):
+        try:
+            if self._file is not None:
+                self._file.flush()
+        except Exception as e:
+            logger.error(f"Error flushing traces: {e}")
+
+    def _open(self, day: str):
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.trace_dir, f"traces-{day}.ndjson.gz")
+        # Appending adds a new gzip member; readers see one continuous stream
+        self._file = gzip.open(path, "ab", compresslevel=6)
+        self._file_day = day
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        """Write the queued traces, close the current file and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+
+def read_traces(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read traces from a gzip NDJSON file.
+
+    Args:
+        path: Trace file path
+
+    Yields:
+        Trace dictionaries
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield loads(line)
+        except EOFError:
+            # File still open for writing (or the writer crashed): stop at the last flushed record
+            return
+
+
+# Global recorder, created on first use when tracing is enabled
+_trace_recorder = None
+
+
+def get_trace_recorder() -> Optional[TraceRecorder]:
+    """
+    Get the global trace recorder.
+
+    Returns:
+        TraceRecorder, or None if trace recording is disabled
+    """
+    global _trace_recorder
+    from app.config.settings import settings
+    if not settings.trace_enabled:
+        return None
+    if _trace_recorder is None:
+        _trace_recorder = TraceRecorder(settings.trace_dir, flush_interval=settings.trace_flush_interval)
+    return _trace_recorder
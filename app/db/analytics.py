@@ -0,0 +1,201 @@
+"""
+Order Analytics Module
+
+Incrementally maintained order aggregates (per product, per day and per
+customer), updated on every stored order and persisted next to the order
+file so dashboard reads never rescan orders.
+
+Aggregates are saved periodically rather than on every commit; after a
+crash the file is behind the orders and is rebuilt on the next start.
+"""
+from typing import Dict, List, Any, Optional
+import asyncio
+import copy
+import logging
+import os
+import threading
+
+from app.config.settings import settings
+from app.utils.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {"orders": 0, "units": 0, "revenue": 0}
+
+
+class OrderAnalytics:
+    """
+    Running totals over all stored orders.
+
+    Every update is O(1) in the number of orders; the aggregates are
+    rebuilt from the order list only when the persisted file is missing
+    or out of sync.
+    """
+
+    def __init__(self, stats_file: str = "data/orders_stats.json"):
+        """
+        Initialize analytics, loading persisted aggregates if present.
+
+        Args:
+            stats_file: Path to JSON aggregates file
+        """
+        self.stats_file = stats_file
+        self._prices = {p["name"]: p["price"] for p in settings.product_catalog}
+        self._stats = self._empty_stats()
+        self._dirty = False
+        # Shards of a ShardedOrderStorage commit from different threads
+        self._lock = threading.RLock()
+        self._load()
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {
+            "order_count": 0,
+            "total_units": 0,
+            "total_revenue": 0,
+            "by_product": {},
+            "by_day": {},
+            "by_customer": {}
+        }
+
+    def _load(self):
+        """Load aggregates from the stats file."""
+        if os.path.exists(self.stats_file):
+            try:
+                with open(self.stats_file, 'rb') as f:
+                    self._stats = loads(f.read())
+            except Exception as e:
+                logger.error(f"Error loading order stats: {e}")
+                self._stats = self._empty_stats()
+
+    def save(self):
+        """Persist aggregates atomically next to the order file."""
+        try:
+            with self._lock:
+                data = dumps(self._stats)
+                self._dirty = False
+            tmp_file = f"{self.stats_file}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, self.stats_file)
+        except Exception as e:
+            self._dirty = True
+            logger.error(f"Error saving order stats: {e}")
+
+    def save_if_dirty(self) -> bool:
+        """
+        Persist aggregates if orders were recorded since the last save.
+
+        Returns:
+            True if the file was written
+        """
+        if not self._dirty:
+            return False
+        self.save()
+        return True
+
+    @property
+    def order_count(self) -> int:
+        """Number of orders reflected in the aggregates."""
+        return self._stats["order_count"]
+
+    def record(self, order: Dict[str, Any]):
+        """
+        Fold one order into the aggregates.
+
+        Args:
+            order: Stored order data dictionary
+        """
+        try:
+            units = int(order.get("quantity") or 0)
+        except (TypeError, ValueError):
+            units = 0
+        product = order.get("product_interest") or "unknown"
+        unit_price = order.get("unit_price", self._prices.get(product, 0))
+        revenue = unit_price * units
+        day = (order.get("created_at") or "unknown")[:10]
+        customer = (order.get("email") or "unknown").lower()
+
+        with self._lock:
+            self._stats["order_count"] += 1
+            self._stats["total_units"] += units
+            self._stats["total_revenue"] += revenue
+            for group, key in (("by_product", product), ("by_day", day), ("by_customer", customer)):
+                bucket = self._stats[group].setdefault(key, _empty_bucket())
+                bucket["orders"] += 1
+                bucket["units"] += units
+                bucket["revenue"] += revenue
+
+    def record_batch(self, orders: List[Dict[str, Any]]):
+        """
+        Fold a committed batch into the aggregates (persisted by the next save).
+
+        Args:
+            orders: Stored order data dictionaries
+        """
+        with self._lock:
+            for order in orders:
+                self.record(order)
+            self._dirty = True
+
+    def rebuild(self, orders: List[Dict[str, Any]]):
+        """
+        Recompute aggregates from scratch.
+
+        Args:
+            orders: All stored orders
+        """
+        with self._lock:
+            self._stats = self._empty_stats()
+            self.record_batch(orders)
+        self.save()
+        logger.info(f"Rebuilt order stats from {len(orders)} orders")
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        Get totals plus per-product and per-day aggregates.
+
+        Per-customer buckets are only counted here; use get_customer
+        to read one.
+
+        Returns:
+            Aggregates dictionary
+        """
+        with self._lock:
+            return {
+                "order_count": self._stats["order_count"],
+                "total_units": self._stats["total_units"],
+                "total_revenue": self._stats["total_revenue"],
+                "customer_count": len(self._stats["by_customer"]),
+                "by_product": copy.deepcopy(self._stats["by_product"]),
+                "by_day": copy.deepcopy(self._stats["by_day"])
+            }
+
+    def get_customer(self, email: str) -> Optional[Dict[str, Any]]:
+        """
+        Get aggregates for one customer.
+
+        Args:
+            email: Customer email
+
+        Returns:
+            Customer bucket or None if the customer has no orders
+        """
+        with self._lock:
+            bucket = self._stats["by_customer"].get(email.lower())
+            return dict(bucket) if bucket else None
+
+
+async def run_periodic_stats_saves(analytics: OrderAnalytics, interval: float):
+    """
+    Save changed aggregates every interval seconds until cancelled.
+
+    Args:
+        analytics: Aggregates to persist
+        interval: Seconds between saves
+    """
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(analytics.save_if_dirty)
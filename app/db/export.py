@@ -0,0 +1,268 @@
+"""
+Columnar Order Export Module
+
+Writes order snapshots as Arrow IPC files partitioned by order date and
+reads them back through memory maps for zero-copy scans.
+
+Requires the optional pyarrow package.
+
+Usage:
+    python -m app.db.export
+"""
+from typing import Dict, List, Any, Optional
+from datetime import datetime, timezone
+import logging
+import os
+import shutil
+import tarfile
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    ipc = None
+
+from app.utils.serialization import dumps, dumps_str
+
+logger = logging.getLogger(__name__)
+
+LATEST_POINTER = "LATEST"
+SNAPSHOT_PREFIX = "orders-"
+
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def _order_schema():
+    return pa.schema([
+        ("order_id", pa.string()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        ("full_name", pa.string()),
+        ("email", pa.string()),
+        ("phone", pa.string()),
+        ("address", pa.string()),
+        ("product_interest", pa.dictionary(pa.int16(), pa.string())),
+        ("quantity", pa.int64()),
+    ])
+
+
+def is_available() -> bool:
+    """
+    Check if columnar export is supported in this environment.
+
+    Returns:
+        True if pyarrow is installed
+    """
+    return pa is not None
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _parse_quantity(value: Any) -> Optional[int]:
+    try:
+        quantity = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return quantity if INT64_MIN <= quantity <= INT64_MAX else None
+
+
+class OrderExporter:
+    """
+    Exports orders into date-partitioned Arrow IPC snapshots.
+
+    Layout:
+        <export_dir>/<snapshot>/date=YYYY-MM-DD/part-0.arrow
+        <export_dir>/<snapshot>/manifest.json
+        <export_dir>/LATEST
+
+    Only the newest keep_snapshots snapshots (and their archives) are kept.
+    """
+
+    def __init__(self, export_dir: str = "data/exports", keep_snapshots: int = 5):
+        """
+        Initialize the exporter.
+
+        Args:
+            export_dir: Directory holding snapshots
+            keep_snapshots: Number of snapshots kept; older ones are deleted after each export
+        """
+        if pa is None:
+            raise RuntimeError("Columnar export requires pyarrow (pip install pyarrow)")
+        self.export_dir = export_dir
+        self.keep_snapshots = max(1, keep_snapshots)
+        os.makedirs(self.export_dir, exist_ok=True)
+
+    def export(self, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Write a new snapshot and mark it as the latest.
+
+        Files are uncompressed so readers can memory-map them without
+        copying; use transport compression for downloads.
+
+        Args:
+            orders: Orders to export
+
+        Returns:
+            Snapshot manifest
+        """
+        snapshot = SNAPSHOT_PREFIX + datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        snapshot_dir = os.path.join(self.export_dir, snapshot)
+
+        partitions: Dict[str, List[Dict[str, Any]]] = {}
+        bad_quantities = 0
+        for index, order in enumerate(orders, start=1):
+            created_at = _parse_timestamp(order.get("created_at"))
+            day = created_at.date().isoformat() if created_at else "unknown"
+            quantity = _parse_quantity(order.get("quantity"))
+            if quantity is None and order.get("quantity") is not None:
+                bad_quantities += 1
+            partitions.setdefault(day, []).append({
+                "order_id": str(order.get("order_id", index)),
+                "created_at": created_at,
+                "full_name": order.get("full_name"),
+                "email": order.get("email"),
+                "phone": order.get("phone"),
+                "address": order.get("address"),
+                "product_interest": order.get("product_interest"),
+                "quantity": quantity,
+            })
+
+        if bad_quantities:
+            logger.warning(f"Exported {bad_quantities} orders with an unreadable quantity as null")
+
+        schema = _order_schema()
+        manifest = {"snapshot": snapshot, "row_count": len(orders), "partitions": {}}
+        for day, rows in sorted(partitions.items()):
+            partition_dir = os.path.join(snapshot_dir, f"date={day}")
+            os.makedirs(partition_dir, exist_ok=True)
+            table = pa.Table.from_pylist(rows, schema=schema)
+            with pa.OSFile(os.path.join(partition_dir, "part-0.arrow"), "wb") as sink:
+                with ipc.new_file(sink, schema) as writer:
+                    writer.write_table(table)
+            manifest["partitions"][day] = len(rows)
+
+        os.makedirs(snapshot_dir, exist_ok=True)
+        with open(os.path.join(snapshot_dir, "manifest.json"), "wb") as f:
+            f.write(dumps(manifest, indent=True))
+
+        pointer_tmp = os.path.join(self.export_dir, f"{LATEST_POINTER}.tmp")
+        with open(pointer_tmp, "w") as f:
+            f.write(snapshot)
+        os.replace(pointer_tmp, os.path.join(self.export_dir, LATEST_POINTER))
+
+        logger.info(f"Exported {len(orders)} orders to {snapshot_dir} ({len(partitions)} partitions)")
+        self.prune()
+        return manifest
+
+    def prune(self) -> List[str]:
+        """
+        Delete all but the newest keep_snapshots snapshots.
+
+        Returns:
+            Names of the deleted snapshots
+        """
+        # Snapshot names are UTC timestamps, so name order is age order
+        snapshots = sorted(
+            entry for entry in os.listdir(self.export_dir)
+            if entry.startswith(SNAPSHOT_PREFIX) and os.path.isdir(os.path.join(self.export_dir, entry))
+        )
+        expired = snapshots[:-self.keep_snapshots]
+        for snapshot in expired:
+            snapshot_dir = os.path.join(self.export_dir, snapshot)
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+            for archive in (f"{snapshot_dir}.tar", f"{snapshot_dir}.tar.tmp"):
+                if os.path.exists(archive):
+                    os.remove(archive)
+        if expired:
+            logger.info(f"Deleted {len(expired)} old export snapshots")
+        return expired
+
+    def latest_snapshot(self) -> Optional[str]:
+        """
+        Get the directory of the latest snapshot.
+
+        Returns:
+            Snapshot directory path or None if nothing was exported yet
+        """
+        pointer = os.path.join(self.export_dir, LATEST_POINTER)
+        if not os.path.exists(pointer):
+            return None
+        with open(pointer) as f:
+            return os.path.join(self.export_dir, f.read().strip())
+
+    def partition_path(self, snapshot_dir: str, day: str) -> Optional[str]:
+        """
+        Get the file for one date partition.
+
+        Args:
+            snapshot_dir: Snapshot directory
+            day: Partition date (YYYY-MM-DD or "unknown")
+
+        Returns:
+            Partition file path or None if the partition does not exist
+        """
+        path = os.path.join(snapshot_dir, f"date={day}", "part-0.arrow")
+        return path if os.path.exists(path) else None
+
+    def build_archive(self, snapshot_dir: str) -> str:
+        """
+        Bundle a snapshot into a single tar file for download.
+
+        Args:
+            snapshot_dir: Snapshot directory
+
+        Returns:
+            Path of the tar archive (built once per snapshot)
+        """
+        archive = f"{snapshot_dir}.tar"
+        if not os.path.exists(archive):
+            tmp_archive = f"{archive}.tmp"
+            with tarfile.open(tmp_archive, "w") as tar:
+                tar.add(snapshot_dir, arcname=os.path.basename(snapshot_dir))
+            os.replace(tmp_archive, archive)
+        return archive
+
+
+def read_snapshot(snapshot_dir: str, days: Optional[List[str]] = None):
+    """
+    Read a snapshot through memory maps.
+
+    Column buffers point straight into the mapped files, so scans do not
+    copy or parse the data.
+
+    Args:
+        snapshot_dir: Snapshot directory
+        days: Optional list of partition dates to read
+
+    Returns:
+        pyarrow.Table with all selected partitions
+    """
+    if pa is None:
+        raise RuntimeError("Columnar export requires pyarrow (pip install pyarrow)")
+
+    tables = []
+    for entry in sorted(os.listdir(snapshot_dir)):
+        if not entry.startswith("date="):
+            continue
+        if days is not None and entry[len("date="):] not in days:
+            continue
+        source = pa.memory_map(os.path.join(snapshot_dir, entry, "part-0.arrow"), "r")
+        tables.append(ipc.open_file(source).read_all())
+
+    if not tables:
+        return _order_schema().empty_table()
+    return pa.concat_tables(tables)
+
+
+if __name__ == "__main__":
+    from app.config.settings import settings
+    from app.db.storage import get_order_storage
+    exporter = OrderExporter(keep_snapshots=settings.export_keep_snapshots)
+    print(dumps_str(exporter.export(get_order_storage().get_all_orders()), indent=True))
@@ -0,0 +1,589 @@
+"""
+Inventory Reservation Module
+
+Per-product stock counters with atomic reserve / commit / release.
+
+A checkout reserves stock when the customer is asked to confirm their
+order; confirming commits the reservation, and a reservation not
+confirmed within its TTL returns to stock. A committed sale whose order
+could not be stored is put back with restock(). Products without a
+"stock" entry in the catalog are not tracked.
+
+Two backends share one interface:
+- InventoryStore: in-process counters behind striped locks. Counts
+  start from the catalog on every restart and each worker process has
+  its own, so it only fits a single worker process
+- SQLiteInventoryStore: transactional, persistent, and shared by every
+  worker process using the same database file
+"""
+from typing import Any, Dict, List, Optional
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+logger = logging.getLogger(__name__)
+
+
+class InsufficientStock(Exception):
+    """Raised when a product does not have enough unreserved stock."""
+
+    def __init__(self, sku: str, requested: int, available: int):
+        super().__init__(f"Only {available} of {sku} available ({requested} requested)")
+        self.sku = sku
+        self.requested = requested
+        self.available = available
+
+
+def stock_shortage_message(shortage: InsufficientStock) -> str:
+    """
+    Get the customer-facing reply for an out-of-stock checkout.
+
+    Args:
+        shortage: Stock error raised by the inventory
+
+    Returns:
+        Reply text
+    """
+    if shortage.available <= 0:
+        return f"Sorry, {shortage.sku} is currently sold out."
+    return f"Sorry, only {shortage.available} of {shortage.sku} left in stock. Please adjust the quantity."
+
+
+def _check_quantity(quantity: int):
+    # Negative units would turn a sale into a restock and vice versa
+    if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+        raise ValueError(f"Quantity must be a whole number of at least 1, got {quantity!r}")
+
+
+class _Reservation:
+    """Stock held for one session's checkout."""
+    __slots__ = ("sku", "quantity", "expires_at")
+
+    def __init__(self, sku: str, quantity: int, expires_at: float):
+        self.sku = sku
+        self.quantity = quantity
+        self.expires_at = expires_at
+
+
+class InventoryStore:
+    """
+    In-process stock counters.
+
+    Each product's counters are guarded by one of a fixed set of lock
+    stripes, so checkouts for different products never contend. The
+    session-to-reservation map has its own short lock that is never held
+    while a stripe lock is taken. Counts are lost on restart; use
+    SQLiteInventoryStore for persistent stock.
+    """
+
+    def __init__(self, stock: Dict[str, int], reservation_ttl: float = 900, stripes: int = 16):
+        """
+        Initialize the store.
+
+        Args:
+            stock: Units on hand per product
+            reservation_ttl: Seconds a checkout reservation is held
+            stripes: Number of lock stripes for the counters
+        """
+        self.reservation_ttl = reservation_ttl
+        self._on_hand: Dict[str, int] = dict(stock)
+        self._reserved: Dict[str, int] = {sku: 0 for sku in stock}
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._reservations: Dict[str, _Reservation] = {}
+        self._sessions_lock = threading.Lock()
+        self._next_sweep = 0.0
+        self.stats = {"reserved": 0, "committed": 0, "released": 0, "restocked": 0, "expired": 0, "rejected": 0}
+
+    def _stripe(self, sku: str) -> threading.Lock:
+        return self._stripes[zlib.crc32(sku.encode("utf-8")) % len(self._stripes)]
+
+    def is_tracked(self, sku: str) -> bool:
+        """
+        Check if a product has a stock counter.
+
+        Args:
+            sku: Product name
+
+        Returns:
+            True if stock is tracked for the product
+        """
+        return sku in self._on_hand
+
+    def _take(self, sku: str, quantity: int):
+        # Check-and-reserve under the product's stripe: the only place units are taken
+        with self._stripe(sku):
+            available = self._on_hand[sku] - self._reserved[sku]
+            if available < quantity:
+                self.stats["rejected"] += 1
+                raise InsufficientStock(sku, quantity, available)
+            self._reserved[sku] += quantity
+
+    def _give_back(self, reservation: _Reservation, sold: bool):
+        with self._stripe(reservation.sku):
+            self._reserved[reservation.sku] -= reservation.quantity
+            if sold:
+                self._on_hand[reservation.sku] -= reservation.quantity
+
+    def _claim(self, session_id: str) -> Optional[_Reservation]:
+        # Whoever pops the reservation owns it, so it is settled exactly once
+        with self._sessions_lock:
+            return self._reservations.pop(session_id, None)
+
+    def reserve(self, session_id: str, sku: str, quantity: int) -> Optional[Dict[str, Any]]:
+        """
+        Hold stock for a session's checkout, replacing any earlier hold.
+
+        Args:
+            session_id: Session identifier
+            sku: Product name
+            quantity: Units to hold
+
+        Returns:
+            Reservation details, or None if the product is not tracked
+
+        Raises:
+            InsufficientStock: If not enough unreserved units are left
+            ValueError: If quantity is not a whole number of at least 1
+        """
+        _check_quantity(quantity)
+        self.expire_reservations()
+        if not self.is_tracked(sku):
+            self.release(session_id)
+            return None
+
+        previous = self._claim(session_id)
+        try:
+            if previous is not None and previous.sku == sku:
+                # Same product: only the difference changes hands
+                if quantity > previous.quantity:
+                    self._take(sku, quantity - previous.quantity)
+                elif quantity < previous.quantity:
+                    self._give_back(_Reservation(sku, previous.quantity - quantity, 0), sold=False)
+            else:
+                self._take(sku, quantity)
+                if previous is not None:
+                    self._give_back(previous, sold=False)
+        except InsufficientStock:
+            # A rejected request leaves the earlier hold in place
+            if previous is not None:
+                with self._sessions_lock:
+                    self._reservations.setdefault(session_id, previous)
+            raise
+
+        reservation = _Reservation(sku, quantity, time.time() + self.reservation_ttl)
+        with self._sessions_lock:
+            self._reservations[session_id] = reservation
+        self.stats["reserved"] += 1
+        return {"sku": sku, "quantity": quantity, "expires_at": reservation.expires_at}
+
+    def commit(self, session_id: Optional[str], sku: str, quantity: int) -> bool:
+        """
+        Turn a session's reservation into a sale.
+
+        Without a matching live reservation (expired, or never made) the
+        units are taken directly if still available.
+
+        Args:
+            session_id: Session identifier, or None for orders placed without a checkout
+            sku: Product name being ordered
+            quantity: Units being ordered
+
+        Returns:
+            True if stock was deducted, False if the product is not tracked
+
+        Raises:
+            InsufficientStock: If the units are no longer available
+            ValueError: If quantity is not a whole number of at least 1
+        """
+        _check_quantity(quantity)
+        reservation = self._claim(session_id)
+        if reservation is not None and (reservation.sku != sku or reservation.quantity != quantity):
+            self._give_back(reservation, sold=False)
+            reservation = None
+        if not self.is_tracked(sku):
+            return False
+
+        if reservation is None:
+            self._take(sku, quantity)
+            reservation = _Reservation(sku, quantity, 0)
+        self._give_back(reservation, sold=True)
+        self.stats["committed"] += 1
+        return True
+
+    def release(self, session_id: str) -> bool:
+        """
+        Return a session's reserved units to stock.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            True if the session held a reservation
+        """
+        reservation = self._claim(session_id)
+        if reservation is None:
+            return False
+        self._give_back(reservation, sold=False)
+        self.stats["released"] += 1
+        return True
+
+    def restock(self, sku: str, quantity: int) -> bool:
+        """
+        Put units of a committed sale back on hand (the order was not stored).
+
+        Args:
+            sku: Product name
+            quantity: Units to return
+
+        Returns:
+            True if stock was added, False if the product is not tracked
+
+        Raises:
+            ValueError: If quantity is not a whole number of at least 1
+        """
+        _check_quantity(quantity)
+        if not self.is_tracked(sku):
+            return False
+        with self._stripe(sku):
+            self._on_hand[sku] += quantity
+        self.stats["restocked"] += 1
+        return True
+
+    def expire_reservations(self, force: bool = False) -> int:
+        """
+        Return expired reservations to stock (at most once a second unless forced).
+
+        Args:
+            force: Sweep even if a sweep ran recently
+
+        Returns:
+            Number of reservations expired
+        """
+        now = time.time()
+        if not force and now < self._next_sweep:
+            return 0
+        self._next_sweep = now + 1.0
+        with self._sessions_lock:
+            expired = [sid for sid, res in self._reservations.items() if res.expires_at <= now]
+            claimed = [self._reservations.pop(sid) for sid in expired]
+        for reservation in claimed:
+            self._give_back(reservation, sold=False)
+        self.stats["expired"] += len(claimed)
+        return len(claimed)
+
+    def get_levels(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get stock levels.
+
+        Returns:
+            {product: {"on_hand", "reserved", "available"}}
+        """
+        levels = {}
+        for sku in self._on_hand:
+            with self._stripe(sku):
+                on_hand, reserved = self._on_hand[sku], self._reserved[sku]
+            levels[sku] = {"on_hand": on_hand, "reserved": reserved, "available": on_hand - reserved}
+        return levels
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get inventory metrics.
+
+        Returns:
+            Dictionary of stock levels, live reservations and operation counters
+        """
+        return {
+            "backend": "memory",
+            "levels": self.get_levels(),
+            "active_reservations": len(self._reservations),
+            **self.stats
+        }
+
+
+class SQLiteInventoryStore:
+    """
+    Transactional stock counters in SQLite.
+
+    Every operation is one IMMEDIATE transaction, and units are only
+    taken by an UPDATE whose WHERE clause checks availability, so several
+    worker processes sharing the database file cannot oversell.
+    """
+
+    def __init__(self, stock: Dict[str, int], db_path: str = "data/inventory.db", reservation_ttl: float = 900):
+        """
+        Initialize the store, adding catalog products missing from the database.
+
+        Args:
+            stock: Initial units on hand per product (existing counts are kept)
+            db_path: Path to SQLite database file
+            reservation_ttl: Seconds a checkout reservation is held
+        """
+        self.db_path = db_path
+        self.reservation_ttl = reservation_ttl
+        self._lock = threading.Lock()
+        self.stats = {"reserved": 0, "committed": 0, "released": 0, "restocked": 0, "expired": 0, "rejected": 0}
+        dirname = os.path.dirname(db_path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS stock (
+                sku TEXT PRIMARY KEY,
+                on_hand INTEGER NOT NULL,
+                reserved INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS reservations (
+                session_id TEXT PRIMARY KEY,
+                sku TEXT NOT NULL,
+                quantity INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS reservations_expiry ON reservations (expires_at);
+            """
+        )
+        self._conn.executemany("INSERT OR IGNORE INTO stock (sku, on_hand) VALUES (?, ?)", list(stock.items()))
+        self._tracked = {row[0] for row in self._conn.execute("SELECT sku FROM stock")}
+
+    def _transaction(self, work):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def is_tracked(self, sku: str) -> bool:
+        """
+        Check if a product has a stock counter.
+
+        Args:
+            sku: Product name
+
+        Returns:
+            True if stock is tracked for the product
+        """
+        return sku in self._tracked
+
+    @staticmethod
+    def _drop_reservation(conn: sqlite3.Connection, session_id: str) -> Optional[tuple]:
+        row = conn.execute("SELECT sku, quantity FROM reservations WHERE session_id = ?", (session_id,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM reservations WHERE session_id = ?", (session_id,))
+            conn.execute("UPDATE stock SET reserved = reserved - ? WHERE sku = ?", (row[1], row[0]))
+        return row
+
+    def _take(self, conn: sqlite3.Connection, sku: str, quantity: int):
+        updated = conn.execute(
+            "UPDATE stock SET reserved = reserved + ? WHERE sku = ? AND on_hand - reserved >= ?",
+            (quantity, sku, quantity)
+        ).rowcount
+        if not updated:
+            self.stats["rejected"] += 1
+            row = conn.execute("SELECT on_hand - reserved FROM stock WHERE sku = ?", (sku,)).fetchone()
+            raise InsufficientStock(sku, quantity, row[0] if row else 0)
+
+    def _expire(self, conn: sqlite3.Connection, now: float) -> int:
+        expired = conn.execute(
+            "SELECT sku, SUM(quantity), COUNT(*) FROM reservations WHERE expires_at <= ? GROUP BY sku", (now,)
+        ).fetchall()
+        if not expired:
+            return 0
+        conn.executemany("UPDATE stock SET reserved = reserved - ? WHERE sku = ?", [(qty, sku) for sku, qty, _ in expired])
+        conn.execute("DELETE FROM reservations WHERE expires_at <= ?", (now,))
+        return sum(count for _, _, count in expired)
+
+    def reserve(self, session_id: str, sku: str, quantity: int) -> Optional[Dict[str, Any]]:
+        """
+        Hold stock for a session's checkout, replacing any earlier hold.
+
+        Args:
+            session_id: Session identifier
+            sku: Product name
+            quantity: Units to hold
+
+        Returns:
+            Reservation details, or None if the product is not tracked
+
+        Raises:
+            InsufficientStock: If not enough unreserved units are left
+            ValueError: If quantity is not a whole number of at least 1
+        """
+        _check_quantity(quantity)
+        now = time.time()
+        expires_at = now + self.reservation_ttl
+
+        def work(conn):
+            self.stats["expired"] += self._expire(conn, now)
+            self._drop_reservation(conn, session_id)
+            if not self.is_tracked(sku):
+                return None
+            self._take(conn, sku, quantity)
+            conn.execute(
+                "INSERT INTO reservations (session_id, sku, quantity, expires_at) VALUES (?, ?, ?, ?)",
+                (session_id, sku, quantity, expires_at)
+            )
+            return {"sku": sku, "quantity": quantity, "expires_at": expires_at}
+
+        # A rejected request rolls back, so the session keeps any earlier hold
+        reservation = self._transaction(work)
+        if reservation is not None:
+            self.stats["reserved"] += 1
+        return reservation
+
+    def commit(self, session_id: Optional[str], sku: str, quantity: int) -> bool:
+        """
+        Turn a session's reservation into a sale.
+
+        Without a matching live reservation (expired, or never made) the
+        units are taken directly if still available.
+
+        Args:
+            session_id: Session identifier, or None for orders placed without a checkout
+            sku: Product name being ordered
+            quantity: Units being ordered
+
+        Returns:
+            True if stock was deducted, False if the product is not tracked
+
+        Raises:
+            InsufficientStock: If the units are no longer available
+            ValueError: If quantity is not a whole number of at least 1
+        """
+        _check_quantity(quantity)
+        def work(conn):
+            self._drop_reservation(conn, session_id)
+            if not self.is_tracked(sku):
+                return False
+            # Re-take the units: always succeeds if they were just held, checked against stock otherwise
+            self._take(conn, sku, quantity)
+            conn.execute(
+                "UPDATE stock SET on_hand = on_hand - ?, reserved = reserved - ? WHERE sku = ?",
+                (quantity, quantity, sku)
+            )
+            return True
+
+        committed = self._transaction(work)
+        if committed:
+            self.stats["committed"] += 1
+        return committed
+
+    def release(self, session_id: str) -> bool:
+        """
+        Return a session's reserved units to stock.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            True if the session held a reservation
+        """
+        released = self._transaction(lambda conn: self._drop_reservation(conn, session_id)) is not None
+        if released:
+            self.stats["released"] += 1
+        return released
+
+    def restock(self, sku: str, quantity: int) -> bool:
+        """
+        Put units of a committed sale back on hand (the order was not stored).
+
+        Args:
+            sku: Product name
+            quantity: Units to return
+
+        Returns:
+            True if stock was added, False if the product is not tracked
+
+        Raises:
+            ValueError: If quantity is not a whole number of at least 1
+        """
+        _check_quantity(quantity)
+        if not self.is_tracked(sku):
+            return False
+        self._transaction(
+            lambda conn: conn.execute("UPDATE stock SET on_hand = on_hand + ? WHERE sku = ?", (quantity, sku))
+        )
+        self.stats["restocked"] += 1
+        return True
+
+    def expire_reservations(self, force: bool = False) -> int:
+        """
+        Return expired reservations to stock.
+
+        Args:
+            force: Accepted for interface compatibility; every call sweeps
+
+        Returns:
+            Number of reservations expired
+        """
+        expired = self._transaction(lambda conn: self._expire(conn, time.time()))
+        self.stats["expired"] += expired
+        return expired
+
+    def get_levels(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get stock levels.
+
+        Returns:
+            {product: {"on_hand", "reserved", "available"}}
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT sku, on_hand, reserved FROM stock").fetchall()
+        return {sku: {"on_hand": on_hand, "reserved": reserved, "available": on_hand - reserved}
+                for sku, on_hand, reserved in rows}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get inventory metrics.
+
+        Returns:
+            Dictionary of stock levels, live reservations and operation counters
+        """
+        with self._lock:
+            active = self._conn.execute("SELECT COUNT(*) FROM reservations").fetchone()[0]
+        return {"backend": "sqlite", "levels": self.get_levels(), "active_reservations": active, **self.stats}
+
+
+def catalog_stock(catalog: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Get initial stock levels from the product catalog.
+
+    Args:
+        catalog: Product catalog entries
+
+    Returns:
+        {product name: units} for products with a "stock" entry
+    """
+    return {p["name"]: int(p["stock"]) for p in catalog if p.get("stock") is not None}
+
+
+# Global inventory, created on first use
+_inventory = None
+
+
+def get_inventory():
+    """
+    Get or create the global inventory store.
+
+    Returns:
+        InventoryStore, or SQLiteInventoryStore when inventory_backend is "sqlite"
+    """
+    global _inventory
+    if _inventory is None:
+        from app.config.settings import settings
+        stock = catalog_stock(settings.product_catalog)
+        if settings.inventory_backend == "sqlite":
+            _inventory = SQLiteInventoryStore(
+                stock, db_path=settings.inventory_db_path, reservation_ttl=settings.reservation_ttl
+            )
+        else:
+            _inventory = InventoryStore(stock, reservation_ttl=settings.reservation_ttl)
+    return _inventory
@@ -0,0 +1,263 @@
+"""
+Order Event Outbox Module
+
+Durable log of order events waiting to be delivered to downstream
+systems (fulfillment, CRM, email). Order storage stages events in the
+same locked commit that writes the orders, so an event exists exactly
+when its order does; the dispatcher in app.services.order_events
+delivers them later, off the request path.
+
+Events are staged before the order file is replaced and confirmed right
+after. A crash in between (or a failed confirm or discard) leaves
+unconfirmed events, which recover() keeps or drops depending on whether
+their order made it to disk.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from app.utils.ids import new_ulid
+from app.utils.serialization import dumps_str, loads
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = "order.created"
+
+
+class OrderOutbox:
+    """
+    SQLite-backed outbox with one delivery cursor per sink.
+
+    Each sink receives events in sequence order; its cursor is the last
+    sequence number it acknowledged. Events are only handed out below the
+    oldest unconfirmed one, so a slow commit can never be skipped by a
+    faster one that staged later.
+    """
+
+    def __init__(self, db_path: str = "data/outbox.db"):
+        """
+        Initialize the outbox.
+
+        Args:
+            db_path: Path to SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Called (from the committing thread) after events are confirmed
+        self.on_confirm: Optional[Callable[[], None]] = None
+        dirname = os.path.dirname(db_path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_id TEXT NOT NULL,
+                type TEXT NOT NULL,
+                order_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                confirmed INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS events_unconfirmed ON events (confirmed, seq);
+            CREATE TABLE IF NOT EXISTS cursors (
+                sink TEXT PRIMARY KEY,
+                last_seq INTEGER NOT NULL
+            );
+            """
+        )
+
+    def stage(self, orders: List[Dict[str, Any]], event_type: str = ORDER_CREATED) -> List[int]:
+        """
+        Write unconfirmed events for orders about to be committed.
+
+        Args:
+            orders: Order records (with order_id and created_at)
+            event_type: Event type name
+
+        Returns:
+            Sequence numbers of the staged events
+
+        Raises:
+            sqlite3.Error: If the events could not be written (the orders must not be committed)
+        """
+        now = time.time()
+        rows = [
+            (new_ulid(), event_type, order["order_id"], dumps_str(order), now)
+            for order in orders
+        ]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                seqs = [
+                    self._conn.execute(
+                        "INSERT INTO events (event_id, type, order_id, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                        row
+                    ).lastrowid
+                    for row in rows
+                ]
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return seqs
+
+    def confirm(self, seqs: List[int]):
+        """
+        Mark staged events deliverable once their orders are durable.
+
+        Args:
+            seqs: Sequence numbers from stage()
+        """
+        with self._lock:
+            self._conn.executemany("UPDATE events SET confirmed = 1 WHERE seq = ?", [(seq,) for seq in seqs])
+        if self.on_confirm:
+            self.on_confirm()
+
+    def discard(self, seqs: List[int]):
+        """
+        Drop staged events whose orders failed to commit.
+
+        Args:
+            seqs: Sequence numbers from stage()
+        """
+        with self._lock:
+            self._conn.executemany("DELETE FROM events WHERE seq = ? AND confirmed = 0", [(seq,) for seq in seqs])
+
+    def recover(self, order_exists: Callable[[str], bool], older_than: float = 0.0) -> Tuple[int, int]:
+        """
+        Resolve events left unconfirmed by a crash or a failed confirm/discard.
+
+        Args:
+            order_exists: Returns True if an order ID is in storage
+            older_than: Only resolve events staged at least this many seconds
+                ago (0 resolves all; use a grace period while commits are running)
+
+        Returns:
+            (events confirmed, events dropped)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, order_id FROM events WHERE confirmed = 0 AND created_at <= ?",
+                (time.time() - older_than,)
+            ).fetchall()
+        keep, drop = [], []
+        for seq, order_id in rows:
+            (keep if order_exists(order_id) else drop).append(seq)
+        if keep:
+            self.confirm(keep)
+        if drop:
+            self.discard(drop)
+        if rows:
+            logger.warning(f"Outbox recovery: {len(keep)} events confirmed, {len(drop)} dropped (orders never committed)")
+        return len(keep), len(drop)
+
+    def pending(self, sink: str, limit: int = 100) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Get the next events a sink has not acknowledged.
+
+        Args:
+            sink: Sink name (URL)
+            limit: Maximum events returned
+
+        Returns:
+            (sequence number, event) pairs in order
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT last_seq FROM cursors WHERE sink = ?", (sink,)).fetchone()
+            last_seq = row[0] if row else 0
+            unconfirmed = self._conn.execute("SELECT MIN(seq) FROM events WHERE confirmed = 0").fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT seq, event_id, type, order_id, payload, created_at FROM events "
+                "WHERE seq > ? AND seq < ? AND confirmed = 1 ORDER BY seq LIMIT ?",
+                (last_seq, unconfirmed if unconfirmed is not None else 2 ** 62, limit)
+            ).fetchall()
+        return [
+            (seq, {
+                "event_id": event_id,
+                "type": event_type,
+                "order_id": order_id,
+                "occurred_at": created_at,
+                "data": loads(payload)
+            })
+            for seq, event_id, event_type, order_id, payload, created_at in rows
+        ]
+
+    def ack(self, sink: str, last_seq: int):
+        """
+        Record that a sink received every event up to last_seq.
+
+        Args:
+            sink: Sink name (URL)
+            last_seq: Highest delivered sequence number
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO cursors (sink, last_seq) VALUES (?, ?) "
+                "ON CONFLICT(sink) DO UPDATE SET last_seq = MAX(last_seq, excluded.last_seq)",
+                (sink, last_seq)
+            )
+
+    def backlog(self, sink: str) -> int:
+        """
+        Count confirmed events a sink has not acknowledged.
+
+        Args:
+            sink: Sink name (URL)
+
+        Returns:
+            Number of undelivered events
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT last_seq FROM cursors WHERE sink = ?", (sink,)).fetchone()
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM events WHERE seq > ? AND confirmed = 1", (row[0] if row else 0,)
+            ).fetchone()[0]
+
+    def purge(self, sinks: List[str]) -> int:
+        """
+        Delete events every sink has acknowledged.
+
+        Args:
+            sinks: All configured sinks
+
+        Returns:
+            Number of events deleted
+        """
+        if not sinks:
+            return 0
+        with self._lock:
+            placeholders = ",".join("?" * len(sinks))
+            rows = self._conn.execute(f"SELECT sink, last_seq FROM cursors WHERE sink IN ({placeholders})", sinks).fetchall()
+            if len(rows) < len(sinks):
+                return 0
+            low_watermark = min(last_seq for _, last_seq in rows)
+            return self._conn.execute(
+                "DELETE FROM events WHERE seq <= ? AND confirmed = 1", (low_watermark,)
+            ).rowcount
+
+
+# Global outbox, created on first use when event sinks are configured
+_order_outbox = None
+
+
+def get_order_outbox() -> Optional[OrderOutbox]:
+    """
+    Get the global order outbox.
+
+    Returns:
+        OrderOutbox, or None if no event sinks are configured
+    """
+    global _order_outbox
+    from app.config.settings import settings
+    if not settings.order_event_sinks:
+        return None
+    if _order_outbox is None:
+        _order_outbox = OrderOutbox(settings.outbox_db_path)
+    return _order_outbox
@@ -1,12 +1,23 @@
 """
-In-Memory Storage Module
+Storage Module
 
 Provides storage abstraction for orders and conversation history.
 Can be easily replaced with actual database implementation.
 """
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, TYPE_CHECKING
+from collections import OrderedDict
+from datetime import datetime, timezone
 import logging
 import os
+import sqlite3
+import threading
+import zlib
+
+from app.utils.ids import new_ulid
+
+if TYPE_CHECKING:
+    from app.db.analytics import OrderAnalytics
+    from app.db.outbox import OrderOutbox
 
 logger = logging.getLogger(__name__)
 
@@ -17,16 +28,30 @@ class OrderStorage:
     Simulates a database using data/orders.json.
     """
     
-    def __init__(self, storage_file: str = "data/orders.json"):
+    def __init__(
+        self,
+        storage_file: str = "data/orders.json",
+        analytics: Optional["OrderAnalytics"] = None,
+        outbox: Optional["OrderOutbox"] = None
+    ):
         """
         Initialize order storage with file path.
         
         Args:
             storage_file: Path to JSON storage file
+            analytics: Optional aggregates kept in step with stored orders
+            outbox: Optional event outbox written in the same commit as new orders
         """
         self.storage_file = storage_file
+        self.analytics = analytics
+        self.outbox = outbox
+        self._lock = threading.Lock()
         self._ensure_storage_dir()
         self._load_orders()
+        self._build_indexes()
+        
+        if self.analytics and self.analytics.order_count != len(self._orders):
+            self.analytics.rebuild(self._orders)
         
     def _ensure_storage_dir(self):
         """Ensure storage directory exists."""
@@ -38,9 +63,9 @@ class OrderStorage:
         """Load orders from JSON file."""
         if os.path.exists(self.storage_file):
             try:
-                import json
-                with open(self.storage_file, 'r') as f:
-                    self._orders = json.load(f)
+                from app.utils.serialization import loads
+                with open(self.storage_file, 'rb') as f:
+                    self._orders = loads(f.read())
                 logger.info(f"Loaded {len(self._orders)} orders from {self.storage_file}")
             except Exception as e:
                 logger.error(f"Error loading orders: {e}")
@@ -48,17 +73,43 @@ class OrderStorage:
         else:
             self._orders = []
             
+    def _build_indexes(self):
+        """Assign IDs to legacy records and build the ID and email indexes."""
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_email: Dict[str, List[str]] = {}
+        self._version = len(self._orders)
+        for position, order in enumerate(self._orders, start=1):
+            # Legacy records keep the positional ID they were given
+            order.setdefault("order_id", str(position))
+            self._index(order)
+    
+    def _index(self, order: Dict[str, Any]):
+        """Add one order to the lookup indexes."""
+        self._by_id[order["order_id"]] = order
+        email = (order.get("email") or "").lower()
+        if email:
+            self._by_email.setdefault(email, []).append(order["order_id"])
+    
     def _save_orders(self):
-        """Save orders to JSON file."""
-        try:
-            import json
-            with open(self.storage_file, 'w') as f:
-                json.dump(self._orders, f, indent=2)
-            logger.info(f"Saved {len(self._orders)} orders to {self.storage_file}")
-        except Exception as e:
-            logger.error(f"Error saving orders: {e}")
+        """
+        Save orders to JSON file atomically and durably.
+        
+        Writes a temp file, fsyncs it and renames it over the storage
+        file, so a crash never leaves a half-written order file.
+        
+        Raises:
+            OSError: If the file cannot be written
+        """
+        from app.utils.serialization import dumps
+        tmp_file = f"{self.storage_file}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(dumps(self._orders, indent=True))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.storage_file)
+        logger.info("Saved %d orders to %s", len(self._orders), self.storage_file)
     
-    def add_order(self, order_data: Dict[str, Any]) -> int:
+    def add_order(self, order_data: Dict[str, Any]) -> str:
         """
         Add an order to storage and save to file.
         
@@ -66,14 +117,70 @@ class OrderStorage:
             order_data: Order data dictionary
             
         Returns:
-            Order ID (1-indexed position in list)
+            Order ID
+        """
+        return self.add_orders([order_data])[0]
+    
+    def add_orders(self, orders: List[Dict[str, Any]]) -> List[str]:
         """
-        self._orders.append(order_data)
-        self._save_orders()
+        Add a batch of orders with a single durable file write (group commit).
         
-        order_id = len(self._orders)
-        logger.info(f"Order {order_id} added and saved")
-        return order_id
+        Args:
+            orders: Order data dictionaries
+            
+        Returns:
+            Order IDs in the same order as the input
+            
+        Raises:
+            OSError: If the batch could not be persisted (nothing is added)
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        # Copy so later session state edits cannot change the stored orders
+        records = [
+            {
+                **order_data,
+                "order_id": order_data.get("order_id") or new_ulid(),
+                "created_at": order_data.get("created_at") or now
+            }
+            for order_data in orders
+        ]
+        
+        with self._lock:
+            start = len(self._orders)
+            self._orders.extend(records)
+            staged = None
+            try:
+                # Events are staged first: an order is never durable without its event
+                if self.outbox:
+                    staged = self.outbox.stage(records)
+                self._save_orders()
+            except Exception as e:
+                del self._orders[start:]
+                if staged:
+                    try:
+                        self.outbox.discard(staged)
+                    except Exception as discard_error:
+                        # Left unconfirmed; the dispatcher drops them once stale
+                        logger.error(f"Discarding outbox events failed: {discard_error}")
+                logger.error(f"Error saving orders: {e}")
+                raise
+            # The orders are durable from here on, whatever happens to their events
+            if staged:
+                try:
+                    self.outbox.confirm(staged)
+                except Exception as e:
+                    # Left unconfirmed; the dispatcher confirms them once stale
+                    logger.error(f"Confirming outbox events failed: {e}")
+            
+            for record in records:
+                self._index(record)
+            self._version += len(records)
+            if self.analytics:
+                self.analytics.record_batch(records)
+        
+        order_ids = [record["order_id"] for record in records]
+        logger.info("Orders %s added and saved", ", ".join(order_ids))
+        return order_ids
     
     def get_all_orders(self) -> List[Dict[str, Any]]:
         """
@@ -84,19 +191,42 @@ class OrderStorage:
         """
         return self._orders.copy()
     
-    def get_order_by_id(self, order_id: int) -> Dict[str, Any]:
+    def get_order_by_id(self, order_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a specific order by ID.
         
         Args:
-            order_id: Order ID (1-indexed)
+            order_id: Order ID
             
         Returns:
             Order data dictionary or None if not found
         """
-        if 0 < order_id <= len(self._orders):
-            return self._orders[order_id - 1]
-        return None
+        return self._by_id.get(str(order_id))
+    
+    def has_order(self, order_id: str) -> bool:
+        """
+        Check whether an order is committed, waiting for a commit in progress.
+        
+        Args:
+            order_id: Order ID
+            
+        Returns:
+            True if the order is stored
+        """
+        with self._lock:
+            return str(order_id) in self._by_id
+    
+    def get_orders_by_email(self, email: str) -> List[Dict[str, Any]]:
+        """
+        Get all orders placed with an email address.
+        
+        Args:
+            email: Customer email (case-insensitive)
+            
+        Returns:
+            List of orders, oldest first
+        """
+        return [self._by_id[order_id] for order_id in self._by_email.get(email.lower(), [])]
     
     def count(self) -> int:
         """
@@ -106,32 +236,354 @@ class OrderStorage:
             Number of orders in storage
         """
         return len(self._orders)
+    
+    @property
+    def version(self) -> int:
+        """Change counter, bumped on every commit (used for HTTP ETags)."""
+        return self._version
+
+
+def _order_sort_key(order: Dict[str, Any]) -> tuple:
+    # Legacy positional IDs ("1", "2", ...) predate every ULID and sort numerically
+    order_id = order.get("order_id", "")
+    if order_id.isdigit():
+        return (0, int(order_id), "")
+    return (1, 0, order_id)
+
+
+class ShardedOrderStorage:
+    """
+    Order storage split across N independent OrderStorage shards.
+    
+    Orders are routed by a CRC32 hash of their ID, so each shard has its
+    own file, lock and (via ShardedOrderWriter) its own write queue, and
+    concurrent commits to different shards do not serialize on one file.
+    Reads scatter over all shards and merge by creation time. Exposes the
+    same interface as OrderStorage.
+    """
+    
+    def __init__(
+        self,
+        shard_count: int,
+        storage_dir: str = "data",
+        analytics: Optional["OrderAnalytics"] = None,
+        legacy_file: Optional[str] = "data/orders.json",
+        outbox: Optional["OrderOutbox"] = None
+    ):
+        """
+        Initialize the shards, migrating a legacy single-file store if present.
+        
+        Args:
+            shard_count: Number of shards
+            storage_dir: Directory holding the shard files
+            analytics: Optional aggregates shared by all shards
+            legacy_file: Unsharded order file to migrate on first start
+            outbox: Optional event outbox shared by all shards (migrated orders emit no events)
+        """
+        self.shard_count = shard_count
+        self.analytics = analytics
+        self.outbox = outbox
+        self.shards = [
+            OrderStorage(os.path.join(storage_dir, f"orders-shard-{index:02d}.json"))
+            for index in range(shard_count)
+        ]
+        self._executor = None
+        
+        if legacy_file and os.path.exists(legacy_file):
+            self._migrate(legacy_file)
+        
+        if self.analytics:
+            if self.analytics.order_count != self.count():
+                self.analytics.rebuild(self.get_all_orders())
+            for shard in self.shards:
+                shard.analytics = self.analytics
+        for shard in self.shards:
+            shard.outbox = self.outbox
+    
+    def _migrate(self, legacy_file: str):
+        """Distribute orders from the unsharded file across the shards."""
+        if self.count():
+            logger.warning(f"Shards already hold orders; not migrating {legacy_file}")
+            return
+        
+        legacy_orders = OrderStorage(legacy_file).get_all_orders()
+        for index, group in self._group_by_shard(legacy_orders).items():
+            self.shards[index].add_orders(group)
+        os.replace(legacy_file, f"{legacy_file}.migrated")
+        logger.info(f"Migrated {len(legacy_orders)} orders from {legacy_file} into {self.shard_count} shards")
+    
+    def shard_index(self, order_id: str) -> int:
+        """
+        Get the shard an order ID routes to.
+        
+        Args:
+            order_id: Order ID
+            
+        Returns:
+            Shard index
+        """
+        return zlib.crc32(str(order_id).encode()) % self.shard_count
+    
+    def _group_by_shard(self, orders: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+        groups: Dict[int, List[Dict[str, Any]]] = {}
+        for order in orders:
+            groups.setdefault(self.shard_index(order["order_id"]), []).append(order)
+        return groups
+    
+    def add_order(self, order_data: Dict[str, Any]) -> str:
+        """
+        Add an order to its shard.
+        
+        Args:
+            order_data: Order data dictionary
+            
+        Returns:
+            Order ID
+        """
+        return self.add_orders([order_data])[0]
+    
+    def add_orders(self, orders: List[Dict[str, Any]]) -> List[str]:
+        """
+        Add a batch of orders, committing each shard's part in parallel.
+        
+        Args:
+            orders: Order data dictionaries
+            
+        Returns:
+            Order IDs in the same order as the input
+            
+        Raises:
+            OSError: If any shard failed to persist its part (parts routed
+                to other shards may already be stored)
+        """
+        records = [{**order, "order_id": order.get("order_id") or new_ulid()} for order in orders]
+        groups = self._group_by_shard(records)
+        
+        if len(groups) == 1:
+            (index, group), = groups.items()
+            self.shards[index].add_orders(group)
+        else:
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(max_workers=self.shard_count, thread_name_prefix="order-shard")
+            futures = [
+                self._executor.submit(self.shards[index].add_orders, group)
+                for index, group in groups.items()
+            ]
+            for future in futures:
+                future.result()
+        
+        return [record["order_id"] for record in records]
+    
+    def get_all_orders(self) -> List[Dict[str, Any]]:
+        """
+        Get all orders from every shard, oldest first.
+        
+        Returns:
+            List of all orders
+        """
+        orders = []
+        for shard in self.shards:
+            orders.extend(shard.get_all_orders())
+        orders.sort(key=_order_sort_key)
+        return orders
+    
+    def get_order_by_id(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a specific order by ID from its shard.
+        
+        Args:
+            order_id: Order ID
+            
+        Returns:
+            Order data dictionary or None if not found
+        """
+        return self.shards[self.shard_index(order_id)].get_order_by_id(order_id)
+    
+    def has_order(self, order_id: str) -> bool:
+        """
+        Check whether an order is committed in its shard.
+        
+        Args:
+            order_id: Order ID
+            
+        Returns:
+            True if the order is stored
+        """
+        return self.shards[self.shard_index(order_id)].has_order(order_id)
+    
+    def get_orders_by_email(self, email: str) -> List[Dict[str, Any]]:
+        """
+        Get all orders placed with an email address across all shards.
+        
+        Args:
+            email: Customer email (case-insensitive)
+            
+        Returns:
+            List of orders, oldest first
+        """
+        orders = []
+        for shard in self.shards:
+            orders.extend(shard.get_orders_by_email(email))
+        orders.sort(key=_order_sort_key)
+        return orders
+    
+    def count(self) -> int:
+        """
+        Get count of orders.
+        
+        Returns:
+            Number of orders across all shards
+        """
+        return sum(shard.count() for shard in self.shards)
+    
+    @property
+    def version(self) -> int:
+        """Change counter, bumped on every commit to any shard."""
+        return sum(shard.version for shard in self.shards)
+
+
+# Role codes stored in the conversation log (one small int per message)
+ROLE_CODES = {"system": 0, "user": 1, "assistant": 2}
+ROLE_NAMES = {code: role for role, code in ROLE_CODES.items()}
+
+# Content encodings in the conversation log
+ENCODING_RAW = 0
+ENCODING_ZLIB = 1
+
+
+class _SessionWindow:
+    """Recent messages of one session kept in memory."""
+    __slots__ = ("messages", "next_seq")
+
+    def __init__(self, messages: List[Dict[str, str]], next_seq: int):
+        self.messages = messages
+        self.next_seq = next_seq
 
 
 class ConversationStorage:
     """
-    In-memory storage for conversation history.
+    SQLite-backed conversation history.
+    
+    Every message is appended to a persistent log (role as a small int,
+    content zlib-compressed when large). Only a bounded window of recent
+    messages is kept in memory, for a bounded number of recently active
+    sessions; older turns are paged from disk on demand.
     
-    Stores conversation history per session.
+    Message sequence numbers are allocated by SQLite, so several worker
+    processes can append to the same log; a window that missed another
+    worker's messages is reloaded. Methods block on disk I/O, so async
+    callers run them in a worker thread.
     """
     
-    def __init__(self):
-        """Initialize empty conversation storage."""
-        self._conversations: Dict[str, List[Dict[str, str]]] = {}
+    def __init__(
+        self,
+        db_path: str = "data/conversations.db",
+        window_size: int = 20,
+        max_cached_sessions: int = 1000,
+        compress_threshold: int = 200
+    ):
+        """
+        Initialize conversation storage.
+        
+        Args:
+            db_path: Path to SQLite database file
+            window_size: Recent messages kept in memory per session
+            max_cached_sessions: Sessions whose windows stay in memory
+            compress_threshold: Content size (bytes) above which messages are compressed
+        """
+        self.db_path = db_path
+        self.window_size = window_size
+        self.max_cached_sessions = max_cached_sessions
+        self.compress_threshold = compress_threshold
+        self._windows: "OrderedDict[str, _SessionWindow]" = OrderedDict()
+        # Sessions with a live connection (refcount); their windows are never evicted
+        self._pinned: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._conn = self._connect()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database, falling back to memory if the path is not writable."""
+        try:
+            dirname = os.path.dirname(self.db_path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Cannot open conversation log {self.db_path}: {e}; using in-memory log")
+            conn = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None)
+        
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS messages (
+                session_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                role INTEGER NOT NULL,
+                encoding INTEGER NOT NULL,
+                content BLOB NOT NULL,
+                PRIMARY KEY (session_id, seq)
+            ) WITHOUT ROWID
+            """
+        )
+        return conn
+    
+    def _encode(self, content: str) -> tuple:
+        data = content.encode("utf-8")
+        if len(data) > self.compress_threshold:
+            compressed = zlib.compress(data, 6)
+            if len(compressed) < len(data):
+                return ENCODING_ZLIB, compressed
+        return ENCODING_RAW, data
+    
+    @staticmethod
+    def _decode(role: int, encoding: int, content: bytes) -> Dict[str, str]:
+        if encoding == ENCODING_ZLIB:
+            content = zlib.decompress(content)
+        return {"role": ROLE_NAMES[role], "content": content.decode("utf-8")}
+    
+    def _read_window(self, session_id: str) -> tuple:
+        """Read the most recent window of a session from disk as (messages, next seq)."""
+        rows = self._conn.execute(
+            "SELECT seq, role, encoding, content FROM messages WHERE session_id = ? ORDER BY seq DESC LIMIT ?",
+            (session_id, self.window_size)
+        ).fetchall()
+        rows.reverse()
+        messages = [self._decode(role, encoding, content) for _, role, encoding, content in rows]
+        return messages, rows[-1][0] + 1 if rows else 0
+    
+    def _get_window(self, session_id: str) -> _SessionWindow:
+        """Get the in-memory window for a session, loading it from disk on a miss."""
+        window = self._windows.get(session_id)
+        if window is not None:
+            self._windows.move_to_end(session_id)
+            return window
+        
+        window = _SessionWindow(*self._read_window(session_id))
+        self._windows[session_id] = window
+        while len(self._windows) > self.max_cached_sessions:
+            victim = next((sid for sid in self._windows if sid not in self._pinned), None)
+            if victim is None:
+                break
+            del self._windows[victim]
+        return window
     
     def get_history(self, session_id: str) -> List[Dict[str, str]]:
         """
-        Get conversation history for a session.
+        Get recent conversation history for a session.
+        
+        The returned list is live: messages added later are appended to it
+        and the oldest ones are dropped once it exceeds the window size.
         
         Args:
             session_id: Session identifier
             
         Returns:
-            List of message dictionaries
+            List of message dictionaries (most recent window)
         """
-        if session_id not in self._conversations:
-            self._conversations[session_id] = []
-        return self._conversations[session_id]
+        with self._lock:
+            return self._get_window(session_id).messages
     
     def add_message(self, session_id: str, role: str, content: str):
         """
@@ -142,9 +594,101 @@ class ConversationStorage:
             role: Message role ('user' or 'assistant')
             content: Message content
         """
-        history = self.get_history(session_id)
-        history.append({"role": role, "content": content})
-        logger.debug(f"Message added to session {session_id}: {role}")
+        encoding, data = self._encode(content)
+        with self._lock:
+            window = self._get_window(session_id)
+            # Next seq is taken inside the INSERT, so concurrent writers never collide
+            seq = self._conn.execute(
+                "INSERT INTO messages (session_id, seq, role, encoding, content) "
+                "SELECT ?, COALESCE(MAX(seq), -1) + 1, ?, ?, ? FROM messages WHERE session_id = ? "
+                "RETURNING seq",
+                (session_id, ROLE_CODES[role], encoding, data, session_id)
+            ).fetchall()[0][0]
+            # Update in place so callers holding the list see the same window
+            if seq == window.next_seq:
+                window.messages.append({"role": role, "content": content})
+                excess = len(window.messages) - self.window_size
+                if excess > 0:
+                    del window.messages[:excess]
+            else:
+                # Another worker appended to this session since the window was loaded
+                window.messages[:], _ = self._read_window(session_id)
+            window.next_seq = seq + 1
+        logger.debug("Message added to session %s: %s", session_id, role)
+    
+    def get_page(self, session_id: str, before: Optional[int] = None, limit: int = 50) -> tuple:
+        """
+        Page through older messages of a session, newest first.
+        
+        Args:
+            session_id: Session identifier
+            before: Only return messages older than this cursor (None for the latest)
+            limit: Maximum messages per page
+            
+        Returns:
+            Tuple of (messages in chronological order, cursor for the next older page or None)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, role, encoding, content FROM messages "
+                "WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+                (session_id, before if before is not None else 2 ** 62, limit)
+            ).fetchall()
+        rows.reverse()
+        messages = [self._decode(role, encoding, content) for _, role, encoding, content in rows]
+        next_cursor = rows[0][0] if len(rows) == limit and rows[0][0] > 0 else None
+        return messages, next_cursor
+    
+    def message_count(self, session_id: str) -> int:
+        """
+        Get the total number of stored messages for a session.
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            Number of messages on disk
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+    
+    def pin(self, session_id: str):
+        """
+        Keep a session's window in memory until unpinned (e.g. while a
+        WebSocket is open for it).
+        
+        Args:
+            session_id: Session identifier
+        """
+        with self._lock:
+            self._pinned[session_id] = self._pinned.get(session_id, 0) + 1
+            self._get_window(session_id)
+    
+    def unpin(self, session_id: str):
+        """
+        Release a pin taken with pin().
+        
+        Args:
+            session_id: Session identifier
+        """
+        with self._lock:
+            count = self._pinned.get(session_id, 0) - 1
+            if count > 0:
+                self._pinned[session_id] = count
+            else:
+                self._pinned.pop(session_id, None)
+    
+    def evict(self, session_id: str):
+        """
+        Drop a session's in-memory window (history stays on disk).
+        
+        Args:
+            session_id: Session identifier
+        """
+        with self._lock:
+            self._windows.pop(session_id, None)
     
     def clear_history(self, session_id: str):
         """
@@ -153,11 +697,61 @@ class ConversationStorage:
         Args:
             session_id: Session identifier
         """
-        if session_id in self._conversations:
-            del self._conversations[session_id]
-            logger.info(f"Conversation history cleared for session {session_id}")
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._windows.pop(session_id, None)
+        logger.info("Conversation history cleared for session %s", session_id)
+
+
+# Global storage instances, created on first use so importing this module
+# does not read data/orders.json (keeps serverless cold starts fast)
+_order_storage = None
+_conversation_storage = None
+
+
+def get_order_storage():
+    """
+    Get or create the global order storage.
+    
+    Returns:
+        OrderStorage, or ShardedOrderStorage when order_shards > 1
+    """
+    global _order_storage
+    if _order_storage is None:
+        from app.config.settings import settings
+        from app.db.analytics import OrderAnalytics
+        from app.db.outbox import get_order_outbox
+        analytics = OrderAnalytics("data/orders_stats.json")
+        outbox = get_order_outbox()
+        if settings.order_shards > 1:
+            _order_storage = ShardedOrderStorage(settings.order_shards, analytics=analytics, outbox=outbox)
+        else:
+            _order_storage = OrderStorage(analytics=analytics, outbox=outbox)
+    return _order_storage
+
+
+def get_conversation_storage() -> ConversationStorage:
+    """
+    Get or create the global conversation storage.
+    
+    Returns:
+        ConversationStorage instance
+    """
+    global _conversation_storage
+    if _conversation_storage is None:
+        from app.config.settings import settings
+        _conversation_storage = ConversationStorage(
+            db_path=settings.conversation_db_path,
+            window_size=settings.conversation_window,
+            max_cached_sessions=settings.conversation_cache_sessions
+        )
+    return _conversation_storage
 
 
-# Global storage instances
-order_storage = OrderStorage()
-conversation_storage = ConversationStorage()
+def __getattr__(name: str):
+    # Backward compatibility for `from app.db.storage import order_storage`
+    if name == "order_storage":
+        return get_order_storage()
+    if name == "conversation_storage":
+        return get_conversation_storage()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,238 @@
+"""
+Write-Behind Order Queue Module
+
+Queues order writes and group-commits them in batches with a single
+durable file write, acknowledging each caller once its batch is on disk.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import contextvars
+import logging
+
+from app.db.storage import OrderStorage, ShardedOrderStorage
+from app.utils.ids import new_ulid
+
+logger = logging.getLogger(__name__)
+
+
+class OrderWriteQueue:
+    """
+    Asyncio write-behind pipeline for order persistence.
+    
+    A background task drains the queue, collecting up to max_batch orders
+    or waiting at most max_delay seconds after the first one, then commits
+    the batch in a worker thread so the event loop never blocks on fsync.
+    """
+    
+    def __init__(self, storage: OrderStorage, max_batch: int = 64, max_delay: float = 0.005):
+        """
+        Initialize the queue.
+        
+        Args:
+            storage: Order storage to commit into
+            max_batch: Maximum orders per group commit
+            max_delay: Maximum seconds to wait for more orders after the first
+        """
+        self.storage = storage
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.batches = 0
+        self.orders = 0
+    
+    def start(self):
+        """Start the background writer on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            # Start from an empty context so the writer's logs don't carry the first caller's request ID
+            self._task = contextvars.Context().run(asyncio.create_task, self._run())
+            logger.info("Order write-behind queue started")
+    
+    async def submit(self, order_data: Dict[str, Any]) -> Any:
+        """
+        Queue an order and wait until it is durably stored.
+        
+        Args:
+            order_data: Order data dictionary
+            
+        Returns:
+            Order ID assigned by storage
+            
+        Raises:
+            OSError: If the batch containing the order failed to persist
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((order_data, future))
+        # Shielded: a disconnecting client must not drop an order already queued
+        return await asyncio.shield(future)
+    
+    async def stop(self):
+        """Flush queued orders and stop the background writer."""
+        if self._task is None or self._task.done():
+            return
+        self._queue.put_nowait(None)
+        await self._task
+        logger.info("Order write-behind queue flushed and stopped")
+    
+    async def _run(self):
+        """Drain the queue in batches until a stop marker arrives."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch: List[Tuple[Dict[str, Any], asyncio.Future]] = [item]
+            deadline = loop.time() + self.max_delay
+            
+            while len(batch) < self.max_batch:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            await self._commit(batch)
+        
+        # Commit anything queued behind the stop marker
+        leftovers = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                leftovers.append(item)
+        if leftovers:
+            await self._commit(leftovers)
+    
+    async def _commit(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """Persist one batch and resolve its callers."""
+        orders = [order for order, _ in batch]
+        try:
+            order_ids = await asyncio.to_thread(self.storage.add_orders, orders)
+        except Exception as e:
+            logger.error(f"Group commit of {len(batch)} orders failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        self.batches += 1
+        self.orders += len(batch)
+        for (_, future), order_id in zip(batch, order_ids):
+            if not future.done():
+                future.set_result(order_id)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get group commit metrics.
+        
+        Returns:
+            Dictionary of batches, orders and queue depth
+        """
+        return {
+            "batches": self.batches,
+            "orders": self.orders,
+            "avg_batch_size": round(self.orders / self.batches, 2) if self.batches else 0,
+            "queue_depth": self._queue.qsize() if self._queue else 0
+        }
+
+
+class ShardedOrderWriter:
+    """
+    Routes order writes to one OrderWriteQueue per storage shard.
+    
+    The order ID is assigned at submit time so the shard is known before
+    the order is queued; each shard then group-commits independently.
+    """
+    
+    def __init__(self, storage: ShardedOrderStorage, max_batch: int = 64, max_delay: float = 0.005):
+        """
+        Initialize one queue per shard.
+        
+        Args:
+            storage: Sharded order storage
+            max_batch: Maximum orders per group commit (per shard)
+            max_delay: Maximum seconds to wait for more orders after the first
+        """
+        self.storage = storage
+        self.queues = [OrderWriteQueue(shard, max_batch, max_delay) for shard in storage.shards]
+    
+    async def submit(self, order_data: Dict[str, Any]) -> str:
+        """
+        Queue an order on its shard and wait until it is durably stored.
+        
+        Args:
+            order_data: Order data dictionary
+            
+        Returns:
+            Order ID
+        """
+        order = {**order_data, "order_id": order_data.get("order_id") or new_ulid()}
+        queue = self.queues[self.storage.shard_index(order["order_id"])]
+        return await queue.submit(order)
+    
+    async def stop(self):
+        """Flush and stop every shard queue."""
+        await asyncio.gather(*(queue.stop() for queue in self.queues))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get group commit metrics summed over shards.
+        
+        Returns:
+            Dictionary of totals plus per-shard stats
+        """
+        shards = [queue.get_stats() for queue in self.queues]
+        batches = sum(s["batches"] for s in shards)
+        orders = sum(s["orders"] for s in shards)
+        return {
+            "batches": batches,
+            "orders": orders,
+            "avg_batch_size": round(orders / batches, 2) if batches else 0,
+            "queue_depth": sum(s["queue_depth"] for s in shards),
+            "shards": shards
+        }
+
+
+# Global writer, created on first use
+_order_writer = None
+
+
+def get_order_writer():
+    """
+    Get or create the global order write queue.
+    
+    Returns:
+        OrderWriteQueue, or ShardedOrderWriter for sharded storage
+    """
+    global _order_writer
+    if _order_writer is None:
+        from app.config.settings import settings
+        from app.db.storage import get_order_storage
+        storage = get_order_storage()
+        writer_class = ShardedOrderWriter if isinstance(storage, ShardedOrderStorage) else OrderWriteQueue
+        _order_writer = writer_class(
+            storage,
+            max_batch=settings.order_write_batch_size,
+            max_delay=settings.order_write_max_delay
+        )
+    return _order_writer
+
+
+async def shutdown_order_writer():
+    """Flush the global order writer if it was ever used."""
+    if _order_writer is not None:
+        await _order_writer.stop()
@@ -1,27 +1,109 @@
 import os
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
 from dotenv import load_dotenv
 
-from app.utils.logger import configure_app_logging
-from app.api.routes import web, orders, chat
+from app.utils.logger import configure_app_logging, LogContextMiddleware
+from app.utils.http_cache import CachedStaticFiles
+from app.api.admission import ChatAdmissionMiddleware
+from app.api.rate_limit import RateLimitMiddleware
+from app.api.responses import FastJSONResponse
+from app.api.routes import web, orders, chat, metrics, admin
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-configure_app_logging()
+# Configure logging (settings are not loaded yet; the lifespan applies them)
+configure_app_logging(use_settings=False)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup/shutdown hooks: apply the logging settings, load (or build) the
+    product index, restore session state from the last snapshot and keep
+    snapshotting it and the order stats and start order event delivery;
+    on shutdown, write a final snapshot, flush queued order writes, save the
+    order stats and deliver the events.
+    """
+    from app.config.settings import settings
+    from app.core.state_manager import state_manager, run_periodic_snapshots
+    from app.services.product_index import get_product_index
+    
+    configure_app_logging()
+    
+    # Ready before the first chat turn, which would otherwise build it on the event loop
+    try:
+        await asyncio.to_thread(get_product_index)
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Product index unavailable: {e}")
+    
+    state_manager.load_snapshot(settings.session_snapshot_path)
+    snapshot_task = None
+    if settings.session_snapshot_interval > 0 or settings.session_idle_ttl > 0:
+        # Without periodic snapshots the task only evicts idle sessions (once a minute)
+        snapshot_task = asyncio.create_task(run_periodic_snapshots(
+            state_manager,
+            settings.session_snapshot_path if settings.session_snapshot_interval > 0 else None,
+            settings.session_snapshot_interval or 60.0,
+            max_idle=settings.session_idle_ttl
+        ))
+    
+    from app.db.analytics import run_periodic_stats_saves
+    from app.db.storage import get_order_storage
+    analytics = get_order_storage().analytics
+    stats_task = asyncio.create_task(run_periodic_stats_saves(analytics, settings.order_stats_save_interval))
+    
+    from app.services.order_events import start_order_dispatcher, shutdown_order_dispatcher
+    await start_order_dispatcher()
+    
+    yield
+    
+    if snapshot_task:
+        snapshot_task.cancel()
+    try:
+        state_manager.save_snapshot(settings.session_snapshot_path)
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Final session snapshot failed: {e}")
+    
+    from app.db.write_behind import shutdown_order_writer
+    await shutdown_order_writer()
+    stats_task.cancel()
+    analytics.save_if_dirty()
+    await shutdown_order_dispatcher()
+    
+    from app.core import tracing
+    if tracing._trace_recorder is not None:
+        tracing._trace_recorder.close()
+
 
 # Create FastAPI app
-app = FastAPI(title="GOMWD Quote & Order Agent")
+app = FastAPI(title="GOMWD Quote & Order Agent", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# Shed chat turns under overload instead of queueing them without bound
+app.add_middleware(ChatAdmissionMiddleware)
+
+# Per-IP and per-session chat limits, checked before a turn can take an admission slot
+app.add_middleware(RateLimitMiddleware)
+
+# Compress large responses (HTML, JSON listings, static assets)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+# Mount static files (fingerprinted URLs are cached as immutable)
+app.mount("/static", CachedStaticFiles(directory="app/static"), name="static")
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Tag every request's log records with a request ID (outermost, so it covers everything)
+app.add_middleware(LogContextMiddleware)
 
 # Register routes
 app.include_router(web.router)
 app.include_router(orders.router)
 app.include_router(chat.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -24,3 +24,13 @@ class ChatResponse(BaseModel):
     should_submit: Optional[bool] = Field(default=False, description="Whether to submit order")
     show_form: Optional[bool] = Field(default=False, description="Whether to trigger the UI form")
     meta: Optional[Dict[str, Any]] = Field(default=None, description="Metadata for frontend actions")
+
+
+class StructuredReply(BaseModel):
+    """
+    Schema for structured (JSON mode) LLM replies.
+    """
+    reply: str = Field(default="", description="Message shown to the user")
+    updates: Dict[str, Any] = Field(default_factory=dict, description="Newly collected order fields")
+    show_form: bool = Field(default=False, description="Whether to trigger the UI form")
+    submit_order: bool = Field(default=False, description="Whether the user confirmed the order")
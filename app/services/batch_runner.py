@@ -0,0 +1,251 @@
+"""
+Batch Inquiry Runner Module
+
+Pre-qualifies a backlog of inbound inquiries (CSV or NDJSON) with the
+same OrderAgent logic as the chat, writing extracted slots, matched
+product and quote per inquiry to an NDJSON file.
+
+The output file doubles as the checkpoint: a rerun skips inquiries
+already written, so a crashed run resumes where it stopped.
+
+Usage:
+    python -m app.services.batch_runner inquiries.csv --output results.ndjson [--concurrency 16]
+"""
+from typing import Any, Dict, Iterator, Optional, Set
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Fields tried, in order, for the inquiry text and its ID
+TEXT_FIELDS = ("message", "text", "body", "inquiry")
+ID_FIELDS = ("id", "inquiry_id", "message_id")
+
+
+def read_inquiries(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream inquiries from a CSV or NDJSON file.
+
+    Args:
+        path: Input file (.csv, or .ndjson/.jsonl)
+
+    Yields:
+        Dictionaries with "id", "text" and the original row under "row"
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for line_number, row in enumerate(rows, start=1):
+            text = next((row[field] for field in TEXT_FIELDS if row.get(field)), None)
+            row_id = next((str(row[field]) for field in ID_FIELDS if row.get(field)), str(line_number))
+            yield {"id": row_id, "text": text, "row": row}
+
+
+def load_checkpoint(output_path: str) -> Set[str]:
+    """
+    Get the inquiry IDs already written to the output file.
+
+    A torn last line from a crash is truncated so appends stay valid.
+
+    Args:
+        output_path: NDJSON output file
+
+    Returns:
+        Set of completed inquiry IDs
+    """
+    done: Set[str] = set()
+    if not os.path.exists(output_path):
+        return done
+
+    valid_bytes = 0
+    with open(output_path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(line)["id"])
+            except (ValueError, KeyError):
+                break
+            valid_bytes += len(line)
+    if valid_bytes < os.path.getsize(output_path):
+        logger.warning(f"Truncating incomplete record at the end of {output_path}")
+        with open(output_path, "r+b") as f:
+            f.truncate(valid_bytes)
+    return done
+
+
+class BatchRunner:
+    """
+    Runs inquiries through the agent with bounded concurrency.
+
+    A fixed pool of workers pulls from a bounded queue, so memory stays
+    flat no matter how many rows the input has.
+    """
+
+    def __init__(self, agent, concurrency: int = 16, progress_every: int = 1000):
+        """
+        Initialize the runner.
+
+        Args:
+            agent: OrderAgent instance
+            concurrency: Inquiries processed at the same time (LLM requests in flight)
+            progress_every: Log throughput every this many rows
+        """
+        self.agent = agent
+        self.concurrency = concurrency
+        self.progress_every = progress_every
+        self.processed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.duplicates = 0
+
+    async def process(self, inquiry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Pre-qualify one inquiry.
+
+        Args:
+            inquiry: Inquiry from read_inquiries
+
+        Returns:
+            Output record, or None if the agent failed (retried on resume)
+        """
+        from app.core.state_manager import state_manager
+
+        session_id = f"batch-{inquiry['id']}"
+        started = time.perf_counter()
+        try:
+            result = await self.agent.process_message(
+                session_id=session_id,
+                user_text=inquiry["text"],
+                conversation_history=[{"role": "user", "content": inquiry["text"]}]
+            )
+            if result.get("error"):
+                return None
+
+            state = state_manager.get_state(session_id)
+            return {
+                "id": inquiry["id"],
+                "slots": {slot: value for slot, value in state.items() if value is not None},
+                "product": state.get("product_interest"),
+                "quote": (result.get("meta") or {}).get("quote"),
+                "show_form": result.get("show_form", False),
+                "reply": result.get("response_text"),
+                "ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+        finally:
+            state_manager.reset_state(session_id)
+
+    async def run(self, input_path: str, output_path: str) -> Dict[str, Any]:
+        """
+        Process every inquiry not yet in the output file.
+
+        Args:
+            input_path: CSV or NDJSON inquiries
+            output_path: NDJSON results (appended)
+
+        Returns:
+            Run summary
+        """
+        done = load_checkpoint(output_path)
+        if done:
+            logger.info(f"Resuming: {len(done)} inquiries already processed")
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 4)
+        started = time.perf_counter()
+
+        with open(output_path, "a", encoding="utf-8") as out:
+            async def worker():
+                while True:
+                    inquiry = await queue.get()
+                    if inquiry is None:
+                        return
+                    try:
+                        record = await self.process(inquiry)
+                    except Exception as e:
+                        logger.error(f"Inquiry {inquiry['id']} failed: {e}")
+                        record = None
+                    if record is None:
+                        self.failed += 1
+                        continue
+                    # Lines are buffered and flushed every progress_every records; a crash
+                    # can leave a torn last line, which load_checkpoint truncates on resume
+                    out.write(json.dumps(record, separators=(",", ":")) + "\n")
+                    self.processed += 1
+                    if self.processed % self.progress_every == 0:
+                        out.flush()
+                        rate = self.processed / (time.perf_counter() - started)
+                        logger.info(f"{self.processed} inquiries processed ({rate:.1f}/s, {self.failed} failed)")
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+
+            async def put(item):
+                # Wait for queue space, but fail fast if a worker died (else the queue never drains)
+                put_task = asyncio.ensure_future(queue.put(item))
+                while not put_task.done():
+                    running = [task for task in workers if not task.done()]
+                    await asyncio.wait([put_task, *running], return_when=asyncio.FIRST_COMPLETED)
+                    crashed = next((task for task in workers if task.done() and task.exception()), None)
+                    if crashed is not None:
+                        put_task.cancel()
+                        raise crashed.exception()
+
+            queued: Set[str] = set()
+            try:
+                for inquiry in read_inquiries(input_path):
+                    if inquiry["id"] in done or not inquiry["text"]:
+                        self.skipped += 1
+                        continue
+                    if inquiry["id"] in queued:
+                        # Repeated IDs would share a session and a checkpoint entry: keep the first
+                        self.duplicates += 1
+                        logger.warning(f"Skipping inquiry with duplicate id {inquiry['id']}")
+                        continue
+                    queued.add(inquiry["id"])
+                    await put(inquiry)
+                for _ in workers:
+                    await put(None)
+                await asyncio.gather(*workers)
+            finally:
+                # Interrupted runs stop writing before the file closes; resume picks up the rest
+                for task in workers:
+                    task.cancel()
+
+        elapsed = time.perf_counter() - started
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "duplicates": self.duplicates,
+            "seconds": round(elapsed, 2),
+            "per_second": round(self.processed / elapsed, 1) if elapsed else None
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-qualify a backlog of inquiries with the order agent")
+    parser.add_argument("input", help="CSV or NDJSON file of inquiries")
+    parser.add_argument("--output", default="data/batch_results.ndjson", help="NDJSON results (also the checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Inquiries in flight at once")
+    parser.add_argument("--verbose", action="store_true", help="Keep per-turn INFO logging")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if not args.verbose:
+        # Per-turn agent logging costs more than the work itself at 100k rows
+        logging.getLogger("app").setLevel(logging.WARNING)
+        logger.setLevel(logging.INFO)
+
+    from app.api.dependencies import get_order_agent
+    # --concurrency already paces model calls; a busy reply would only be recorded as a skipped row
+    runner = BatchRunner(get_order_agent(llm_budget=False), concurrency=args.concurrency)
+    summary = asyncio.run(runner.run(args.input, args.output))
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,99 @@
+"""
+Request Coalescing Module
+
+Provides single-flight execution of identical concurrent async calls.
+"""
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Build a stable fingerprint for a request.
+
+    Args:
+        parts: JSON-serializable request components
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _InFlightCall:
+    """A running call shared by every caller with the same key."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    The first caller starts the call; callers arriving while it is still
+    in flight await the same result. Nothing is cached once it completes.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in flight."""
+        self._inflight: Dict[str, _InFlightCall] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn once for all concurrent callers sharing key.
+
+        Args:
+            key: Request fingerprint
+            fn: Zero-argument coroutine factory performing the call
+
+        Returns:
+            Result of the shared call
+        """
+        call = self._inflight.get(key)
+        if call is None:
+            call = _InFlightCall(asyncio.ensure_future(fn()))
+            self._inflight[key] = call
+            call.task.add_done_callback(lambda task: self._finish(key, call))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+            logger.debug("Coalesced request %s (%d already waiting)", key[:12], call.waiters)
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            # Cancel the shared call only once nobody is waiting on it anymore
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _finish(self, key: str, call: _InFlightCall):
+        """Forget a completed call and mark its exception as retrieved."""
+        if self._inflight.get(key) is call:
+            del self._inflight[key]
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get coalescing counters.
+
+        Returns:
+            Dictionary of executed, coalesced and in-flight call counts
+        """
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight)
+        }
@@ -3,10 +3,13 @@ Groq API Service Module
 
 Handles all interactions with the Groq LLM API.
 """
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional
 import os
 import logging
-from groq import AsyncGroq
+
+from app.models.chat import StructuredReply
+from app.services.coalescing import SingleFlight, fingerprint
+from app.utils.parsers import parse_structured_reply
 
 logger = logging.getLogger(__name__)
 
@@ -16,19 +19,29 @@ class GroqService:
     Service for interacting with Groq API for LLM completions.
     """
     
-    def __init__(self, api_key: str = None, model: str = "llama-3.1-8b-instant"):
+    def __init__(
+        self, 
+        api_key: str = None, 
+        model: str = "llama-3.1-8b-instant", 
+        coalesce_requests: bool = True
+    ):
         """
         Initialize the Groq service.
         
         Args:
             api_key: Groq API key (defaults to env variable)
             model: Model to use for completions
+            coalesce_requests: Share one API call between identical concurrent prompts
         """
         self.api_key = api_key or os.getenv("GROQ_API_KEY")
         self.model = model
         self.client = None
+        self.coalesce_requests = coalesce_requests
+        self._single_flight = SingleFlight()
         
         if self.api_key:
+            # Imported here: the groq SDK (and httpx) dominates app import time
+            from groq import AsyncGroq
             self.client = AsyncGroq(api_key=self.api_key)
             logger.info(f"Groq service initialized with model: {self.model}")
         else:
@@ -38,7 +51,9 @@ class GroqService:
         self, 
         messages: List[Dict[str, str]], 
         temperature: float = 0.6, 
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        response_format: Optional[Dict[str, str]] = None,
+        stop: Optional[List[str]] = None
     ) -> str:
         """
         Get a completion from the Groq API.
@@ -47,6 +62,8 @@ class GroqService:
             messages: List of message dictionaries with 'role' and 'content'
             temperature: Sampling temperature (0-2)
             max_tokens: Maximum tokens in response
+            response_format: Optional response format (e.g. JSON mode)
+            stop: Optional stop sequences (excluded from the returned text)
             
         Returns:
             Response text from the LLM
@@ -57,22 +74,114 @@ class GroqService:
         if not self.client:
             raise Exception("Groq client not initialized. API key missing.")
         
+        if not self.coalesce_requests:
+            return await self._create_completion(messages, temperature, max_tokens, response_format, stop)
+        
+        key = fingerprint(self.model, messages, temperature, max_tokens, response_format, stop)
+        return await self._single_flight.do(
+            key,
+            lambda: self._create_completion(messages, temperature, max_tokens, response_format, stop)
+        )
+    
+    async def _create_completion(
+        self, 
+        messages: List[Dict[str, str]], 
+        temperature: float, 
+        max_tokens: int, 
+        response_format: Optional[Dict[str, str]],
+        stop: Optional[List[str]] = None
+    ) -> str:
+        """Perform a single Groq API call."""
+        request_kwargs = {}
+        if response_format:
+            request_kwargs["response_format"] = response_format
+        if stop:
+            request_kwargs["stop"] = stop
+        
         try:
             completion = await self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                **request_kwargs
             )
             
             response_text = completion.choices[0].message.content
-            logger.info(f"Groq completion successful ({len(response_text)} chars)")
+            logger.info("Groq completion successful (%d chars)", len(response_text))
             return response_text
             
         except Exception as e:
             logger.error(f"Groq API error: {e}", exc_info=True)
             raise
     
+    async def stream_completion(
+        self, 
+        messages: List[Dict[str, str]], 
+        temperature: float = 0.6, 
+        max_tokens: int = 500,
+        stop: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a completion from the Groq API as text deltas.
+        
+        Streams are never coalesced: each caller consumes its own.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens in response
+            stop: Optional stop sequences (excluded from the streamed text)
+            
+        Yields:
+            Text deltas as the model generates them
+        """
+        if not self.client:
+            raise Exception("Groq client not initialized. API key missing.")
+        
+        request_kwargs = {"stop": stop} if stop else {}
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                **request_kwargs
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        except Exception as e:
+            logger.error(f"Groq streaming error: {e}", exc_info=True)
+            raise
+    
+    async def get_structured_completion(
+        self, 
+        messages: List[Dict[str, str]], 
+        temperature: float = 0.6, 
+        max_tokens: int = 500
+    ) -> StructuredReply:
+        """
+        Get a JSON mode completion parsed into a typed reply.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens in response
+            
+        Returns:
+            StructuredReply with reply text, slot updates and actions
+        """
+        response_text = await self.get_completion(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"}
+        )
+        return parse_structured_reply(response_text)
+    
     def is_available(self) -> bool:
         """
         Check if the Groq service is available.
@@ -81,3 +190,12 @@ class GroqService:
             True if client is initialized, False otherwise
         """
         return self.client is not None
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get request coalescing metrics.
+        
+        Returns:
+            Dictionary of executed, coalesced and in-flight request counts
+        """
+        return self._single_flight.get_stats()
@@ -0,0 +1,335 @@
+"""
+LLM Routing Module
+
+Routes completions across several LLM backends based on observed
+latency, error rate and turn complexity, hedging slow requests to a
+second backend.
+"""
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+from collections import deque
+import asyncio
+import logging
+import time
+import weakref
+
+from app.models.chat import StructuredReply
+from app.utils.parsers import parse_structured_reply
+
+logger = logging.getLogger(__name__)
+
+# Latency assumed for a backend before it has served any request (seconds)
+DEFAULT_LATENCY = 1.0
+
+
+class BackendStats:
+    """Rolling latency and error window for one backend."""
+
+    def __init__(self, window: int = 50):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.errors: Deque[bool] = deque(maxlen=window)
+
+    def record(self, latency: float, error: bool = False):
+        self.latencies.append(latency)
+        self.errors.append(error)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+    @property
+    def error_rate(self) -> float:
+        return sum(self.errors) / len(self.errors) if self.errors else 0.0
+
+
+class LLMBackend:
+    """
+    A routable LLM service.
+
+    Tier is "fast" for small models and "large" for models better suited
+    to long or multi-part turns.
+    """
+
+    def __init__(self, name: str, service: Any, tier: str = "fast"):
+        """
+        Initialize the backend.
+
+        Args:
+            name: Backend name used in metrics
+            service: GroqService or OpenAICompatibleService
+            tier: "fast" or "large"
+        """
+        self.name = name
+        self.service = service
+        self.tier = tier
+        self.stats = BackendStats()
+
+    def score(self, complexity: str) -> float:
+        """
+        Expected cost of sending a turn here (lower is better).
+
+        Args:
+            complexity: "simple" or "complex"
+
+        Returns:
+            Score combining median latency, error rate and tier fit
+        """
+        latency = self.stats.percentile(0.5) or DEFAULT_LATENCY
+        score = latency * (1 + 4 * self.stats.error_rate)
+        preferred_tier = "large" if complexity == "complex" else "fast"
+        if self.tier != preferred_tier:
+            score *= 1.5
+        return score
+
+
+class LLMRouter:
+    """
+    Picks a backend per turn and hedges to a second one when the first is slow.
+
+    Exposes the same completion interface as GroqService, so OrderAgent
+    can use either.
+    """
+
+    def __init__(self, backends: List[LLMBackend], hedge_enabled: bool = True, hedge_min_delay: float = 0.75):
+        """
+        Initialize the router.
+
+        Args:
+            backends: Backends to route between (at least one)
+            hedge_enabled: Send a second request when the first exceeds its p95 latency
+            hedge_min_delay: Lower bound on the hedge delay in seconds
+        """
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = backends
+        self.hedge_enabled = hedge_enabled
+        self.hedge_min_delay = hedge_min_delay
+        self.hedged = 0
+        self.hedge_wins = 0
+        # Calls cancelled by the router because another backend answered first
+        self._hedge_losers: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        logger.info(f"LLM router initialized with backends: {[b.name for b in backends]}")
+
+    @staticmethod
+    def classify_complexity(messages: List[Dict[str, str]]) -> str:
+        """
+        Estimate how demanding a turn is.
+
+        Args:
+            messages: Prompt messages for the turn
+
+        Returns:
+            "complex" for long conversations or long user messages, else "simple"
+        """
+        user_messages = [m for m in messages if m.get("role") == "user"]
+        last_user = user_messages[-1]["content"] if user_messages else ""
+        if len(last_user.split()) > 40 or len(user_messages) > 8:
+            return "complex"
+        return "simple"
+
+    def rank_backends(self, complexity: str) -> List[LLMBackend]:
+        """
+        Order backends from best to worst for a turn.
+
+        Args:
+            complexity: "simple" or "complex"
+
+        Returns:
+            Backends sorted by score
+        """
+        return sorted(self.backends, key=lambda b: b.score(complexity))
+
+    async def get_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.6,
+        max_tokens: int = 500,
+        response_format: Optional[Dict[str, str]] = None,
+        stop: Optional[List[str]] = None
+    ) -> str:
+        """
+        Get a completion from the best available backend.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens in response
+            response_format: Optional response format (e.g. JSON mode)
+            stop: Optional stop sequences (excluded from the returned text)
+
+        Returns:
+            Response text from the first backend to answer
+
+        Raises:
+            Exception: The last backend error if every backend failed
+        """
+        complexity = self.classify_complexity(messages)
+        candidates = self.rank_backends(complexity)
+        request = (messages, temperature, max_tokens, response_format, stop)
+
+        primary = candidates[0]
+        pending = {asyncio.create_task(self._call(primary, *request)): primary}
+        remaining = candidates[1:]
+        last_error: Optional[BaseException] = None
+
+        try:
+            while pending:
+                hedge_delay = None
+                if self.hedge_enabled and remaining and len(pending) == 1:
+                    hedge_delay = max(self.hedge_min_delay, primary.stats.percentile(0.95) or DEFAULT_LATENCY)
+
+                done, _ = await asyncio.wait(pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    # Primary is past its p95: hedge with the next backend
+                    backend = remaining.pop(0)
+                    self.hedged += 1
+                    logger.info("Hedging LLM request to %s after %.2fs", backend.name, hedge_delay)
+                    pending[asyncio.create_task(self._call(backend, *request))] = backend
+                    continue
+
+                for task in done:
+                    backend = pending.pop(task)
+                    if task.exception() is None:
+                        if backend is not primary:
+                            self.hedge_wins += 1
+                        self._hedge_losers.update(pending)
+                        return task.result()
+                    last_error = task.exception()
+
+                if not pending and remaining:
+                    # Everything in flight failed: fail over to the next backend
+                    backend = remaining.pop(0)
+                    pending[asyncio.create_task(self._call(backend, *request))] = backend
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error
+
+    async def get_structured_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.6,
+        max_tokens: int = 500
+    ) -> StructuredReply:
+        """
+        Get a JSON mode completion parsed into a typed reply.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens in response
+
+        Returns:
+            StructuredReply with reply text, slot updates and actions
+        """
+        response_text = await self.get_completion(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"}
+        )
+        return parse_structured_reply(response_text)
+
+    async def stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.6,
+        max_tokens: int = 500,
+        stop: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a completion from the best available backend.
+        
+        Streams are not hedged; a backend that fails before its first
+        delta is skipped in favour of the next one.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens in response
+            stop: Optional stop sequences (excluded from the streamed text)
+            
+        Yields:
+            Text deltas as the model generates them
+            
+        Raises:
+            Exception: The last backend error if every backend failed
+        """
+        last_error: Optional[BaseException] = None
+        for backend in self.rank_backends(self.classify_complexity(messages)):
+            if not hasattr(backend.service, "stream_completion"):
+                continue
+            started = time.perf_counter()
+            streamed = False
+            try:
+                async for delta in backend.service.stream_completion(
+                    messages, temperature=temperature, max_tokens=max_tokens, stop=stop
+                ):
+                    streamed = True
+                    yield delta
+            except Exception as e:
+                backend.stats.record(time.perf_counter() - started, error=True)
+                if streamed:
+                    raise
+                last_error = e
+                continue
+            backend.stats.record(time.perf_counter() - started)
+            return
+        raise last_error or RuntimeError("No backend supports streaming")
+    
+    async def _call(self, backend: LLMBackend, messages, temperature, max_tokens, response_format, stop) -> str:
+        """Call one backend and record its latency and outcome."""
+        started = time.perf_counter()
+        try:
+            result = await backend.service.get_completion(
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                response_format=response_format,
+                stop=stop
+            )
+        except asyncio.CancelledError:
+            # A hedge loser was at least this slow; other cancellations (the
+            # client went away) say nothing about the backend
+            if asyncio.current_task() in self._hedge_losers:
+                backend.stats.record(time.perf_counter() - started)
+            raise
+        except Exception:
+            backend.stats.record(time.perf_counter() - started, error=True)
+            raise
+        backend.stats.record(time.perf_counter() - started)
+        return result
+
+    def is_available(self) -> bool:
+        """
+        Check if any backend is available.
+
+        Returns:
+            True if at least one backend is usable
+        """
+        return any(b.service.is_available() for b in self.backends)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get routing metrics.
+
+        Returns:
+            Per-backend latency/error stats plus hedging counters
+        """
+        backends = {}
+        for b in self.backends:
+            p50, p95 = b.stats.percentile(0.5), b.stats.percentile(0.95)
+            backends[b.name] = {
+                "model": b.service.model,
+                "tier": b.tier,
+                "samples": len(b.stats.latencies),
+                "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                "error_rate": round(b.stats.error_rate, 3)
+            }
+            if hasattr(b.service, "get_stats"):
+                backends[b.name].update(b.service.get_stats())
+        return {"backends": backends, "hedged": self.hedged, "hedge_wins": self.hedge_wins}
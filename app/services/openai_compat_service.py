@@ -0,0 +1,165 @@
+"""
+OpenAI-Compatible API Service Module
+
+Handles chat completions against any OpenAI-compatible endpoint
+(vLLM, llama.cpp server, Ollama, or the local stub server).
+"""
+from typing import AsyncIterator, List, Dict, Optional
+import json
+import logging
+import httpx
+
+from app.models.chat import StructuredReply
+from app.utils.parsers import parse_structured_reply
+
+logger = logging.getLogger(__name__)
+
+
+class OpenAICompatibleService:
+    """
+    Service for chat completions from an OpenAI-compatible server.
+    """
+
+    def __init__(self, base_url: str, model: str, api_key: str = None, timeout: float = 30.0):
+        """
+        Initialize the service.
+
+        Args:
+            base_url: API base URL including version prefix (e.g. http://127.0.0.1:8001/v1)
+            model: Model to use for completions
+            api_key: Optional bearer token
+            timeout: Request timeout in seconds
+        """
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.AsyncClient(base_url=self.base_url, headers=headers, timeout=timeout)
+        logger.info(f"OpenAI-compatible service initialized: {self.base_url} ({self.model})")
+
+    async def get_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.6,
+        max_tokens: int = 500,
+        response_format: Optional[Dict[str, str]] = None,
+        stop: Optional[List[str]] = None
+    ) -> str:
+        """
+        Get a completion from the server.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens in response
+            response_format: Optional response format (e.g. JSON mode)
+            stop: Optional stop sequences (excluded from the returned text)
+
+        Returns:
+            Response text from the LLM
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if response_format:
+            payload["response_format"] = response_format
+        if stop:
+            payload["stop"] = stop
+
+        try:
+            response = await self.client.post("/chat/completions", json=payload)
+            response.raise_for_status()
+            response_text = response.json()["choices"][0]["message"]["content"]
+            logger.info("%s completion successful (%d chars)", self.base_url, len(response_text))
+            return response_text
+        except Exception as e:
+            logger.error(f"OpenAI-compatible API error ({self.base_url}): {e}")
+            raise
+
+    async def stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.6,
+        max_tokens: int = 500,
+        stop: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a completion from the server (server-sent events).
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens in response
+            stop: Optional stop sequences (excluded from the streamed text)
+            
+        Yields:
+            Text deltas as the model generates them
+            
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        if stop:
+            payload["stop"] = stop
+        
+        try:
+            async with self.client.stream("POST", "/chat/completions", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or [{}]
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+        except Exception as e:
+            logger.error(f"OpenAI-compatible streaming error ({self.base_url}): {e}")
+            raise
+    
+    async def get_structured_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.6,
+        max_tokens: int = 500
+    ) -> StructuredReply:
+        """
+        Get a JSON mode completion parsed into a typed reply.
+
+        Args:
+            messages: List of message dictionaries with 'role' and 'content'
+            temperature: Sampling temperature (0-2)
+            max_tokens: Maximum tokens in response
+
+        Returns:
+            StructuredReply with reply text, slot updates and actions
+        """
+        response_text = await self.get_completion(
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"}
+        )
+        return parse_structured_reply(response_text)
+
+    def is_available(self) -> bool:
+        """
+        Check if the service is configured.
+
+        Returns:
+            True (the server is only probed on first request)
+        """
+        return True
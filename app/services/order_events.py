@@ -0,0 +1,275 @@
+"""
+Order Event Dispatcher Module
+
+Background delivery of outbox events to downstream HTTP sinks. Each sink
+receives batches in order as POST {"events": [...]}; a batch is retried
+with exponential backoff until the sink answers 2xx, so delivery is
+at-least-once and receivers should de-duplicate by event_id.
+
+Nothing here runs on the request path: storage commits only wake the
+dispatcher task.
+"""
+from typing import Any, Callable, Dict, List, Optional, TYPE_CHECKING
+import asyncio
+import contextvars
+import hashlib
+import hmac
+import logging
+import random
+import time
+
+from app.db.outbox import OrderOutbox
+from app.utils.serialization import dumps
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class _SinkState:
+    """Delivery progress and backoff of one sink."""
+    __slots__ = ("url", "delivered", "batches", "failures", "consecutive_failures", "retry_at", "last_error")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.delivered = 0
+        self.batches = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.retry_at = 0.0
+        self.last_error: Optional[str] = None
+
+
+class OrderEventDispatcher:
+    """
+    Drains the outbox to every configured sink.
+
+    Sinks are independent: a failing sink backs off without delaying the
+    others, and picks up from its own cursor once it recovers.
+    """
+
+    def __init__(
+        self,
+        outbox: OrderOutbox,
+        sinks: List[str],
+        batch_size: int = 100,
+        poll_interval: float = 1.0,
+        max_backoff: float = 60.0,
+        timeout: float = 5.0,
+        secret: Optional[str] = None,
+        order_exists: Optional[Callable[[str], bool]] = None,
+        stale_after: float = 30.0
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            outbox: Event outbox to drain
+            sinks: Sink URLs
+            batch_size: Maximum events per request
+            poll_interval: Seconds between checks when not woken by a commit
+            max_backoff: Retry delay cap in seconds
+            timeout: HTTP request timeout in seconds
+            secret: Optional key for the X-Signature HMAC header
+            order_exists: Returns True if an order ID is committed; used to
+                resolve stale unconfirmed events (never resolved if None)
+            stale_after: Seconds before an unconfirmed event is resolved
+        """
+        self.outbox = outbox
+        self.sinks = {url: _SinkState(url) for url in sinks}
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.secret = secret
+        self.order_exists = order_exists
+        self.stale_after = stale_after
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+
+    def start(self):
+        """Start the background dispatcher on the running event loop."""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self.outbox.on_confirm = self.notify
+        # Empty context: the dispatcher's logs belong to no request
+        self._task = contextvars.Context().run(asyncio.create_task, self._run())
+        logger.info(f"Order event dispatcher started for {len(self.sinks)} sinks")
+
+    def notify(self):
+        """Wake the dispatcher (safe to call from any thread)."""
+        if self._loop is not None and self._wake is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                # Loop already closed during shutdown; the next start delivers the events
+                pass
+
+    async def stop(self, drain_timeout: float = 5.0):
+        """
+        Make a last delivery attempt and stop.
+
+        Args:
+            drain_timeout: Seconds allowed for the final delivery
+        """
+        if self._task is None or self._task.done():
+            return
+        self._stopping = True
+        self._wake.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Order event dispatcher stopped with undelivered events (kept in the outbox)")
+        self.outbox.on_confirm = None
+
+    async def _run(self):
+        # Imported here: httpx is only needed once sinks are configured, not at app import
+        import httpx
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            while True:
+                self._wake.clear()
+                await self._resolve_stale()
+                await asyncio.gather(*(self._drain(client, sink) for sink in self.sinks.values()))
+                if self._stopping:
+                    break
+                try:
+                    await asyncio.to_thread(self.outbox.purge, list(self.sinks))
+                except Exception as e:
+                    logger.warning(f"Outbox purge failed: {e}")
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self._next_wait())
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _resolve_stale(self):
+        # An event whose confirm or discard failed would hold back every later one
+        if self.order_exists is None:
+            return
+        try:
+            await asyncio.to_thread(self.outbox.recover, self.order_exists, self.stale_after)
+        except Exception as e:
+            logger.warning(f"Resolving stale outbox events failed: {e}")
+
+    def _next_wait(self) -> float:
+        # Sleep until the next poll, or earlier if a backing-off sink becomes due
+        now = time.monotonic()
+        retries = [sink.retry_at - now for sink in self.sinks.values() if sink.retry_at > now]
+        return max(0.01, min([self.poll_interval] + retries))
+
+    async def _drain(self, client: "httpx.AsyncClient", sink: _SinkState):
+        """Deliver batches to one sink until it is caught up or fails."""
+        if sink.retry_at > time.monotonic() and not self._stopping:
+            return
+        while True:
+            try:
+                batch = await asyncio.to_thread(self.outbox.pending, sink.url, self.batch_size)
+                if not batch:
+                    return
+                await self._post(client, sink.url, [event for _, event in batch])
+            except Exception as e:
+                sink.failures += 1
+                sink.consecutive_failures += 1
+                sink.last_error = (str(e) or type(e).__name__).splitlines()[0]
+                # Full jitter, so sinks recovering together are not hit all at once
+                backoff = min(self.max_backoff, 0.5 * 2 ** min(sink.consecutive_failures, 16))
+                sink.retry_at = time.monotonic() + random.uniform(backoff / 2, backoff)
+                logger.warning(
+                    f"Delivering order events to {sink.url} failed "
+                    f"(attempt {sink.consecutive_failures}): {sink.last_error}"
+                )
+                return
+            try:
+                await asyncio.to_thread(self.outbox.ack, sink.url, batch[-1][0])
+            except Exception as e:
+                # Delivered but not recorded: the batch is sent again (at-least-once)
+                logger.warning(f"Recording delivery to {sink.url} failed: {e}")
+                return
+            sink.delivered += len(batch)
+            sink.batches += 1
+            sink.consecutive_failures = 0
+            sink.retry_at = 0.0
+            if len(batch) < self.batch_size:
+                return
+
+    async def _post(self, client: "httpx.AsyncClient", url: str, events: List[Dict[str, Any]]):
+        body = dumps({"events": events})
+        headers = {"Content-Type": "application/json"}
+        if self.secret:
+            signature = hmac.new(self.secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+            headers["X-Signature"] = f"sha256={signature}"
+        response = await client.post(url, content=body, headers=headers)
+        response.raise_for_status()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get delivery metrics.
+
+        Returns:
+            Per-sink delivered events, batches, failures, backlog and last error
+        """
+        now = time.monotonic()
+        return {
+            sink.url: {
+                "delivered": sink.delivered,
+                "batches": sink.batches,
+                "failures": sink.failures,
+                "backlog": self.outbox.backlog(sink.url),
+                "retry_in": round(sink.retry_at - now, 1) if sink.retry_at > now else None,
+                "last_error": sink.last_error
+            }
+            for sink in self.sinks.values()
+        }
+
+
+# Global dispatcher, created on first use when event sinks are configured
+_order_dispatcher = None
+
+
+def get_order_dispatcher() -> Optional[OrderEventDispatcher]:
+    """
+    Get the global order event dispatcher.
+
+    Returns:
+        OrderEventDispatcher, or None if no event sinks are configured
+    """
+    global _order_dispatcher
+    if _order_dispatcher is None:
+        from app.config.settings import settings
+        from app.db.outbox import get_order_outbox
+        from app.db.storage import get_order_storage
+        outbox = get_order_outbox()
+        if outbox is None:
+            return None
+        _order_dispatcher = OrderEventDispatcher(
+            outbox,
+            settings.order_event_sinks,
+            batch_size=settings.outbox_batch_size,
+            poll_interval=settings.outbox_poll_interval,
+            max_backoff=settings.outbox_max_backoff,
+            timeout=settings.outbox_request_timeout,
+            secret=settings.order_event_secret,
+            order_exists=get_order_storage().has_order,
+            stale_after=settings.outbox_stale_after
+        )
+    return _order_dispatcher
+
+
+async def start_order_dispatcher():
+    """Resolve events left over from a crash, then start delivering (no-op without sinks)."""
+    dispatcher = get_order_dispatcher()
+    if dispatcher is None:
+        return
+    await asyncio.to_thread(dispatcher.outbox.recover, dispatcher.order_exists)
+    dispatcher.start()
+
+
+async def shutdown_order_dispatcher():
+    """Make a final delivery attempt; undelivered events stay in the outbox."""
+    if _order_dispatcher is not None:
+        await _order_dispatcher.stop()
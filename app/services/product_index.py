@@ -0,0 +1,316 @@
+"""
+Product Vector Index Module
+
+Local product matching for loose descriptions ("big comfy couch",
+"wooden dining thing") without an LLM call. Catalog names, descriptions
+and keywords are embedded as hashed word and character n-gram TF-IDF
+vectors; queries are matched by cosine similarity in one matrix product.
+
+The index is built from the catalog (ahead of time or at server
+startup) and stored as .npy files that are memory-mapped on load.
+Requires the optional numpy package.
+
+Usage:
+    python -m app.services.product_index
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+DEFAULT_DIM = 1 << 14
+CHAR_NGRAMS = (3, 4)
+# Names and keywords say more about a product than its marketing copy
+FIELD_WEIGHTS = {"name": 3, "keywords": 2, "description": 1}
+STOPWORDS = frozenset(
+    "a an and any for from i in is it me my of on or our please some that the this to with want need like "
+    "looking get buy order would you your thing something".split()
+)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def is_available() -> bool:
+    """
+    Check if local product matching is supported in this environment.
+
+    Returns:
+        True if numpy is installed
+    """
+    return np is not None
+
+
+def _features(text: str) -> Counter:
+    # Whole words plus character n-grams of each word, so "wooden" still meets "wood"
+    features = Counter()
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        features["w:" + token] += 1
+        padded = f" {token} "
+        for n in CHAR_NGRAMS:
+            for i in range(len(padded) - n + 1):
+                features["c:" + padded[i:i + n]] += 1
+    return features
+
+
+def _hash_features(features: Counter, dim: int) -> Dict[int, float]:
+    # Signed hashing: collisions cancel out on average instead of piling up
+    buckets: Dict[int, float] = {}
+    for feature, count in features.items():
+        h = zlib.crc32(feature.encode("utf-8"))
+        sign = 1.0 if h & 0x80000000 else -1.0
+        bucket = h % dim
+        buckets[bucket] = buckets.get(bucket, 0.0) + sign * (1.0 + math.log(count))
+    return buckets
+
+
+def _product_text_features(product: Dict[str, Any]) -> Counter:
+    features = Counter()
+    fields = {
+        "name": product["name"],
+        "keywords": " ".join(product.get("keywords", [])),
+        "description": product.get("description", "")
+    }
+    for field, text in fields.items():
+        for feature, count in _features(text).items():
+            features[feature] += count * FIELD_WEIGHTS[field]
+    return features
+
+
+def catalog_fingerprint(catalog: List[Dict[str, Any]], dim: int = DEFAULT_DIM) -> str:
+    """
+    Get a fingerprint of the indexed catalog content.
+
+    Args:
+        catalog: Product catalog entries
+        dim: Vector dimension
+
+    Returns:
+        Hex digest that changes whenever the index must be rebuilt
+    """
+    content = [
+        {"name": p["name"], "keywords": p.get("keywords", []), "description": p.get("description", "")}
+        for p in catalog
+    ]
+    payload = json.dumps([INDEX_VERSION, dim, CHAR_NGRAMS, FIELD_WEIGHTS, content], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ProductIndex:
+    """
+    Cosine-similarity index over catalog products.
+
+    vectors holds one L2-normalised row per product; idf weights are
+    applied to queries the same way they were applied to products.
+    """
+
+    def __init__(self, names: List[str], vectors, idf, fingerprint: str):
+        """
+        Initialize the index.
+
+        Args:
+            names: Product names, one per row of vectors
+            vectors: float32 matrix (products x dim), possibly memory-mapped
+            idf: float32 vector (dim) of inverse document frequencies
+            fingerprint: Catalog fingerprint the index was built from
+        """
+        self.names = names
+        self.vectors = vectors
+        self.idf = idf
+        self.fingerprint = fingerprint
+        self.dim = vectors.shape[1]
+
+    @classmethod
+    def build(cls, catalog: List[Dict[str, Any]], dim: int = DEFAULT_DIM) -> "ProductIndex":
+        """
+        Build the index from the product catalog.
+
+        Args:
+            catalog: Product catalog entries (name, description, keywords)
+            dim: Hashed vector dimension
+
+        Returns:
+            ProductIndex
+        """
+        if np is None:
+            raise RuntimeError("Product matching requires numpy (pip install numpy)")
+
+        tf = np.zeros((len(catalog), dim), dtype=np.float32)
+        for row, product in enumerate(catalog):
+            for bucket, weight in _hash_features(_product_text_features(product), dim).items():
+                tf[row, bucket] = weight
+
+        # Smoothed IDF: features shared by every product carry little weight
+        df = np.count_nonzero(tf, axis=0)
+        idf = (np.log((1 + len(catalog)) / (1 + df)) + 1.0).astype(np.float32)
+        vectors = tf * idf
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1.0, norms)
+
+        return cls([p["name"] for p in catalog], vectors, idf, catalog_fingerprint(catalog, dim))
+
+    def save(self, index_dir: str):
+        """
+        Write the index files (vectors-<fingerprint>.npy, idf-<fingerprint>.npy, meta.json).
+
+        Files are never rewritten in place: other processes may have the
+        current ones memory-mapped, and truncating a mapped file crashes
+        them with SIGBUS. Each file is written under a temporary name and
+        renamed, and meta.json, renamed last, switches readers over.
+
+        Args:
+            index_dir: Target directory
+        """
+        os.makedirs(index_dir, exist_ok=True)
+        arrays = {"vectors": np.ascontiguousarray(self.vectors), "idf": self.idf}
+        for name, array in arrays.items():
+            path = os.path.join(index_dir, f"{name}-{self.fingerprint}.npy")
+            tmp_path = f"{path}.tmp-{os.getpid()}"
+            with open(tmp_path, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp_path, path)
+        meta_path = os.path.join(index_dir, "meta.json")
+        tmp_path = f"{meta_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "fingerprint": self.fingerprint, "names": self.names}, f, indent=2)
+        os.replace(tmp_path, meta_path)
+        # Unlinking is safe for readers still mapping an old index: the data lives until they unmap it
+        current = {f"{name}-{self.fingerprint}.npy" for name in arrays}
+        for entry in os.listdir(index_dir):
+            if entry.endswith(".npy") and entry not in current:
+                try:
+                    os.remove(os.path.join(index_dir, entry))
+                except OSError:
+                    pass
+
+    @classmethod
+    def load(cls, index_dir: str) -> Optional["ProductIndex"]:
+        """
+        Memory-map an index written by save().
+
+        Args:
+            index_dir: Index directory
+
+        Returns:
+            ProductIndex, or None if no complete index is there
+        """
+        meta_path = os.path.join(index_dir, "meta.json")
+        if np is None or not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get("version") != INDEX_VERSION:
+                return None
+            fingerprint = meta["fingerprint"]
+            vectors = np.load(os.path.join(index_dir, f"vectors-{fingerprint}.npy"), mmap_mode="r")
+            idf = np.load(os.path.join(index_dir, f"idf-{fingerprint}.npy"), mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load product index from {index_dir}: {e}")
+            return None
+        return cls(meta["names"], vectors, idf, meta["fingerprint"])
+
+    def _embed(self, query: str):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for bucket, weight in _hash_features(_features(query), self.dim).items():
+            vector[bucket] = weight
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[str, float]]:
+        """
+        Find the products most similar to a description.
+
+        Args:
+            query: Free-text product description
+            k: Number of results
+
+        Returns:
+            (product name, cosine score) pairs, best first
+        """
+        scores = self.vectors @ self._embed(query)
+        k = min(k, len(self.names))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.names[i], float(scores[i])) for i in top]
+
+    def resolve(self, query: str, min_score: float, min_margin: float) -> Optional[str]:
+        """
+        Map a description to a single product when the match is clear.
+
+        Args:
+            query: Free-text product description
+            min_score: Minimum cosine score of the best match
+            min_margin: Minimum lead of the best match over the runner-up
+
+        Returns:
+            Product name, or None if nothing matches or the match is ambiguous
+        """
+        results = self.search(query, k=2)
+        if not results or results[0][1] < min_score:
+            return None
+        if len(results) > 1 and results[0][1] - results[1][1] < min_margin:
+            return None
+        return results[0][0]
+
+
+# Global index, loaded or built on first use (the server does it at startup)
+_product_index = None
+_product_index_lock = threading.Lock()
+
+
+def get_product_index() -> Optional[ProductIndex]:
+    """
+    Get the product index for the current catalog.
+
+    Loads the stored index when it matches the catalog, otherwise builds
+    and stores a fresh one.
+
+    Returns:
+        ProductIndex, or None if numpy is not installed
+    """
+    global _product_index
+    if np is None:
+        return None
+    if _product_index is not None:
+        return _product_index
+    with _product_index_lock:
+        if _product_index is not None:
+            return _product_index
+        from app.config.settings import settings
+        index = ProductIndex.load(settings.product_index_dir)
+        if index is None or index.fingerprint != catalog_fingerprint(settings.product_catalog):
+            index = ProductIndex.build(settings.product_catalog)
+            try:
+                index.save(settings.product_index_dir)
+                logger.info(f"Built product index for {len(index.names)} products in {settings.product_index_dir}")
+            except OSError as e:
+                logger.warning(f"Could not store product index: {e}")
+        _product_index = index
+    return _product_index
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if not is_available():
+        raise SystemExit("Product matching requires numpy (pip install numpy)")
+    from app.config.settings import settings
+    built = ProductIndex.build(settings.product_catalog)
+    built.save(settings.product_index_dir)
+    print(f"Wrote index of {len(built.names)} products ({built.dim} dims) to {settings.product_index_dir}")
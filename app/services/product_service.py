@@ -3,13 +3,29 @@ Product Catalog Service Module
 
 Handles product catalog management and search functionality.
 """
-from typing import List
+from typing import List, Optional, Dict, Any
 import logging
-from app.config.settings import settings
 
 logger = logging.getLogger(__name__)
 
 
+def parse_quantity(value: Any) -> Optional[int]:
+    """
+    Read an order quantity from loosely typed input (session state, LLM output).
+    
+    Args:
+        value: Quantity as given
+        
+    Returns:
+        Whole number of units (at least 1), or None if the value is not usable
+    """
+    try:
+        quantity = int(value)
+    except (TypeError, ValueError):
+        return None
+    return quantity if quantity >= 1 else None
+
+
 class ProductService:
     """
     Service for managing product catalog and product-related operations.
@@ -17,6 +33,7 @@ class ProductService:
     
     def __init__(self):
         """Initialize the product service with catalog from settings."""
+        from app.config.settings import settings
         self.products = settings.known_products
         self.catalog = settings.product_catalog
         logger.info(f"Product service initialized with {len(self.products)} products")
@@ -51,7 +68,7 @@ class ProductService:
         """
         keyword = keyword.lower()
         matching = [p for p in self.products if keyword in p.lower()]
-        logger.info(f"Product search '{keyword}': found {len(matching)} matches")
+        logger.info("Product search '%s': found %d matches", keyword, len(matching))
         return matching
     
     def normalize_product_name(self, user_input: str) -> str:
@@ -76,9 +93,74 @@ class ProductService:
             if user_input_lower in product.lower() or product.lower() in user_input_lower:
                 return product
         
+        # Try the vector index for loose descriptions
+        matched = self.match_description(user_input)
+        if matched:
+            return matched
+        
         # Return original if no match
         return user_input
     
+    def match_description(self, description: str) -> Optional[str]:
+        """
+        Resolve a loose product description to one catalog product.
+        
+        Args:
+            description: Free-text description (e.g. "wooden dining thing")
+            
+        Returns:
+            Product name, or None if numpy is missing or no single product clearly matches
+        """
+        # Imported here: the index needs numpy, which most requests never touch
+        from app.config.settings import settings
+        from app.services.product_index import get_product_index
+        index = get_product_index()
+        if index is None:
+            return None
+        return index.resolve(
+            description,
+            min_score=settings.product_match_min_score,
+            min_margin=settings.product_match_min_margin
+        )
+    
+    def get_price(self, product_name: str) -> Optional[float]:
+        """
+        Get the unit price of a product.
+        
+        Args:
+            product_name: Catalog product name
+            
+        Returns:
+            Unit price or None if the product is not in the catalog
+        """
+        for product in self.catalog:
+            if product["name"] == product_name:
+                return product["price"]
+        return None
+    
+    def calculate_quote(self, product_name: str, quantity: Any) -> Optional[Dict[str, Any]]:
+        """
+        Calculate a price quote for a product and quantity.
+        
+        Args:
+            product_name: Catalog product name
+            quantity: Number of units
+            
+        Returns:
+            Quote dictionary or None if product or quantity is not usable
+        """
+        unit_price = self.get_price(product_name)
+        quantity = parse_quantity(quantity)
+        if unit_price is None or quantity is None:
+            return None
+        
+        return {
+            "product": product_name,
+            "unit_price": unit_price,
+            "quantity": quantity,
+            "total": unit_price * quantity
+        }
+    
     def is_valid_product(self, product_name: str) -> bool:
         """
         Check if a product name is valid.
@@ -90,3 +172,20 @@ class ProductService:
             True if product exists in catalog
         """
         return product_name in self.products
+
+
+# Global product service, created on first use
+_product_service = None
+
+
+def get_product_service() -> ProductService:
+    """
+    Get or create the global product service.
+    
+    Returns:
+        ProductService instance
+    """
+    global _product_service
+    if _product_service is None:
+        _product_service = ProductService()
+    return _product_service
@@ -52,6 +52,84 @@ document.addEventListener("DOMContentLoaded", () => {
     chatBody.scrollTop = chatBody.scrollHeight;
   }
 
+  /* --- Transport: WebSocket with HTTP fallback --- */
+  let socket = null;
+  const pendingTurns = []; // resolvers for turns sent over the socket, in order
+  let streamDiv = null; // bubble showing the reply while it streams
+
+  function connectSocket() {
+    if (!("WebSocket" in window)) return;
+    const scheme = window.location.protocol === "https:" ? "wss" : "ws";
+    socket = new WebSocket(
+      `${scheme}://${window.location.host}/api/chat/ws?session_id=${encodeURIComponent(sessionId)}`
+    );
+
+    socket.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      if (data.type === "delta") {
+        if (!streamDiv) {
+          streamDiv = appendMessage("", false);
+        }
+        streamDiv.textContent += data.text;
+        scrollToBottom();
+      } else if (data.type === "reply") {
+        clearStream();
+        const turn = pendingTurns.shift();
+        if (turn) turn.resolve(data);
+      } else if (data.type === "order_confirmed") {
+        // Server push: order is durably stored
+        appendMessage(data.text, false);
+        scrollToBottom();
+      } else if (data.type === "order_failed") {
+        // Server push after the turn was answered, so not matched to a pending turn
+        appendMessage("Error: " + data.detail, false);
+        scrollToBottom();
+      } else if (data.type === "error") {
+        clearStream();
+        const turn = pendingTurns.shift();
+        if (turn) turn.reject(new Error(data.detail));
+        else appendMessage("Error: " + data.detail, false);
+      }
+    };
+
+    socket.onclose = () => {
+      clearStream();
+      while (pendingTurns.length) {
+        pendingTurns.shift().reject(new Error("Connection closed"));
+      }
+      socket = null;
+    };
+  }
+
+  function clearStream() {
+    if (streamDiv) {
+      streamDiv.remove();
+      streamDiv = null;
+    }
+  }
+
+  // Send one chat turn; resolves with the same payload as POST /api/chat
+  async function sendTurn(message) {
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      return new Promise((resolve, reject) => {
+        pendingTurns.push({ resolve, reject });
+        socket.send(JSON.stringify({ message: message }));
+      });
+    }
+    if (!socket) connectSocket(); // reconnect for the next turn
+
+    const response = await fetch("/api/chat", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ message: message, session_id: sessionId }),
+    });
+    if (!response.ok)
+      throw new Error(`HTTP error! status: ${response.status}`);
+    return response.json();
+  }
+
+  connectSocket();
+
   async function sendMessage() {
     const text = chatInput.value.trim();
     if (!text) return;
@@ -61,13 +139,7 @@ document.addEventListener("DOMContentLoaded", () => {
     scrollToBottom(); // User message always goes to bottom
 
     try {
-      const response = await fetch("/api/chat", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ message: text, session_id: sessionId }),
-      });
-
-      const data = await response.json();
+      const data = await sendTurn(text);
 
       // Handle Actions
       let msgDiv = null;
@@ -220,16 +292,7 @@ document.addEventListener("DOMContentLoaded", () => {
       appendMessage("📝 Form Submitted", true);
       scrollToBottom();
 
-      const response = await fetch("/api/chat", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ message: jsonMsg, session_id: sessionId }),
-      });
-
-      if (!response.ok)
-        throw new Error(`HTTP error! status: ${response.status}`);
-
-      const data = await response.json();
+      const data = await sendTurn(jsonMsg);
 
       let msgDiv = null;
       if (data.response) {
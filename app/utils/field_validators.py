@@ -1,6 +1,14 @@
 import re
 from typing import Dict, Any
 
+EMAIL_PATTERN = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+
+def is_valid_email(email: str) -> bool:
+    return re.fullmatch(EMAIL_PATTERN, email) is not None
+
+def is_valid_phone(phone: str) -> bool:
+    return len(re.sub(r'\D', '', phone)) >= 10
+
 class ValidationResult:
     def __init__(self):
         self.valid_fields = {}
@@ -39,15 +47,15 @@ def validate_order_data(data: Dict[str, Any]) -> ValidationResult:
 
     # Email
     email = str(data.get("email", "")).strip()
-    if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
+    if not is_valid_email(email):
         result.add_invalid("email", email, "Invalid email format")
     else:
         result.add_valid("email", email)
 
     # Phone (Strict Check)
     phone = str(data.get("phone", ""))
-    digits = re.sub(r'\D', '', phone)
-    if len(digits) < 10:
+    if not is_valid_phone(phone):
+        digits = re.sub(r'\D', '', phone)
         result.add_invalid("phone", phone, f"Must be at least 10 digits (found {len(digits)})")
     else:
         result.add_valid("phone", phone)
@@ -70,6 +78,16 @@ def validate_order_data(data: Dict[str, Any]) -> ValidationResult:
 
     return result
 
+def extract_contact_fields(text: str) -> Dict[str, str]:
+    fields = {}
+    email_match = re.search(EMAIL_PATTERN, text)
+    if email_match and is_valid_email(email_match.group(0)):
+        fields["email"] = email_match.group(0)
+    phone_match = re.search(r'\+?\d[\d\s().-]{8,}\d', text)
+    if phone_match and is_valid_phone(phone_match.group(0)):
+        fields["phone"] = phone_match.group(0).strip()
+    return fields
+
 def get_corrected_state(original_state: Dict[str, Any], validation_result: ValidationResult) -> Dict[str, Any]:
     new_state = original_state.copy()
     for field in validation_result.invalid_fields:
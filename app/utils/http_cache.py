@@ -0,0 +1,128 @@
+"""
+HTTP Caching Utilities
+
+Strong ETags with conditional (304) responses, fingerprinted static URLs
+and a StaticFiles variant that marks fingerprinted assets immutable.
+"""
+from typing import Optional
+from functools import lru_cache
+import hashlib
+import os
+import time
+
+from fastapi import Request, Response
+from starlette.staticfiles import StaticFiles
+
+STATIC_DIR = "app/static"
+
+# Fingerprinted assets never change under the same URL
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Everything else may be cached but must be revalidated with its ETag
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Changes on every restart, for ETags of pages whose templates may have
+# changed with a deploy
+SERVER_INSTANCE = f"{os.getpid()}-{time.time_ns()}"
+
+
+def make_etag(*parts) -> str:
+    """
+    Build a strong ETag from content or version parts.
+
+    Args:
+        *parts: Bytes or values identifying the representation
+
+    Returns:
+        Quoted ETag header value
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:20]}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Check a request's If-None-Match header against an ETag.
+
+    Args:
+        request: Incoming request
+        etag: Current ETag of the resource
+
+    Returns:
+        True if the client's cached copy is current
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def not_modified_response(etag: str, cache_control: str = REVALIDATE_CACHE_CONTROL) -> Response:
+    """
+    Build an empty 304 response.
+
+    Args:
+        etag: Current ETag of the resource
+        cache_control: Cache-Control header value
+
+    Returns:
+        304 Response
+    """
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+@lru_cache(maxsize=None)
+def _file_fingerprint(path: str, mtime_ns: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def static_url(path: str) -> str:
+    """
+    Get a content-fingerprinted URL for a static asset.
+
+    Args:
+        path: Path relative to the static directory (e.g. "style.css")
+
+    Returns:
+        URL like /static/style.css?v=<hash>, or the plain URL if the file is missing
+    """
+    full_path = os.path.join(STATIC_DIR, path)
+    try:
+        mtime_ns = os.stat(full_path).st_mtime_ns
+    except OSError:
+        return f"/static/{path}"
+    return f"/static/{path}?v={_file_fingerprint(full_path, mtime_ns)}"
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that sets Cache-Control on every response.
+
+    Requests carrying a ?v= fingerprint are cacheable for a year as
+    immutable; plain URLs must be revalidated (Starlette answers those
+    with 304 when the ETag matches).
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        fingerprinted = b"v=" in scope.get("query_string", b"")
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if fingerprinted else REVALIDATE_CACHE_CONTROL
+        return response
+
+
+def cache_headers(etag: str, cache_control: Optional[str] = None) -> dict:
+    """
+    Headers to attach to a full (200) response.
+
+    Args:
+        etag: ETag of the representation
+        cache_control: Cache-Control value (defaults to revalidate)
+
+    Returns:
+        Header dictionary
+    """
+    return {"ETag": etag, "Cache-Control": cache_control or REVALIDATE_CACHE_CONTROL}
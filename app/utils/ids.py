@@ -0,0 +1,46 @@
+"""
+Identifier Utilities
+
+ULID-style identifiers: 48-bit millisecond timestamp plus 80 random bits,
+Crockford base32 encoded (26 characters). IDs sort by creation time and
+need no coordination between workers or shards.
+"""
+import os
+import threading
+import time
+
+CROCKFORD_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+_lock = threading.Lock()
+_last_ms = 0
+_last_random = 0
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        chars.append(CROCKFORD_ALPHABET[value & 31])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def new_ulid() -> str:
+    """
+    Generate a monotonic ULID.
+    
+    Within the same millisecond the random part is incremented, so IDs
+    generated by one process are strictly increasing.
+    
+    Returns:
+        26-character ULID string
+    """
+    global _last_ms, _last_random
+    with _lock:
+        now_ms = int(time.time() * 1000)
+        if now_ms <= _last_ms:
+            now_ms = _last_ms
+            _last_random = (_last_random + 1) & ((1 << 80) - 1)
+        else:
+            _last_ms = now_ms
+            _last_random = int.from_bytes(os.urandom(10), "big")
+        return _encode(now_ms, 10) + _encode(_last_random, 16)
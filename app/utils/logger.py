@@ -2,10 +2,25 @@
 Logging Configuration Module
 
 Provides centralized logging setup for the application.
+
+Application logging is queue-based: loggers only enqueue records and a
+background thread formats and writes them, so the event loop never
+blocks on stdout. Records carry the request and session IDs of the code
+that logged them, chatty loggers can be sampled, and output can be JSON.
 """
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+import atexit
 import logging
+import os
+import queue
 import sys
-from typing import Optional
+import threading
+import time
+
+from app.utils.serialization import dumps_str
 
 
 def setup_logger(
@@ -48,15 +63,279 @@ def setup_logger(
     return logger
 
 
-def configure_app_logging(level: int = logging.INFO):
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Request/session identifiers of the code currently running
+_log_context: ContextVar[Dict[str, str]] = ContextVar("log_context", default={})
+
+# Argument types that cannot change between logging and formatting
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, type(None), bytes)
+
+_listener: Optional[QueueListener] = None
+
+
+def bind_log_context(**fields: str) -> Token:
     """
-    Configure logging for the entire application.
+    Attach identifiers (request_id, session_id) to records logged from here on.
+    
+    Args:
+        **fields: Identifiers to add to the current context
+        
+    Returns:
+        Token for reset_log_context
+    """
+    return _log_context.set({**_log_context.get(), **fields})
+
+
+def reset_log_context(token: Token):
+    """
+    Restore the log context from before bind_log_context.
+    
+    Args:
+        token: Token returned by bind_log_context
+    """
+    _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the current request/session IDs onto each record."""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _log_context.get()
+        record.request_id = context.get("request_id")
+        record.session_id = context.get("session_id")
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Thins out chatty loggers below WARNING.
+    
+    Per-logger sample rates keep that fraction of records (spread evenly,
+    e.g. 0.3 keeps 3 in 10); the rate limit caps records per second for
+    each message template. Warnings and errors always pass.
+    """
+    
+    def __init__(self, sample_rates: Optional[Dict[str, float]] = None, max_per_second: float = 0):
+        """
+        Initialize the filter.
+        
+        Args:
+            sample_rates: Fraction of records kept per logger name (prefix match)
+            max_per_second: Records per second allowed per message template (0 = unlimited)
+        """
+        super().__init__()
+        self.sample_rates = sample_rates or {}
+        self.max_per_second = max_per_second
+        # Per logger: sampling credit; a record is kept whenever a whole unit has accrued
+        self._credits: Dict[str, float] = {}
+        self._windows: Dict[tuple, list] = {}
+        self._pruned_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.dropped = 0
+    
+    def _sample_rate(self, name: str) -> float:
+        rate = 1.0
+        matched = -1
+        for prefix, prefix_rate in self.sample_rates.items():
+            if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > matched:
+                rate, matched = prefix_rate, len(prefix)
+        return rate
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            rate = self._sample_rate(record.name)
+            if rate < 1.0:
+                credit = self._credits.get(record.name, 1.0)
+                keep = rate > 0 and credit >= 1.0
+                if keep:
+                    credit -= 1.0
+                self._credits[record.name] = credit + max(rate, 0.0)
+                if not keep:
+                    self.dropped += 1
+                    return False
+            if self.max_per_second:
+                # Keyed by the unformatted template, so this costs no string formatting
+                key = (record.name, record.msg)
+                now = time.monotonic()
+                if now - self._pruned_at >= 10.0:
+                    # Drop expired windows so one-off messages do not accumulate
+                    self._windows = {k: w for k, w in self._windows.items() if now - w[0] < 1.0}
+                    self._pruned_at = now
+                window = self._windows.get(key)
+                if window is None or now - window[0] >= 1.0:
+                    self._windows[key] = [now, 1]
+                elif window[1] >= self.max_per_second:
+                    self.dropped += 1
+                    return False
+                else:
+                    window[1] += 1
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for field in ("request_id", "session_id"):
+            value = getattr(record, field, None)
+            if value:
+                entry[field] = str(value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        # Only strings in the entry, so encoding cannot fail
+        return dumps_str(entry)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves message formatting to the listener thread.
+    
+    The stock QueueHandler formats every record on the logging thread.
+    Records whose arguments are all immutable are enqueued as they are;
+    only records with mutable arguments (or tracebacks) are rendered up
+    front, so later changes to those objects cannot alter the message.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        args = record.args
+        if record.exc_info or (args and not (
+            isinstance(args, tuple) and all(isinstance(arg, _IMMUTABLE_ARG_TYPES) for arg in args)
+        )):
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+        return record
+
+
+def _default_options() -> tuple:
+    # Without building Settings (which requires GROQ_API_KEY): LOG_JSON from
+    # the environment, everything else from the field defaults
+    from app.config.settings import Settings
+    fields = Settings.model_fields
+    json_format = os.environ.get("LOG_JSON", str(fields["log_json"].default)).strip().lower() in ("1", "true", "yes", "on")
+    return json_format, dict(fields["log_sample_rates"].default), fields["log_rate_limit"].default
+
+
+def configure_app_logging(
+    level: int = logging.INFO,
+    json_format: Optional[bool] = None,
+    sample_rates: Optional[Dict[str, float]] = None,
+    max_per_second: Optional[float] = None,
+    use_settings: bool = True
+) -> QueueListener:
+    """
+    Configure logging for the entire application (again, to change options).
+    
+    Log calls only enqueue records; a background listener thread writes
+    them to stdout. Unset options are read from settings.
     
     Args:
         level: Root logging level
+        json_format: Write JSON lines instead of plain text
+        sample_rates: Fraction of sub-WARNING records kept per logger
+        max_per_second: Sub-WARNING records per second per message template
+        use_settings: Read unset options from settings; if False, only from
+            LOG_JSON and the settings defaults (for use at import time)
+        
+    Returns:
+        The running QueueListener
     """
-    logging.basicConfig(
-        level=level,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[logging.StreamHandler(sys.stdout)]
-    )
+    global _listener
+    first_setup = _listener is None
+    if json_format is None or sample_rates is None or max_per_second is None:
+        if use_settings:
+            from app.config.settings import settings
+            defaults = (settings.log_json, settings.log_sample_rates, settings.log_rate_limit)
+        else:
+            defaults = _default_options()
+        json_format = defaults[0] if json_format is None else json_format
+        sample_rates = defaults[1] if sample_rates is None else sample_rates
+        max_per_second = defaults[2] if max_per_second is None else max_per_second
+    
+    if _listener is not None:
+        _listener.stop()
+    
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT))
+    
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    # Filters run on the logging thread: dropped records are never enqueued
+    handler.addFilter(SamplingFilter(sample_rates, max_per_second))
+    handler.addFilter(ContextFilter())
+    
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+    
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    if first_setup:
+        atexit.register(shutdown_app_logging)
+    return _listener
+
+
+def shutdown_app_logging():
+    """Flush queued records and stop the background writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+
+class LogContextMiddleware:
+    """
+    ASGI middleware giving every HTTP request and WebSocket a request ID.
+    
+    Reuses an incoming X-Request-ID header, binds the ID to the log
+    context for the request and echoes it in the response headers.
+    """
+    
+    def __init__(self, app):
+        """
+        Initialize the middleware.
+        
+        Args:
+            app: Wrapped ASGI application
+        """
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        if not request_id:
+            from app.utils.ids import new_ulid
+            request_id = new_ulid()
+        
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+        
+        token = bind_log_context(request_id=request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            reset_log_context(token)
@@ -8,8 +8,17 @@ import json
 import logging
 from typing import Optional, Dict, Any
 
+from app.models.chat import StructuredReply
+
 logger = logging.getLogger(__name__)
 
+# Generation stops on the marker suffix; the remaining prefix identifies the marker.
+ACTION_MARKER_PREFIXES = {
+    "ACTION_SHOW": "ACTION_SHOW_FORM",
+    "ACTION_SUBMIT": "ACTION_SUBMIT_ORDER"
+}
+ACTION_STOP_SEQUENCES = [marker[len(prefix):] for prefix, marker in ACTION_MARKER_PREFIXES.items()]
+
 
 def extract_json_from_text(text: str) -> Optional[Dict[str, Any]]:
     """
@@ -64,6 +73,23 @@ def extract_action_commands(text: str) -> Dict[str, bool]:
     }
 
 
+def restore_action_markers(text: str) -> str:
+    """
+    Restore an action marker cut short by an ACTION_STOP_SEQUENCES stop.
+    
+    Args:
+        text: Response text generated with ACTION_STOP_SEQUENCES
+        
+    Returns:
+        Text ending in the full action marker if generation stopped on one
+    """
+    stripped = text.rstrip()
+    for prefix, marker in ACTION_MARKER_PREFIXES.items():
+        if stripped.endswith(prefix):
+            return stripped[:-len(prefix)] + marker
+    return text
+
+
 def clean_response_text(text: str) -> str:
     """
     Clean response text by removing code blocks and extra whitespace.
@@ -86,3 +112,123 @@ def clean_response_text(text: str) -> str:
     text = text.strip()
     
     return text
+
+
+def parse_structured_reply(text: str) -> StructuredReply:
+    """
+    Parse a JSON mode LLM response into a StructuredReply.
+    
+    Falls back to marker parsing when the model did not return a JSON
+    object, so a malformed reply never costs an extra round-trip.
+    
+    Args:
+        text: Raw response text from the LLM
+        
+    Returns:
+        Parsed StructuredReply
+    """
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return StructuredReply(
+                reply=str(data.get("reply") or ""),
+                updates=data.get("updates") if isinstance(data.get("updates"), dict) else {},
+                show_form=bool(data.get("show_form", False)),
+                submit_order=bool(data.get("submit_order", False))
+            )
+        logger.warning("Structured reply was not a JSON object, falling back to text parsing")
+    except json.JSONDecodeError as e:
+        logger.warning(f"Structured reply parsing error: {e}, falling back to text parsing")
+    
+    actions = extract_action_commands(text)
+    return StructuredReply(
+        reply=clean_response_text(text),
+        updates=extract_json_from_text(text) or {},
+        show_form=actions["show_form"],
+        submit_order=actions["submit_order"]
+    )
+
+
+class ReplyStreamFilter:
+    """
+    Incremental filter for streamed reply text.
+    
+    Drops ``` code blocks (slot updates) and everything from the first
+    ACTION_ marker on, holding back any trailing text that could be the
+    start of either, so only user-visible text is emitted.
+    """
+    
+    FENCE = "```"
+    ACTION_PREFIX = "ACTION_"
+    
+    def __init__(self):
+        self._buffer = ""
+        self._in_code = False
+        self._done = False
+    
+    def feed(self, delta: str) -> str:
+        """
+        Add a chunk of model output.
+        
+        Args:
+            delta: Newly generated text
+            
+        Returns:
+            Text that is safe to show now (may be empty)
+        """
+        if self._done:
+            return ""
+        self._buffer += delta
+        visible = []
+        
+        while self._buffer:
+            if self._in_code:
+                end = self._buffer.find(self.FENCE)
+                if end < 0:
+                    # Keep a possible partial closing fence
+                    self._buffer = self._buffer[-(len(self.FENCE) - 1):]
+                    break
+                self._buffer = self._buffer[end + len(self.FENCE):]
+                self._in_code = False
+                continue
+            
+            fence = self._buffer.find(self.FENCE)
+            action = self._buffer.find(self.ACTION_PREFIX)
+            if action >= 0 and (fence < 0 or action < fence):
+                visible.append(self._buffer[:action])
+                self._buffer = ""
+                self._done = True
+                break
+            if fence >= 0:
+                visible.append(self._buffer[:fence])
+                self._buffer = self._buffer[fence + len(self.FENCE):]
+                self._in_code = True
+                continue
+            
+            hold = self._partial_marker_length(self._buffer)
+            visible.append(self._buffer[:len(self._buffer) - hold])
+            self._buffer = self._buffer[len(self._buffer) - hold:]
+            break
+        
+        return "".join(visible)
+    
+    def flush(self) -> str:
+        """
+        Emit any held-back text once the stream has ended.
+        
+        Returns:
+            Remaining visible text
+        """
+        remaining = "" if self._in_code or self._done else self._buffer
+        self._buffer = ""
+        return remaining
+    
+    def _partial_marker_length(self, text: str) -> int:
+        # Longest suffix of text that is a proper prefix of a marker
+        longest = 0
+        for marker in (self.ACTION_PREFIX, self.FENCE):
+            for length in range(min(len(marker) - 1, len(text)), longest, -1):
+                if marker.startswith(text[-length:]):
+                    longest = length
+                    break
+        return longest
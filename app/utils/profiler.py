@@ -0,0 +1,186 @@
+"""
+Sampling Profiler
+
+Low-overhead profiling of a live worker. A background thread snapshots
+the Python stack of every other thread at a fixed interval; nothing is
+instrumented, so the cost is one sys._current_frames() call per tick
+and request handling is not slowed down noticeably.
+
+Results are aggregated as collapsed stacks (one "frame;frame;frame count"
+line per distinct stack, the input format of flamegraph.pl and
+speedscope) plus self/total sample counts of the project's own functions.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+import os
+import sys
+import threading
+import time
+
+# Project code whose functions are ranked in the hot function report
+HOT_PACKAGES = ("app/core", "app/services", "app/db")
+
+# Leaf frames of threads that are blocked rather than working
+IDLE_LEAVES = frozenset({
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("handlers.py", "dequeue"),
+    ("socket.py", "accept"),
+})
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _frame_label(code) -> str:
+    # Project files by relative path, library files by module file name
+    filename = code.co_filename
+    if filename.startswith(_ROOT + os.sep):
+        filename = os.path.relpath(filename, _ROOT).replace(os.sep, "/")
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class SamplingProfiler:
+    """
+    Stack sampler for all threads of the current process.
+
+    Use start() and stop(), then report(). One instance profiles one
+    window.
+    """
+
+    def __init__(self, interval: float = 0.005, include_idle: bool = False):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: Seconds between samples
+            include_idle: Keep samples of threads blocked in select/wait/get
+        """
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.ticks = 0
+        self.idle = 0
+        self.started_at: Optional[float] = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start sampling in a daemon thread."""
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+
+    def _run(self):
+        own_id = threading.get_ident()
+        next_tick = time.perf_counter()
+        while not self._stop.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self._record(names.get(thread_id, str(thread_id)), frame)
+            frame = None  # do not keep the last stack alive until the next tick
+            self.ticks += 1
+            # Fixed rate rather than fixed gap, so slow ticks do not stretch the window
+            next_tick += self.interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_tick = time.perf_counter()
+
+    def _record(self, thread_name: str, frame):
+        code = frame.f_code
+        if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_LEAVES:
+            self.idle += 1
+            return
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame.f_code))
+            frame = frame.f_back
+        # Collapsed stack lines are split on ";" and the last space
+        labels.append(thread_name.replace(" ", "_").replace(";", ","))
+        labels.reverse()
+        self.stacks[tuple(labels)] += 1
+
+    def collapsed(self) -> str:
+        """
+        Get the samples as collapsed stacks.
+
+        Returns:
+            One "thread;outer;...;inner count" line per distinct stack
+        """
+        return "\n".join(
+            f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()
+        )
+
+    def hot_functions(
+        self, packages: Tuple[str, ...] = HOT_PACKAGES, limit: int = 25, sort: str = "self"
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank project functions by samples.
+
+        Args:
+            packages: Path prefixes of the functions to rank
+            limit: Maximum number of functions returned
+            sort: "self" (innermost project frame, where the work is done) or
+                "total" (anywhere on the stack, including callees)
+
+        Returns:
+            Functions with self and total samples, hottest first
+        """
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            ours = [label for label in stack[1:] if label.startswith(packages)]
+            if not ours:
+                continue
+            self_counts[ours[-1]] += count
+            for label in set(ours):
+                total_counts[label] += count
+        sampled = sum(self.stacks.values()) or 1
+        ranking = self_counts if sort == "self" else total_counts
+        return [
+            {
+                "function": label,
+                "self": self_counts[label],
+                "total": total_counts[label],
+                "self_pct": round(100 * self_counts[label] / sampled, 1),
+                "total_pct": round(100 * total_counts[label] / sampled, 1)
+            }
+            for label, _ in ranking.most_common(limit)
+        ]
+
+    def report(self, limit: int = 25) -> Dict[str, Any]:
+        """
+        Summarize the profiling window.
+
+        Args:
+            limit: Maximum number of hot functions
+
+        Returns:
+            Timing, sample counts, hot functions by self and total samples,
+            and collapsed stacks
+        """
+        return {
+            "seconds": round(self.elapsed, 3),
+            "interval_ms": self.interval * 1000,
+            "ticks": self.ticks,
+            "samples": sum(self.stacks.values()),
+            "idle_samples": self.idle,
+            "top_self": self.hot_functions(limit=limit, sort="self"),
+            "top_total": self.hot_functions(limit=limit, sort="total"),
+            "collapsed": self.collapsed()
+        }
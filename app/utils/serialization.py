@@ -0,0 +1,191 @@
+"""
+JSON Serialization
+
+One JSON layer for API responses, storage files, prompts and event
+payloads. Uses orjson or msgspec when installed (both optional) and the
+standard library otherwise.
+
+All backends write the same text for the data this app handles: UTF-8
+without ASCII escaping, compact separators, or two-space indentation
+when asked. Stored files and prompts therefore do not change when a
+backend is added or removed. (Exceptions: floats of 1e16 and above use
+a different but equivalent exponent form, and msgspec writes UTC
+datetimes with a "Z" suffix.)
+
+Dates and pydantic models are converted; any other type JSON has no
+value for raises TypeError rather than being written as its str(), so
+a stray object cannot end up in a stored file or an event. msgspec is
+the one backend that still encodes sets (as arrays) and bytes (base64)
+natively.
+"""
+from typing import Any, Callable, Dict, List, Union
+from datetime import date, datetime
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional dependency
+    msgspec = None
+
+# Preference order
+BACKENDS = ("orjson", "msgspec", "stdlib")
+
+
+def _default(obj: Any) -> Any:
+    # Dates and pydantic models; anything else is a bug in the caller, not a string
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(obj: Any, indent: bool, sort_keys: bool) -> bytes:
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+        sort_keys=sort_keys,
+        default=_default
+    ).encode("utf-8")
+
+
+def _orjson_dumps(obj: Any, indent: bool, sort_keys: bool) -> bytes:
+    # Datetimes go through _default so they match the other backends
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(obj, default=_default, option=option)
+
+
+_msgspec_encoders: Dict[bool, Any] = {}
+
+
+def _msgspec_dumps(obj: Any, indent: bool, sort_keys: bool) -> bytes:
+    encoder = _msgspec_encoders.get(sort_keys)
+    if encoder is None:
+        encoder = _msgspec_encoders[sort_keys] = msgspec.json.Encoder(
+            enc_hook=_default, order="sorted" if sort_keys else None
+        )
+    data = encoder.encode(obj)
+    return msgspec.json.format(data, indent=2) if indent else data
+
+
+_DUMPS: Dict[str, Callable[[Any, bool, bool], bytes]] = {
+    "orjson": _orjson_dumps,
+    "msgspec": _msgspec_dumps,
+    "stdlib": _stdlib_dumps
+}
+_LOADS: Dict[str, Callable[[Union[bytes, str]], Any]] = {
+    "orjson": lambda data: orjson.loads(data),
+    "msgspec": lambda data: msgspec.json.decode(data),
+    "stdlib": json.loads
+}
+
+
+def available_backends() -> List[str]:
+    """
+    List the serializer backends installed in this environment.
+
+    Returns:
+        Backend names in preference order
+    """
+    installed = {"orjson": orjson is not None, "msgspec": msgspec is not None, "stdlib": True}
+    return [name for name in BACKENDS if installed[name]]
+
+
+_backend = available_backends()[0]
+_dumps = _DUMPS[_backend]
+_loads = _LOADS[_backend]
+
+
+def get_backend() -> str:
+    """
+    Get the active serializer backend.
+
+    Returns:
+        "orjson", "msgspec" or "stdlib"
+    """
+    return _backend
+
+
+def set_backend(name: str):
+    """
+    Switch the serializer backend (for benchmarks and comparisons).
+
+    Args:
+        name: Backend name
+
+    Raises:
+        ValueError: If the backend is not installed
+    """
+    global _backend, _dumps, _loads
+    if name not in available_backends():
+        raise ValueError(f"JSON backend {name!r} is not available (installed: {', '.join(available_backends())})")
+    _backend, _dumps, _loads = name, _DUMPS[name], _LOADS[name]
+
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Serialize to UTF-8 JSON.
+
+    Args:
+        obj: JSON-compatible value (dates and pydantic models are converted)
+        indent: Indent with two spaces
+        sort_keys: Sort object keys
+
+    Returns:
+        Encoded JSON
+
+    Raises:
+        TypeError: If obj contains a value of another type (sets, bytes, objects)
+    """
+    return _dumps(obj, indent, sort_keys)
+
+
+def dumps_str(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    """
+    Serialize to a JSON string.
+
+    Args:
+        obj: JSON-compatible value
+        indent: Indent with two spaces
+        sort_keys: Sort object keys
+
+    Returns:
+        JSON text
+
+    Raises:
+        TypeError: If obj contains a value JSON has no type for
+    """
+    return _dumps(obj, indent, sort_keys).decode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse JSON.
+
+    Args:
+        data: JSON bytes or text
+
+    Returns:
+        Parsed value
+
+    Raises:
+        ValueError: If the input is not valid JSON
+    """
+    try:
+        return _loads(data)
+    except ValueError:
+        raise
+    except Exception as e:
+        # msgspec reports invalid input with its own DecodeError
+        raise ValueError(str(e)) from e
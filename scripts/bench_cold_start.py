@@ -0,0 +1,68 @@
+"""
+Cold-Start Benchmark
+
+Measures serverless-style cold starts: each run spawns a fresh
+interpreter, imports app.main and serves one request in-process.
+
+Usage:
+    python -m scripts.bench_cold_start [--runs 10] [--path /]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(app.main.app)
+t2 = time.perf_counter()
+response = client.get({path!r})
+t3 = time.perf_counter()
+assert response.status_code < 500, response.status_code
+print(t1 - t0, t3 - t2)
+"""
+
+
+def run_once(path: str):
+    """
+    Run one cold start in a fresh interpreter.
+
+    Args:
+        path: Request path served after import
+
+    Returns:
+        (import_seconds, first_request_seconds, process_seconds)
+    """
+    env = dict(os.environ, GROQ_API_KEY=os.environ.get("GROQ_API_KEY", "bench-placeholder"))
+    import time
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE.format(path=path)],
+        capture_output=True, text=True, env=env
+    )
+    elapsed = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+    import_s, request_s = map(float, proc.stdout.split()[-2:])
+    return import_s, request_s, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/")
+    args = parser.parse_args()
+
+    results = [run_once(args.path) for _ in range(args.runs)]
+    for label, index in (("import app.main", 0), (f"first GET {args.path}", 1), ("process total", 2)):
+        values = [r[index] * 1000 for r in results]
+        print(f"{label:<28} median {statistics.median(values):8.1f} ms   min {min(values):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
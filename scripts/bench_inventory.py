@@ -0,0 +1,147 @@
+"""
+Inventory Reservation Benchmark
+
+Simulates a flash sale: thousands of concurrent checkouts reserve stock,
+then most confirm and the rest abandon. Reports reservation throughput
+per backend and checks that no product was oversold.
+
+Usage:
+    python -m scripts.bench_inventory [--checkouts 5000] [--threads 64] [--backend memory|sqlite|both]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.db.inventory import InsufficientStock, InventoryStore, SQLiteInventoryStore
+
+PRODUCTS = ("The Cloud Sofa", "Classic Chesterfield", "Artisan Oak Table", "Velvet Armchair")
+
+
+def make_stock(units_per_product: int):
+    """Uneven stock levels so some products sell out early."""
+    weights = (1.0, 0.3, 0.6, 1.5)
+    return {sku: max(1, int(units_per_product * weight)) for sku, weight in zip(PRODUCTS, weights)}
+
+
+def run_checkouts(store, stock, checkouts: int, threads: int, confirm_rate: float, seed: int = 7):
+    """
+    Run concurrent checkouts against a store.
+
+    Args:
+        store: InventoryStore or SQLiteInventoryStore
+        stock: Initial units per product
+        checkouts: Number of checkout sessions
+        threads: Worker threads
+        confirm_rate: Fraction of successful reservations that are confirmed
+
+    Returns:
+        Result dictionary (timings, outcome counts, units sold per product)
+    """
+    rng = random.Random(seed)
+    plans = [
+        (f"bench-{i}", rng.choice(PRODUCTS), rng.randint(1, 3), rng.random() < confirm_rate)
+        for i in range(checkouts)
+    ]
+    sold = {sku: 0 for sku in stock}
+    outcomes = {"confirmed": 0, "abandoned": 0, "sold_out": 0}
+    latencies = []
+    lock = threading.Lock()
+    start_gate = threading.Barrier(threads)
+
+    def checkout(plan_slice):
+        start_gate.wait()
+        local_latencies = []
+        for session_id, sku, quantity, confirms in plan_slice:
+            started = time.perf_counter()
+            try:
+                store.reserve(session_id, sku, quantity)
+            except InsufficientStock:
+                outcome = "sold_out"
+            else:
+                if confirms:
+                    store.commit(session_id, sku, quantity)
+                    outcome = "confirmed"
+                else:
+                    store.release(session_id)
+                    outcome = "abandoned"
+            local_latencies.append(time.perf_counter() - started)
+            with lock:
+                outcomes[outcome] += 1
+                if outcome == "confirmed":
+                    sold[sku] += quantity
+        with lock:
+            latencies.extend(local_latencies)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(checkout, [plans[i::threads] for i in range(threads)]))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "seconds": elapsed,
+        "checkouts_per_sec": checkouts / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(0.99 * (len(latencies) - 1))] * 1000,
+        "outcomes": outcomes,
+        "sold": sold
+    }
+
+
+def check_consistency(store, stock, sold):
+    """
+    Verify stock levels against units sold.
+
+    Returns:
+        List of problems (empty if consistent)
+    """
+    problems = []
+    for sku, level in store.get_levels().items():
+        if sold[sku] > stock[sku]:
+            problems.append(f"{sku}: oversold ({sold[sku]} sold of {stock[sku]})")
+        if level["on_hand"] != stock[sku] - sold[sku]:
+            problems.append(f"{sku}: on_hand {level['on_hand']} != {stock[sku] - sold[sku]}")
+        if level["reserved"] != 0:
+            problems.append(f"{sku}: {level['reserved']} units still reserved")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inventory reservations under concurrent checkouts")
+    parser.add_argument("--checkouts", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--confirm-rate", type=float, default=0.7)
+    parser.add_argument("--backend", choices=("memory", "sqlite", "both"), default="both")
+    parser.add_argument("--stock", type=int, help="Base units per product (default: sells out near the end of the run)")
+    args = parser.parse_args()
+    stock = make_stock(args.stock or args.checkouts * 2 // 5)
+
+    backends = ("memory", "sqlite") if args.backend == "both" else (args.backend,)
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            if backend == "sqlite":
+                store = SQLiteInventoryStore(stock, db_path=os.path.join(tmp, "inventory.db"))
+            else:
+                store = InventoryStore(stock)
+            result = run_checkouts(store, stock, args.checkouts, args.threads, args.confirm_rate)
+            problems = check_consistency(store, stock, result["sold"])
+            failed = failed or bool(problems)
+
+            outcomes = result["outcomes"]
+            print(f"{backend:<7} {args.checkouts} checkouts / {args.threads} threads: "
+                  f"{result['checkouts_per_sec']:>9.0f}/s  p50 {result['p50_ms']:.3f}ms  p99 {result['p99_ms']:.3f}ms  "
+                  f"confirmed {outcomes['confirmed']}  abandoned {outcomes['abandoned']}  sold out {outcomes['sold_out']}")
+            print(f"        sold {sum(result['sold'].values())} of {sum(stock.values())} units: "
+                  f"{'consistent' if not problems else '; '.join(problems)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
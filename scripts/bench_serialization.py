@@ -0,0 +1,122 @@
+"""
+Serialization Benchmark
+
+Compares the installed JSON backends (stdlib, and orjson/msgspec when
+available) on the payloads this app actually encodes: a chat reply, the
+/api/orders listing, the order storage file and the state block of the
+system prompt. Also times the old /api/chat response path (response_model
+re-validation + jsonable_encoder + stdlib json) against the direct one.
+
+Usage:
+    python -m scripts.bench_serialization [--orders 1000] [--repeat 5]
+"""
+import argparse
+import json
+import random
+import timeit
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models.chat import ChatResponse
+from app.utils import serialization
+
+PRODUCTS = {"The Cloud Sofa": 1299.0, "Classic Chesterfield": 2499.0, "Artisan Oak Table": 899.0, "Velvet Armchair": 649.0}
+
+
+def make_state(rng: random.Random) -> dict:
+    product = rng.choice(list(PRODUCTS))
+    return {
+        "full_name": rng.choice(["Ayesha Khan", "José Álvarez", "Li Wei", "Sam O'Neil"]),
+        "email": f"customer{rng.randint(1, 99999)}@example.com",
+        "phone": f"+1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+        "address": f"{rng.randint(1, 999)} Market Street, Springfield",
+        "product_interest": product,
+        "quantity": rng.randint(1, 4)
+    }
+
+
+def make_orders(count: int, rng: random.Random) -> list:
+    orders = []
+    for i in range(count):
+        state = make_state(rng)
+        orders.append({
+            **state,
+            "order_id": f"01J{i:023d}",
+            "created_at": f"2026-10-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:15:42.123456+00:00",
+            "status": "received"
+        })
+    return orders
+
+
+def make_reply(rng: random.Random) -> ChatResponse:
+    state = make_state(rng)
+    price = PRODUCTS[state["product_interest"]]
+    return ChatResponse(
+        response="Details valid. Please review carefully and press Confirm Order.",
+        state=state,
+        should_submit=False,
+        show_form=True,
+        meta={"form_mode": "confirm", "quote": {
+            "product": state["product_interest"], "unit_price": price, "quantity": state["quantity"],
+            "subtotal": price * state["quantity"], "discount": 0.0, "total": price * state["quantity"]
+        }}
+    )
+
+
+def best_us(fn, repeat: int) -> float:
+    """Best time per call in microseconds."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON serialization backends on app payloads")
+    parser.add_argument("--orders", type=int, default=1000, help="Orders in the listing/storage payloads")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    reply = make_reply(rng)
+    orders = make_orders(args.orders, rng)
+    state = make_state(rng)
+    stored = json.dumps(orders, indent=2).encode("utf-8")
+
+    # The /api/chat path before the serializer layer: FastAPI re-validates the
+    # returned model against response_model, runs jsonable_encoder, then json.dumps
+    def fastapi_default():
+        return json.dumps(
+            jsonable_encoder(ChatResponse.model_validate(reply.model_dump())), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    cases = {
+        "chat reply (model_dump + encode)": lambda: serialization.dumps(reply.model_dump()),
+        f"orders listing ({args.orders})": lambda: serialization.dumps(orders),
+        f"storage file write ({args.orders}, indent)": lambda: serialization.dumps(orders, indent=True),
+        f"storage file read ({len(stored) // 1024} KiB)": lambda: serialization.loads(stored),
+        "prompt state (indent)": lambda: serialization.dumps_str(state, indent=True)
+    }
+
+    backends = serialization.available_backends()
+    baseline = {}
+    print(f"{'payload':<36}" + "".join(f"{name:>18}" for name in backends))
+    for label, fn in cases.items():
+        row = f"{label:<36}"
+        for name in reversed(backends):  # stdlib first, as the baseline
+            serialization.set_backend(name)
+            baseline.setdefault(label, {})[name] = best_us(fn, args.repeat)
+        for name in backends:
+            us = baseline[label][name]
+            speedup = baseline[label]["stdlib"] / us
+            row += f"{us:>10.1f}us {speedup:>4.1f}x"
+        print(row)
+
+    serialization.set_backend(backends[0])
+    old = best_us(fastapi_default, args.repeat)
+    new = best_us(lambda: serialization.dumps(reply.model_dump()), args.repeat)
+    print(f"\n/api/chat response: response_model + jsonable_encoder + json {old:.1f}us, "
+          f"model_dump + {backends[0]} {new:.1f}us ({old / new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Import-Time Profile Report
+
+Runs `python -X importtime` on a module in a fresh interpreter and prints
+the slowest imports by cumulative time.
+
+Usage:
+    python -m scripts.profile_imports [--module app.main] [--top 25]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+
+def profile_imports(module: str):
+    """
+    Collect import timings for a module.
+
+    Args:
+        module: Module to import
+
+    Returns:
+        List of (cumulative_us, self_us, module_name) tuples
+    """
+    env = dict(os.environ, GROQ_API_KEY=os.environ.get("GROQ_API_KEY", "profile-placeholder"))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr)
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile report")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    rows = profile_imports(args.module)
+    total = max(cumulative for cumulative, _, name in rows if name.strip() == args.module)
+    print(f"Total import time for {args.module}: {total / 1000:.1f} ms\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative, self_us, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Trace Replay Harness
+
+Replays recorded chat turns (see app.core.tracing) against the current
+OrderAgent code. A fake LLM service answers with the recorded responses,
+so replays are deterministic and need no network. Traces are split
+across worker processes.
+
+Reports behaviour differences from the recorded run (reply, form and
+submit flags, state, prompt) and per-stage timing deltas. Record with
+one code version, check out another and replay to compare them.
+
+Usage:
+    python -m scripts.replay_traces data/traces/traces-*.ndjson.gz [--workers 4] [--report replay.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Stages timed in both runs; "local" is total minus llm_wait, since the replay LLM is instant
+COMPARED_STAGES = ("deterministic", "apply", "local")
+COMPARED_FIELDS = ("response_text", "show_form", "should_submit", "meta")
+
+
+class ReplayMiss(Exception):
+    """The replayed code made an LLM call the recording does not have."""
+
+
+class ReplayLLMService:
+    """Fake LLM service returning recorded outputs in order."""
+
+    model = "replay"
+
+    def __init__(self, calls):
+        self._calls = list(calls)
+        self.prompts = []
+
+    async def _next(self, messages):
+        # Never answer synchronously: like a real call, a speculative request the
+        # agent cancels right away must not consume a recorded response
+        await asyncio.sleep(0)
+        self.prompts.append(messages)
+        if not self._calls:
+            raise ReplayMiss("no recorded LLM response left for this turn")
+        return self._calls.pop(0)["output"]
+
+    async def get_completion(self, messages, **kwargs):
+        return await self._next(messages)
+
+    async def get_structured_completion(self, messages, **kwargs):
+        from app.models.chat import StructuredReply
+        return StructuredReply(**await self._next(messages))
+
+    def is_available(self):
+        return True
+
+
+async def _replay_one(trace):
+    from app.core.agent import OrderAgent
+    from app.core.state_manager import state_manager
+    from app.core.tracing import finish_trace, start_trace
+
+    session_id = trace["session_id"]
+    state_manager.reset_state(session_id)
+    state_manager.update_state(session_id, trace.get("state_before") or {})
+
+    llm = ReplayLLMService(trace.get("llm_calls", []))
+    config = trace.get("config") or {}
+    agent = OrderAgent(
+        groq_service=llm,
+        structured_output=config.get("structured_output", False),
+        temperature=config.get("temperature", 0.6),
+        max_tokens=config.get("max_tokens", 500),
+        phase_max_tokens=config.get("phase_max_tokens")
+    )
+
+    # The agent reports errors as a reply, so ReplayMiss shows up as a behaviour diff
+    token = start_trace(session_id=session_id)
+    result = await agent.process_message(session_id, trace["user_text"], list(trace.get("history", [])))
+    replayed = finish_trace(token, state_after=state_manager.get_state(session_id))
+    state_manager.reset_state(session_id)
+
+    recorded_result = trace.get("result") or {}
+    diffs = {}
+    for field in COMPARED_FIELDS:
+        if recorded_result.get(field) != result.get(field):
+            diffs[field] = {"recorded": recorded_result.get(field), "replayed": result.get(field)}
+    if trace.get("state_after") != replayed["state_after"]:
+        diffs["state_after"] = {"recorded": trace.get("state_after"), "replayed": replayed["state_after"]}
+    recorded_prompts = [call["messages"] for call in trace.get("llm_calls", [])]
+    if llm.prompts and llm.prompts != recorded_prompts[:len(llm.prompts)]:
+        diffs["prompt"] = "system prompt or message window differs from the recording"
+    if len(llm.prompts) != len(recorded_prompts):
+        diffs["llm_calls"] = {"recorded": len(recorded_prompts), "replayed": len(llm.prompts)}
+
+    return {
+        "ts": trace.get("ts"),
+        "session_id": session_id,
+        "user_text": trace["user_text"],
+        "diffs": diffs,
+        "recorded_ms": trace.get("timings_ms", {}),
+        "replayed_ms": replayed["timings_ms"]
+    }
+
+
+def replay_chunk(traces):
+    """
+    Replay a list of traces in one worker process.
+
+    Args:
+        traces: Recorded traces
+
+    Returns:
+        Per-trace replay results
+    """
+    logging.disable(logging.WARNING)
+
+    async def run_all():
+        return [await _replay_one(trace) for trace in traces]
+
+    return asyncio.run(run_all())
+
+
+def _stage_ms(timings, stage):
+    if stage == "local":
+        return timings["total"] - timings.get("llm_wait", 0) if "total" in timings else None
+    return timings.get(stage)
+
+
+def summarize_timings(results):
+    """
+    Compare stage timings of the recorded and replayed runs.
+
+    Args:
+        results: Per-trace replay results
+
+    Returns:
+        {stage: {"recorded_p50_ms", "replayed_p50_ms", "delta_ms"}}
+    """
+    summary = {}
+    for stage in COMPARED_STAGES:
+        recorded = [ms for ms in (_stage_ms(r["recorded_ms"], stage) for r in results) if ms is not None]
+        replayed = [ms for ms in (_stage_ms(r["replayed_ms"], stage) for r in results) if ms is not None]
+        if not recorded or not replayed:
+            continue
+        recorded_p50, replayed_p50 = statistics.median(recorded), statistics.median(replayed)
+        summary[stage] = {
+            "recorded_p50_ms": round(recorded_p50, 3),
+            "replayed_p50_ms": round(replayed_p50, 3),
+            "delta_ms": round(replayed_p50 - recorded_p50, 3)
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded chat traces against the current agent")
+    parser.add_argument("paths", nargs="+", help="Trace files (.ndjson.gz)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--report", help="Write per-trace results to this JSON file")
+    parser.add_argument("--show", type=int, default=5, help="Behaviour diffs to print")
+    args = parser.parse_args()
+
+    from app.core.tracing import read_traces
+    traces = [trace for path in args.paths for trace in read_traces(path)]
+    if not traces:
+        print("No traces found.")
+        return 1
+
+    # Interleaved chunks keep workers evenly loaded
+    chunk_count = min(len(traces), args.workers * 4)
+    chunks = [traces[i::chunk_count] for i in range(chunk_count)]
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = [result for chunk in pool.map(replay_chunk, chunks) for result in chunk]
+
+    changed = [r for r in results if r["diffs"]]
+    print(f"Replayed {len(results)} turns with {args.workers} workers: "
+          f"{len(results) - len(changed)} identical, {len(changed)} changed")
+    for r in changed[:args.show]:
+        print(f"\n[{r['ts']}] {r['session_id']}: {r['user_text'][:60]!r}")
+        for field, diff in r["diffs"].items():
+            print(f"  {field}: {json.dumps(diff, default=str)[:200]}")
+
+    print("\nStage timings (p50):")
+    for stage, timing in summarize_timings(results).items():
+        print(f"  {stage:<14} recorded {timing['recorded_p50_ms']:>9.3f}ms  "
+              f"replayed {timing['replayed_p50_ms']:>9.3f}ms  delta {timing['delta_ms']:+.3f}ms")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"\nWrote {args.report}")
+    return 1 if changed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Local Order Event Receiver Stub
+
+Stand-in downstream system for exercising order event delivery. Accepts
+POST /events batches, de-duplicates by event_id the way a real receiver
+should, optionally checks the X-Signature header, and reports what it
+received at GET /stats.
+
+Usage:
+    python -m scripts.stub_event_receiver --port 8002 --error-rate 0.3 --secret s3cret
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import random
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Stub Event Receiver")
+config = {"latency": 0.0, "error_rate": 0.0, "secret": None}
+seen_ids = set()
+order_ids = []
+stats = {"batches": 0, "events": 0, "duplicates": 0, "rejected": 0, "bad_signatures": 0}
+
+
+@app.post("/events")
+async def receive_events(request: Request):
+    """Accept a batch of order events."""
+    body = await request.body()
+    await asyncio.sleep(config["latency"])
+    if config["secret"]:
+        expected = "sha256=" + hmac.new(config["secret"].encode("utf-8"), body, hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, request.headers.get("X-Signature", "")):
+            stats["bad_signatures"] += 1
+            return JSONResponse({"error": "bad signature"}, status_code=401)
+    if random.random() < config["error_rate"]:
+        stats["rejected"] += 1
+        return JSONResponse({"error": "stub failure"}, status_code=503)
+
+    events = (await request.json())["events"]
+    stats["batches"] += 1
+    for event in events:
+        stats["events"] += 1
+        if event["event_id"] in seen_ids:
+            stats["duplicates"] += 1
+            continue
+        seen_ids.add(event["event_id"])
+        order_ids.append(event["order_id"])
+    return {"accepted": len(events)}
+
+
+@app.get("/stats")
+async def get_stats():
+    """Report received batches and unique events."""
+    return {**stats, "unique": len(seen_ids), "order_ids": order_ids}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Local order event receiver stub")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--latency", type=float, default=0.0, help="Response delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of batches answered with 503")
+    parser.add_argument("--secret", help="Verify X-Signature with this key")
+    args = parser.parse_args()
+    config.update(latency=args.latency, error_rate=args.error_rate, secret=args.secret)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -0,0 +1,72 @@
+"""
+Local OpenAI-Compatible Stub Server
+
+Stand-in LLM backend for exercising routing and hedging without network
+access. Serves POST /v1/chat/completions with a canned reply after a
+configurable delay, as one JSON body or as server-sent events when the
+request sets "stream": true.
+
+Usage:
+    python -m scripts.stub_llm_server --port 8001 --latency 0.3 --jitter 0.2
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Stub LLM")
+config = {"latency": 0.2, "jitter": 0.0, "error_rate": 0.0}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    """Return a canned completion in OpenAI response format."""
+    body = await request.json()
+    await asyncio.sleep(config["latency"] + random.uniform(0, config["jitter"]))
+    if random.random() < config["error_rate"]:
+        return JSONResponse({"error": "stub failure"}, status_code=503)
+    
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        content = json.dumps({"reply": "Hello from the stub backend!", "updates": {}, "show_form": False, "submit_order": False})
+    else:
+        content = "Hello from the stub backend! Which product are you interested in?"
+    
+    if body.get("stream"):
+        return StreamingResponse(_stream_chunks(content, body.get("model", "stub")), media_type="text/event-stream")
+    
+    return {
+        "id": f"stub-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}]
+    }
+
+
+
+async def _stream_chunks(content: str, model: str):
+    """Yield the reply word by word as OpenAI-style SSE chunks."""
+    words = content.split(" ")
+    for index, word in enumerate(words):
+        delta = word if index == 0 else " " + word
+        chunk = {"object": "chat.completion.chunk", "model": model,
+                 "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(0.02)
+    yield "data: [DONE]\n\n"
+
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub LLM server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="Base response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+    config.update(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
@@ -0,0 +1,99 @@
+"""
+Inventory tests for both backends: no overselling under concurrent
+checkouts, reservation expiry and restocking.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pytest
+
+from app.db.inventory import InsufficientStock, InventoryStore, SQLiteInventoryStore
+
+SKU = "The Cloud Sofa"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(stock, reservation_ttl=900):
+        if request.param == "memory":
+            return InventoryStore(stock, reservation_ttl=reservation_ttl)
+        return SQLiteInventoryStore(stock, db_path=str(tmp_path / "inventory.db"), reservation_ttl=reservation_ttl)
+    return make
+
+
+def test_concurrent_checkouts_never_oversell(make_store):
+    store = make_store({SKU: 50})
+
+    def checkout(i):
+        session_id = f"session-{i}"
+        try:
+            store.reserve(session_id, SKU, 1)
+        except InsufficientStock:
+            return False
+        return store.commit(session_id, SKU, 1)
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        sold = sum(pool.map(checkout, range(200)))
+
+    assert sold == 50
+    assert store.get_levels()[SKU] == {"on_hand": 0, "reserved": 0, "available": 0}
+
+
+def test_concurrent_direct_orders_never_oversell(make_store):
+    store = make_store({SKU: 20})
+
+    def order(_):
+        try:
+            return store.commit(None, SKU, 3)
+        except InsufficientStock:
+            return False
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        sold = sum(pool.map(order, range(50)))
+
+    assert sold == 6
+    assert store.get_levels()[SKU]["on_hand"] == 2
+
+
+def test_reservation_holds_stock_until_it_expires(make_store):
+    store = make_store({SKU: 2}, reservation_ttl=0.05)
+    store.reserve("first", SKU, 2)
+    with pytest.raises(InsufficientStock):
+        store.reserve("second", SKU, 1)
+
+    time.sleep(0.1)
+    assert store.expire_reservations(force=True) == 1
+    assert store.get_levels()[SKU]["available"] == 2
+    store.reserve("second", SKU, 1)
+
+
+def test_commit_after_expiry_takes_stock_if_available(make_store):
+    store = make_store({SKU: 1}, reservation_ttl=0.05)
+    store.reserve("first", SKU, 1)
+    time.sleep(0.1)
+    store.expire_reservations(force=True)
+    store.reserve("second", SKU, 1)
+
+    with pytest.raises(InsufficientStock):
+        store.commit("first", SKU, 1)
+    assert store.commit("second", SKU, 1)
+
+
+def test_restock_returns_units_of_an_unstored_order(make_store):
+    store = make_store({SKU: 1})
+    store.commit(None, SKU, 1)
+    assert store.restock(SKU, 1)
+    assert store.get_levels()[SKU]["on_hand"] == 1
+    assert not store.restock("Unknown Chair", 1)
+
+
+@pytest.mark.parametrize("quantity", [0, -3, 1.5, "2", True])
+def test_quantity_below_one_or_not_whole_is_rejected(make_store, quantity):
+    store = make_store({SKU: 40})
+    with pytest.raises(ValueError):
+        store.reserve("session", SKU, quantity)
+    with pytest.raises(ValueError):
+        store.commit(None, SKU, quantity)
+    with pytest.raises(ValueError):
+        store.restock(SKU, quantity)
+    assert store.get_levels()[SKU] == {"on_hand": 40, "reserved": 0, "available": 40}
@@ -0,0 +1,98 @@
+"""
+Order outbox tests: delivery order, crash recovery and stale events.
+"""
+import asyncio
+from unittest import mock
+
+from app.db.outbox import OrderOutbox
+from app.db.storage import OrderStorage
+from app.services.order_events import OrderEventDispatcher
+
+SINK = "http://sink.test/events"
+
+
+def make_order(order_id):
+    return {"order_id": order_id, "created_at": "2026-10-19T00:00:00+00:00", "email": "a@example.com"}
+
+
+def order_ids(batch):
+    return [event["order_id"] for _, event in batch]
+
+
+def test_pending_waits_for_older_unconfirmed_events(tmp_path):
+    outbox = OrderOutbox(str(tmp_path / "outbox.db"))
+    slow = outbox.stage([make_order("A")])
+    fast = outbox.stage([make_order("B")])
+    outbox.confirm(fast)
+
+    # B committed first, but handing it out would let the sink skip A
+    assert outbox.pending(SINK) == []
+
+    outbox.confirm(slow)
+    assert order_ids(outbox.pending(SINK)) == ["A", "B"]
+
+
+def test_ack_advances_cursor_and_purge_drops_delivered(tmp_path):
+    outbox = OrderOutbox(str(tmp_path / "outbox.db"))
+    outbox.confirm(outbox.stage([make_order("A"), make_order("B"), make_order("C")]))
+
+    batch = outbox.pending(SINK, limit=2)
+    assert order_ids(batch) == ["A", "B"]
+    outbox.ack(SINK, batch[-1][0])
+    assert order_ids(outbox.pending(SINK)) == ["C"]
+    assert outbox.backlog(SINK) == 1
+    assert outbox.purge([SINK]) == 2
+
+
+def test_recover_after_crash_keeps_committed_orders_only(tmp_path):
+    db_path = str(tmp_path / "outbox.db")
+    outbox = OrderOutbox(db_path)
+    outbox.stage([make_order("stored"), make_order("lost")])
+
+    # Restart: a new outbox on the same file, and storage only has one order
+    outbox = OrderOutbox(db_path)
+    assert outbox.recover(lambda order_id: order_id == "stored") == (1, 1)
+    assert order_ids(outbox.pending(SINK)) == ["stored"]
+
+
+def test_recover_skips_events_inside_grace_period(tmp_path):
+    outbox = OrderOutbox(str(tmp_path / "outbox.db"))
+    outbox.stage([make_order("A")])
+
+    assert outbox.recover(lambda order_id: True, older_than=60) == (0, 0)
+    assert outbox.recover(lambda order_id: True, older_than=0) == (1, 0)
+
+
+def test_failed_confirm_still_stores_order(tmp_path):
+    outbox = OrderOutbox(str(tmp_path / "outbox.db"))
+    storage = OrderStorage(str(tmp_path / "orders.json"), outbox=outbox)
+
+    with mock.patch.object(outbox, "confirm", side_effect=RuntimeError("database is locked")):
+        [order_id] = storage.add_orders([{"email": "a@example.com"}])
+
+    assert storage.get_order_by_id(order_id) is not None
+    assert storage.version == 1
+    assert outbox.pending(SINK) == []
+    # The stale event is kept, since its order is stored
+    assert outbox.recover(storage.has_order) == (1, 0)
+    assert order_ids(outbox.pending(SINK)) == [order_id]
+
+
+def test_dispatcher_resolves_stale_events_blocking_delivery(tmp_path):
+    outbox = OrderOutbox(str(tmp_path / "outbox.db"))
+    outbox.stage([make_order("A")])  # its confirm and discard both failed
+    outbox.confirm(outbox.stage([make_order("B")]))
+    delivered = []
+
+    async def post(client, url, events):
+        delivered.extend(event["order_id"] for event in events)
+
+    async def run():
+        dispatcher = OrderEventDispatcher(outbox, [SINK], order_exists=lambda order_id: False, stale_after=0)
+        dispatcher._post = post
+        await dispatcher._resolve_stale()
+        await dispatcher._drain(None, dispatcher.sinks[SINK])
+
+    asyncio.run(run())
+    assert delivered == ["B"]
+    assert outbox.backlog(SINK) == 0